@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+from utils.storage import get_media_storage
+
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
 
@@ -54,7 +56,7 @@ class User(AbstractUser):
     username = None
     email = models.EmailField(_('email address'), unique=True)
     role = models.CharField(_('role'), max_length=20, choices=ROLE_CHOICES, default=ROLE_USER)
-    profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True)
+    profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True, storage=get_media_storage)
     bio = models.TextField(_('biography'), blank=True)
     date_joined = models.DateTimeField(_('date joined'), auto_now_add=True)
     
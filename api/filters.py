@@ -0,0 +1,49 @@
+import django_filters
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters
+
+from content.search import is_searchable, search
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that answers ``?search=`` from the stored full-text search
+    vectors of searchable content, ranked by relevance. Models without
+    search vectors fall back to the regular ``search_fields`` lookups.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not is_searchable(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search(queryset, ' '.join(terms), language=getattr(request, 'LANGUAGE_CODE', None))
+
+
+class ContentFilterSet(django_filters.FilterSet):
+    """
+    Base of the filtersets generated from ``filterset_fields``. With
+    ``?category=<id>&descendants=true`` content in the subcategories of the
+    category matches too, through one prefix match on the materialized
+    category path instead of a query per level.
+    """
+    descendants = django_filters.BooleanFilter(method='filter_descendants')
+
+    def filter_descendants(self, queryset, name, value):
+        # Applied together with the category in filter_queryset
+        return queryset
+
+    def filter_queryset(self, queryset):
+        cleaned_data = self.form.cleaned_data
+        category = cleaned_data.get('category')
+        if cleaned_data.get('descendants') and category is not None and category.path:
+            del cleaned_data['category']
+            queryset = queryset.filter(category__path__startswith=category.path)
+        return super().filter_queryset(queryset)
+
+
+class ContentFilterBackend(DjangoFilterBackend):
+    """DjangoFilterBackend whose filtersets support ``?descendants=true``."""
+    filterset_base = ContentFilterSet
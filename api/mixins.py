@@ -0,0 +1,202 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import translation
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname, resolution_order
+from rest_framework import serializers
+
+
+def _related_lookups(serializer, model, prefix=''):
+    """
+    Walk the readable fields of a serializer and collect the relations it
+    renders, split into forward single-valued relations (select_related) and
+    multi-valued relations (prefetch_related).
+    """
+    select, prefetch = set(), set()
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        name = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = f'{prefix}{name}'
+        child = field.child if isinstance(field, serializers.ListSerializer) else field
+
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.add(lookup)
+        elif model_field.concrete or model_field.one_to_one:
+            select.add(lookup)
+        else:
+            continue
+
+        # Nested serializers may render relations of their own
+        if isinstance(child, serializers.BaseSerializer):
+            nested_select, nested_prefetch = _related_lookups(
+                child, model_field.related_model, prefix=f'{lookup}__'
+            )
+            if lookup in prefetch:
+                prefetch.update(nested_select | nested_prefetch)
+            else:
+                select.update(nested_select)
+                prefetch.update(nested_prefetch)
+
+    return select, prefetch
+
+
+@lru_cache(maxsize=None)
+def get_related_lookups(serializer_class):
+    """Cached (select_related, prefetch_related) lookups for a model serializer."""
+    model = serializer_class.Meta.model
+    select, prefetch = _related_lookups(serializer_class(), model)
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def shape_queryset(queryset, serializer_class):
+    """Apply the joins and prefetches a serializer needs to render queryset rows."""
+    select, prefetch = get_related_lookups(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def translated_columns(model, name, language):
+    """
+    Columns read by translated field name in language: its own and those of
+    its fallback languages. None if the field is not translated.
+    """
+    try:
+        options = translator.get_options_for_model(model)
+    except NotRegistered:
+        return None
+    if name not in options.fields:
+        return None
+    languages = resolution_order(language, getattr(model, name).fallback_languages)
+    return [build_localized_fieldname(name, lang) for lang in languages]
+
+
+def _loaded_columns(serializer, model, language):
+    """
+    Model fields the readable fields of a serializer read, for only(), plus
+    the relations its method fields follow. Returns (None, ()) when a field
+    reads something that cannot be told from its source.
+    """
+    columns, relations = set(), set()
+    sources = getattr(serializer, 'sparse_sources', {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if name not in sources:
+                return None, ()
+            names = sources[name]
+        else:
+            names = [field.source.split('.')[0]]
+
+        for source in names:
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                return None, ()
+            if not model_field.concrete or model_field.many_to_many:
+                # Prefetched relations only need the primary key
+                continue
+            if field.source == '*' and model_field.is_relation:
+                relations.add(source)
+            columns.update(translated_columns(model, source, language) or [source])
+
+    return columns, relations
+
+
+def shape_sparse_queryset(queryset, serializer):
+    """
+    Apply the joins and prefetches of a serializer instance, which may render
+    a subset of its class's fields, and load only the columns those read in
+    the active language.
+    """
+    select, prefetch = _related_lookups(serializer, queryset.model)
+    columns, relations = _loaded_columns(serializer, queryset.model, translation.get_language())
+    select |= relations
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    if columns is not None:
+        queryset = queryset.only(*sorted(columns | {lookup.split('__')[0] for lookup in select}))
+    return queryset
+
+
+class QuerysetShapingMixin:
+    """
+    Shapes the viewset queryset around the relations its serializer renders,
+    so list endpoints run a fixed number of queries whatever the page size.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.shape_queryset(queryset)
+
+    def shape_queryset(self, queryset):
+        return shape_queryset(queryset, self.get_serializer_class())
+
+
+class SparseFieldsMixin:
+    """
+    Lets clients choose what list and detail responses carry: ?fields=a,b
+    names the fields to render (unknown names are ignored) and ?lang= the
+    language of the translated ones. Lists default to the serializer's
+    compact form. Only the columns the rendered fields read are loaded, so
+    unused bodies and other languages are never fetched.
+
+    Comes before QuerysetShapingMixin, whose shaping it narrows.
+    """
+    sparse_actions = ('list', 'retrieve')
+    fields_query_param = 'fields'
+    language_query_param = 'lang'
+
+    def dispatch(self, request, *args, **kwargs):
+        language = request.GET.get(self.language_query_param)
+        if language not in settings.MODELTRANSLATION_LANGUAGES:
+            return super().dispatch(request, *args, **kwargs)
+        with translation.override(language):
+            response = super().dispatch(request, *args, **kwargs)
+        response['Content-Language'] = language
+        return response
+
+    def get_requested_fields(self):
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.sparse_actions:
+            context['fields'] = self.get_requested_fields()
+            context['compact'] = self.action == 'list'
+        return context
+
+    def shape_queryset(self, queryset):
+        if self.action not in self.sparse_actions:
+            return super().shape_queryset(queryset)
+        return shape_sparse_queryset(queryset, self.get_serializer())
+
+
+class RelatedContentMixin:
+    """Includes the precomputed related content in detail responses."""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_related'] = self.action == 'retrieve'
+        return context
@@ -0,0 +1,187 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+def estimate_count(queryset):
+    """
+    Approximate number of rows of queryset, read from the planner statistics
+    on PostgreSQL (the row estimate of its EXPLAIN plan) so no COUNT(*) scan
+    is needed. Other databases fall back to an exact count.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Cursor pagination that seeks directly to the rows after (or before) the
+    last row seen, using the view's unique ``keyset_ordering``. Unlike
+    page-number pagination it needs neither OFFSET nor COUNT(*), so every
+    page costs the same however deep it is.
+
+    The cursor is an opaque token holding the ordering values of the
+    boundary row and the direction. With ?count=estimate the response also
+    carries an ``estimated_count`` of the whole result set.
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def encode_cursor(self, row, reverse):
+        values = [
+            row._meta.get_field(name.lstrip('-')).value_to_string(row)
+            for name in self.ordering_fields
+        ]
+        token = json.dumps({'r': int(reverse), 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            data = json.loads(token)
+            values = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering_fields, data['v'], strict=True)
+            ]
+            return bool(data['r']), values
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def keyset_filter(self, values, reverse):
+        """
+        Rows strictly after the boundary in the (possibly reversed) ordering:
+        (a, b) > (x, y) becomes a > x OR (a = x AND b > y), plus a redundant
+        bound on the first column so an index range scan can be used.
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering_fields, values):
+            descending = name.startswith('-') != reverse
+            field = name.lstrip('-')
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+
+        first = self.ordering_fields[0]
+        first_lookup = 'lte' if first.startswith('-') != reverse else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{first_lookup}': values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering_fields = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+        self.estimated_count = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.estimated_count = estimate_count(queryset)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = False
+        if cursor is not None:
+            reverse, values = cursor
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+
+        ordering = self.ordering_fields
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.estimated_count is not None:
+            body = {'estimated_count': self.estimated_count, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'estimated_count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class ContentPagination(pagination.PageNumberPagination):
+    """
+    Page numbers (?page=) by default, for existing clients, and keyset pages
+    when the request has a ?cursor= parameter (empty for the first page).
+    Cursor pages are ordered by the view's ``keyset_ordering``, newest first
+    by default, and skip both the OFFSET and the COUNT(*) of page numbers.
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,9 +1,13 @@
+from django.utils.text import Truncator
 from rest_framework import serializers
 from content.models import (
     Article, Story, Landmark, Image, Video, 
-    Category, Tag, QRCode
+    Category, Tag, QRCode, ContentIndex, ImageRendition
 )
 from moderation.models import ModerationLog, ContentReport
+from moderation.bulk import ACTIONS as MODERATION_ACTIONS, MAX_ITEMS as MODERATION_MAX_ITEMS
+from content.indexing import INDEXED_MODELS
+from content.related import related_items
 from django.contrib.contenttypes.models import ContentType
 from utils.qrcode_generator import generate_qrcode
 
@@ -12,6 +16,11 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'parent']
 
+    def validate_parent(self, parent):
+        if parent is not None and self.instance is not None and self.instance.is_ancestor_of(parent):
+            raise serializers.ValidationError('A category cannot be moved into itself or its subcategories.')
+        return parent
+
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,13 +28,88 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug']
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class TagStatsSerializer(TagSerializer):
+    """A tag with the number of published articles, stories and landmarks carrying it."""
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['article_count', 'story_count', 'landmark_count', 'usage_count']
+        read_only_fields = ['article_count', 'story_count', 'landmark_count', 'usage_count']
+
+
+class ImageRenditionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageRendition
+        fields = ['size', 'format', 'file', 'width', 'height']
+        read_only_fields = fields
+
+
+class RelatedItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    slug = serializers.SlugField()
+    title = serializers.CharField()
+
+
+class RelatedContentSerializerMixin:
+    """
+    Adds the precomputed related content as ``related`` when the view asks
+    for it with the ``include_related`` context flag.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('include_related'):
+            fields['related'] = serializers.SerializerMethodField()
+        return fields
+
+    def get_related(self, obj):
+        return RelatedItemSerializer(related_items(obj), many=True).data
+
+
+# Characters of the summary kept in compact list items
+SUMMARY_LENGTH = 200
+
+CONTENT_LIST_FIELDS = [
+    'id', 'uuid', 'title', 'slug', 'summary', 'user', 'author_name', 'category', 'category_name',
+    'tags', 'created_at', 'updated_at', 'is_published', 'is_featured', 'status', 'view_count',
+]
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Renders only the fields named by the ``fields`` context entry, or the
+    compact ``list_fields`` when ``compact`` is set, with the summary cut to
+    SUMMARY_LENGTH characters. ``sparse_sources`` names the model fields
+    each method field reads, so the view can load just those columns.
+    """
+    list_fields = None
+    sparse_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get('fields')
+        if names is None and self.context.get('compact'):
+            names = self.list_fields
+        if names is not None:
+            fields = {name: field for name, field in fields.items() if name in names}
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get('compact') and data.get('summary'):
+            data['summary'] = Truncator(data['summary']).chars(SUMMARY_LENGTH)
+        return data
+
+
+class ArticleSerializer(SparseFieldsSerializerMixin, RelatedContentSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.StringRelatedField(source='category', read_only=True)
     author_name = serializers.SerializerMethodField()
     tags = TagSerializer(many=True, read_only=True)
     tag_ids = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all(), write_only=True, required=False, source='tags'
     )
+    renditions = ImageRenditionSerializer(many=True, read_only=True)
+    
+    list_fields = CONTENT_LIST_FIELDS + ['featured_image', 'renditions']
+    sparse_sources = {'author_name': ['user'], 'related': []}
     
     class Meta:
         model = Article
@@ -33,7 +117,7 @@ class ArticleSerializer(serializers.ModelSerializer):
             'id', 'uuid', 'title', 'slug', 'content', 'summary', 'user', 'author_name',
             'category', 'category_name', 'tags', 'tag_ids', 'created_at', 'updated_at',
             'is_published', 'is_featured', 'status', 'moderation_comment', 'view_count',
-            'featured_image'
+            'featured_image', 'renditions'
         ]
         read_only_fields = ['id', 'uuid', 'created_at', 'updated_at', 'view_count', 'user']
     
@@ -49,7 +133,7 @@ class ArticleSerializer(serializers.ModelSerializer):
         return article
 
 
-class StorySerializer(serializers.ModelSerializer):
+class StorySerializer(SparseFieldsSerializerMixin, RelatedContentSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.StringRelatedField(source='category', read_only=True)
     author_name = serializers.SerializerMethodField()
     tags = TagSerializer(many=True, read_only=True)
@@ -57,6 +141,9 @@ class StorySerializer(serializers.ModelSerializer):
         many=True, queryset=Tag.objects.all(), write_only=True, required=False, source='tags'
     )
     
+    list_fields = CONTENT_LIST_FIELDS + ['location', 'period']
+    sparse_sources = {'author_name': ['user'], 'related': []}
+    
     class Meta:
         model = Story
         fields = [
@@ -79,13 +166,19 @@ class StorySerializer(serializers.ModelSerializer):
         return story
 
 
-class LandmarkSerializer(serializers.ModelSerializer):
+class LandmarkSerializer(SparseFieldsSerializerMixin, RelatedContentSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.StringRelatedField(source='category', read_only=True)
     author_name = serializers.SerializerMethodField()
     tags = TagSerializer(many=True, read_only=True)
     tag_ids = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all(), write_only=True, required=False, source='tags'
     )
+    renditions = ImageRenditionSerializer(many=True, read_only=True)
+    
+    list_fields = CONTENT_LIST_FIELDS + [
+        'location', 'latitude', 'longitude', 'historical_period', 'featured_image', 'renditions'
+    ]
+    sparse_sources = {'author_name': ['user'], 'related': []}
     
     class Meta:
         model = Landmark
@@ -93,7 +186,8 @@ class LandmarkSerializer(serializers.ModelSerializer):
             'id', 'uuid', 'title', 'slug', 'content', 'summary', 'user', 'author_name',
             'category', 'category_name', 'tags', 'tag_ids', 'created_at', 'updated_at',
             'is_published', 'is_featured', 'status', 'moderation_comment', 'view_count',
-            'location', 'latitude', 'longitude', 'historical_period', 'featured_image'
+            'location', 'latitude', 'longitude', 'historical_period', 'featured_image',
+            'renditions'
         ]
         read_only_fields = ['id', 'uuid', 'created_at', 'updated_at', 'view_count', 'user']
     
@@ -109,16 +203,20 @@ class LandmarkSerializer(serializers.ModelSerializer):
         return landmark
 
 
-class ImageSerializer(serializers.ModelSerializer):
+class ImageSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     uploader_name = serializers.SerializerMethodField()
+    renditions = ImageRenditionSerializer(many=True, read_only=True)
+    
+    sparse_sources = {'uploader_name': ['user']}
     
     class Meta:
         model = Image
         fields = [
             'id', 'uuid', 'title', 'description', 'image', 'alt_text', 
-            'user', 'uploader_name', 'created_at', 'is_published', 'status'
+            'user', 'uploader_name', 'created_at', 'is_published', 'status',
+            'processing_status', 'renditions'
         ]
-        read_only_fields = ['id', 'uuid', 'created_at', 'user']
+        read_only_fields = ['id', 'uuid', 'created_at', 'user', 'processing_status']
     
     def get_uploader_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}".strip() or obj.user.email
@@ -128,15 +226,18 @@ class ImageSerializer(serializers.ModelSerializer):
         return Image.objects.create(**validated_data)
 
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     uploader_name = serializers.SerializerMethodField()
+    renditions = ImageRenditionSerializer(many=True, read_only=True)
+    
+    sparse_sources = {'uploader_name': ['user']}
     
     class Meta:
         model = Video
         fields = [
             'id', 'uuid', 'title', 'description', 'video_file', 'video_url', 
             'thumbnail', 'user', 'uploader_name', 'created_at', 'duration',
-            'is_published', 'status'
+            'is_published', 'status', 'renditions'
         ]
         read_only_fields = ['id', 'uuid', 'created_at', 'user']
     
@@ -153,10 +254,10 @@ class QRCodeSerializer(serializers.ModelSerializer):
         model = QRCode
         fields = [
             'id', 'uuid', 'title', 'description', 'qr_image', 'content_type',
-            'article', 'story', 'landmark', 'custom_url', 'created_at',
-            'created_by', 'is_active'
+            'article', 'story', 'landmark', 'custom_url', 'encoded_url', 'created_at',
+            'created_by', 'is_active', 'scan_count'
         ]
-        read_only_fields = ['id', 'uuid', 'qr_image', 'created_at', 'created_by']
+        read_only_fields = ['id', 'uuid', 'qr_image', 'encoded_url', 'created_at', 'created_by', 'scan_count']
     
     def validate(self, data):
         content_type = data.get('content_type')
@@ -188,13 +289,46 @@ class QRCodeSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         
-        # Regenerate QR code if content changed
+        # Regenerate QR code if the encoded URL changed
         generate_qrcode(instance)
         instance.save()
         
         return instance
 
 
+class ContentIndexSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    type = serializers.CharField(source='content_type', read_only=True)
+    title = serializers.CharField(read_only=True)
+    tags = serializers.ListField(source='tag_id_list', child=serializers.IntegerField(), read_only=True)
+    
+    class Meta:
+        model = ContentIndex
+        fields = [
+            'type', 'id', 'slug', 'title', 'status', 'is_published',
+            'category', 'tags', 'created_at', 'view_count'
+        ]
+        read_only_fields = fields
+
+
+class ModerationQueueSerializer(serializers.ModelSerializer):
+    """Compact summary of content waiting for review, rendered from the content index"""
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    type = serializers.CharField(source='content_type', read_only=True)
+    title = serializers.CharField(read_only=True)
+    category_name = serializers.CharField(source='category.name', default=None, read_only=True)
+    submitter = serializers.PrimaryKeyRelatedField(source='user', read_only=True)
+    submitter_email = serializers.EmailField(source='user.email', default=None, read_only=True)
+    
+    class Meta:
+        model = ContentIndex
+        fields = [
+            'type', 'id', 'slug', 'title', 'category', 'category_name',
+            'submitter', 'submitter_email', 'submitted_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class ModerationLogSerializer(serializers.ModelSerializer):
     content_type_name = serializers.StringRelatedField(source='content_type')
     moderator_name = serializers.SerializerMethodField()
@@ -211,6 +345,30 @@ class ModerationLogSerializer(serializers.ModelSerializer):
         return f"{obj.moderator.first_name} {obj.moderator.last_name}".strip() or obj.moderator.email
 
 
+class BulkModerationItemSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(INDEXED_MODELS))
+    object_id = serializers.IntegerField(min_value=1)
+    action = serializers.ChoiceField(choices=list(MODERATION_ACTIONS), required=False)
+    comment = serializers.CharField(required=False, allow_blank=True)
+
+
+class BulkModerationSerializer(serializers.Serializer):
+    """Items to moderate; action and comment apply to the items that don't set their own"""
+    action = serializers.ChoiceField(choices=list(MODERATION_ACTIONS), required=False)
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+    items = BulkModerationItemSerializer(many=True, allow_empty=False, max_length=MODERATION_MAX_ITEMS)
+
+    def validate(self, data):
+        items = []
+        for item in data['items']:
+            action = item.get('action') or data.get('action')
+            if not action:
+                raise serializers.ValidationError({'action': 'Give an action for the request or for every item.'})
+            items.append({**item, 'action': action, 'comment': item.get('comment', data['comment'])})
+        data['items'] = items
+        return data
+
+
 class ContentReportSerializer(serializers.ModelSerializer):
     content_type_name = serializers.StringRelatedField(source='content_type')
     reporter_name = serializers.SerializerMethodField()
@@ -4,7 +4,9 @@ from .views import (
     ArticleViewSet, StoryViewSet, LandmarkViewSet,
     ImageViewSet, VideoViewSet, CategoryViewSet, 
     TagViewSet, QRCodeViewSet, UserViewSet,
-    ModerationViewSet, ContentReportViewSet
+    ModerationViewSet, ContentReportViewSet,
+    ContentFeedView, ContentSearchView, CacheStatsView, ModerationQueueView,
+    ModerationLogListView
 )
 
 router = DefaultRouter()
@@ -21,6 +23,11 @@ router.register(r'moderation', ModerationViewSet, basename='moderation')
 router.register(r'reports', ContentReportViewSet)
 
 urlpatterns = [
+    path('feed/', ContentFeedView.as_view(), name='content-feed'),
+    path('search/', ContentSearchView.as_view(), name='content-search'),
+    path('moderation/queue/', ModerationQueueView.as_view(), name='moderation-queue'),
+    path('moderation/logs/', ModerationLogListView.as_view(), name='moderation-logs'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
     path('', include(router.urls)),
     path('auth/', include('accounts.urls')),
 ]
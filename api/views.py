@@ -1,13 +1,18 @@
-from rest_framework import viewsets, filters, status, permissions
+import io
+import tempfile
+import zipfile
+
+from rest_framework import viewsets, generics, filters, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
-from django.core.mail import send_mail
-from django.conf import settings
 from django.db import models
+from django.http import FileResponse, HttpResponse
 
 from accounts.permissions import IsSuperAdmin, IsAdmin, IsOwnerOrAdmin
 from accounts.models import User
@@ -15,21 +20,53 @@ from accounts.serializers import UserSerializer
 
 from content.models import (
     Article, Story, Landmark, Image, Video, 
-    Category, Tag, QRCode
+    Category, Tag, QRCode, ContentIndex
 )
+from content.categories import category_tree
+from content.geo import nearby
+from content.search import search
+from content.tag_stats import CACHE_TAG as TAG_COUNTS_CACHE_TAG, COUNTED_MODELS as TAG_COUNTED_MODELS
+from content.view_counter import record_view
 from moderation.models import ModerationLog, ContentReport
+from moderation.bulk import bulk_moderate
+from moderation.stats import get_dashboard_stats
+from moderation.notifications import notify_admins_of_submission, notify_author
 
+from .filters import ContentFilterBackend, FullTextSearchFilter
+from .mixins import QuerysetShapingMixin, RelatedContentMixin, SparseFieldsMixin, shape_queryset
+from .pagination import ContentPagination, KeysetPagination
 from .serializers import (
     ArticleSerializer, StorySerializer, LandmarkSerializer,
     ImageSerializer, VideoSerializer, CategorySerializer, 
-    TagSerializer, QRCodeSerializer, ModerationLogSerializer,
-    ContentReportSerializer
+    TagStatsSerializer, QRCodeSerializer, ModerationLogSerializer,
+    ContentReportSerializer, ContentIndexSerializer, BulkModerationSerializer,
+    ModerationQueueSerializer
+)
+
+from utils.conditional import ConditionalGetMixin, conditional_response, make_etag
+from utils.response_cache import CachedResponseMixin, get_stats
+from utils.qrcode_generator import (
+    CONTENT_TYPES as QR_CONTENT_TYPES, ERROR_CORRECTION_LEVELS, MIN_SIZE as QR_MIN_SIZE,
+    MAX_SIZE as QR_MAX_SIZE, get_landmark_url, get_qrcode_url, render_key, render_qrcode,
 )
+from content.tasks import schedule_renditions
 
-from utils.file_compressor import compress_image
+# Cache tags of the anonymous responses of each endpoint, invalidated by
+# the signal handlers in content/signals.py
+CONTENT_CACHE_TAGS = ('content.category', 'content.tag', 'accounts.user')
 
+# Largest radius (km) and number of results of a nearby landmarks search
+MAX_NEARBY_RADIUS = 100
+MAX_NEARBY_LIMIT = 100
 
-class CategoryViewSet(viewsets.ModelViewSet):
+# Most tags returned by /api/tags/popular/
+MAX_POPULAR_TAGS = 200
+
+
+class CategoryViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_tags = ('content.category',)
+    conditional_timestamp = 'updated_at'
+    cache_actions = ('list', 'retrieve', 'tree')
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
@@ -37,29 +74,79 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'tree']:
             return [AllowAny()]
         return [IsAdmin()]
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Every category nested under its parent, in the request language,
+        served from the in-memory category tree.
+        """
+        validators = self.list_validators(Category.objects.all())
+        return conditional_response(
+            request, make_etag(request, self.cache_tags, validators), None,
+            lambda: Response(category_tree().roots),
+        )
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_tags = ('content.tag', TAG_COUNTS_CACHE_TAG)
+    conditional_timestamp = 'updated_at'
+    cache_actions = ('list', 'retrieve', 'popular')
     queryset = Tag.objects.all()
-    serializer_class = TagSerializer
+    serializer_class = TagStatsSerializer
     lookup_field = 'slug'
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
+    ordering_fields = ['name', 'usage_count', 'article_count', 'story_count', 'landmark_count']
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'popular']:
             return [AllowAny()]
         return [IsAdmin()]
+    
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """
+        The most used tags, for a tag cloud: ?limit= tags (default 30) by
+        their published content of ?type=article|story|landmark (default all
+        types), each with its count and a weight relative to the top tag.
+        """
+        content_type = request.query_params.get('type')
+        if content_type is not None and content_type not in TAG_COUNTED_MODELS:
+            raise ValidationError({'type': f"Choose one of: {', '.join(TAG_COUNTED_MODELS)}"})
+        try:
+            limit = int(request.query_params.get('limit', 30))
+        except ValueError:
+            raise ValidationError({'limit': 'A number is required.'})
+        if not 1 <= limit <= MAX_POPULAR_TAGS:
+            raise ValidationError({'limit': f'Must be between 1 and {MAX_POPULAR_TAGS}.'})
+        
+        field = f'{content_type}_count' if content_type else 'usage_count'
+        
+        def get_response():
+            tags = list(Tag.objects.filter(**{f'{field}__gt': 0}).order_by(f'-{field}', 'name')[:limit])
+            top = getattr(tags[0], field) if tags else 0
+            data = self.get_serializer(tags, many=True).data
+            for item, tag in zip(data, tags):
+                item['count'] = getattr(tag, field)
+                item['weight'] = round(item['count'] / top, 3)
+            return Response(data)
+        
+        validators = self.list_validators(Tag.objects.filter(**{f'{field}__gt': 0}))
+        return conditional_response(request, make_etag(request, self.cache_tags, validators), None, get_response)
 
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, QuerysetShapingMixin, RelatedContentMixin, viewsets.ModelViewSet):
+    cache_tags = ('content.article',) + CONTENT_CACHE_TAGS
+    conditional_timestamp = 'updated_at'
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
+    pagination_class = ContentPagination
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [ContentFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'is_published', 'is_featured', 'status', 'tags']
     search_fields = ['title', 'content', 'summary']
     ordering_fields = ['created_at', 'updated_at', 'view_count']
@@ -110,40 +197,35 @@ class ArticleViewSet(viewsets.ModelViewSet):
         )
         
         # Notify admins about new content for review
-        admins = User.objects.filter(role__in=[User.ROLE_ADMIN, User.ROLE_SUPERADMIN])
-        admin_emails = [admin.email for admin in admins]
-        
-        if admin_emails and settings.EMAIL_HOST_USER:
-            send_mail(
-                'New content submitted for review',
-                f'A new article "{article.title}" has been submitted for review by {request.user.email}.',
-                settings.DEFAULT_FROM_EMAIL,
-                admin_emails,
-                fail_silently=True,
-            )
+        notify_admins_of_submission(article, request.user)
         
         return Response({'status': 'submitted for review'})
 
     @action(detail=True, methods=['post'])
     def increment_view(self, request, slug=None):
         article = self.get_object()
-        article.view_count += 1
-        article.save(update_fields=['view_count'])
+        record_view(article, request)
         return Response({'status': 'view count incremented'})
     
     def perform_create(self, serializer):
         article = serializer.save()
-        # Compress featured image if present
-        if article.featured_image:
-            compress_image(article.featured_image)
-            article.save()
+        # Renditions of the featured image are generated by a background job
+        schedule_renditions(article)
+    
+    def perform_update(self, serializer):
+        article = serializer.save()
+        if 'featured_image' in serializer.validated_data:
+            schedule_renditions(article)
 
 
-class StoryViewSet(viewsets.ModelViewSet):
+class StoryViewSet(CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, QuerysetShapingMixin, RelatedContentMixin, viewsets.ModelViewSet):
+    cache_tags = ('content.story',) + CONTENT_CACHE_TAGS
+    conditional_timestamp = 'updated_at'
     queryset = Story.objects.all()
     serializer_class = StorySerializer
+    pagination_class = ContentPagination
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [ContentFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'is_published', 'is_featured', 'status', 'tags']
     search_fields = ['title', 'content', 'summary', 'location', 'period']
     ordering_fields = ['created_at', 'updated_at', 'view_count']
@@ -191,40 +273,33 @@ class StoryViewSet(viewsets.ModelViewSet):
             comment=request.data.get('comment', '')
         )
         
-        # Notify admins
-        admins = User.objects.filter(role__in=[User.ROLE_ADMIN, User.ROLE_SUPERADMIN])
-        admin_emails = [admin.email for admin in admins]
-        
-        if admin_emails and settings.EMAIL_HOST_USER:
-            send_mail(
-                'New content submitted for review',
-                f'A new story "{story.title}" has been submitted for review by {request.user.email}.',
-                settings.DEFAULT_FROM_EMAIL,
-                admin_emails,
-                fail_silently=True,
-            )
+        # Notify admins about new content for review
+        notify_admins_of_submission(story, request.user)
         
         return Response({'status': 'submitted for review'})
     
     @action(detail=True, methods=['post'])
     def increment_view(self, request, slug=None):
         story = self.get_object()
-        story.view_count += 1
-        story.save(update_fields=['view_count'])
+        record_view(story, request)
         return Response({'status': 'view count incremented'})
 
 
-class LandmarkViewSet(viewsets.ModelViewSet):
+class LandmarkViewSet(CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, QuerysetShapingMixin, RelatedContentMixin, viewsets.ModelViewSet):
+    cache_tags = ('content.landmark',) + CONTENT_CACHE_TAGS
+    conditional_timestamp = 'updated_at'
+    cache_actions = ('list', 'retrieve', 'nearby')
     queryset = Landmark.objects.all()
     serializer_class = LandmarkSerializer
+    pagination_class = ContentPagination
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [ContentFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'is_published', 'is_featured', 'status', 'tags']
     search_fields = ['title', 'content', 'summary', 'location', 'historical_period']
     ordering_fields = ['created_at', 'updated_at', 'view_count']
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'nearby']:
             return [AllowAny()]
         elif self.action in ['create']:
             return [IsAuthenticated()]
@@ -243,6 +318,40 @@ class LandmarkViewSet(viewsets.ModelViewSet):
             )
         return queryset
     
+    def get_nearby_options(self, request):
+        """Centre, radius (km) and limit of a nearby search, from ?lat=, ?lon=, ?radius= and ?limit=."""
+        options = {}
+        for name, default, low, high in [
+            ('lat', None, -90, 90),
+            ('lon', None, -180, 180),
+            ('radius', 5, 0, MAX_NEARBY_RADIUS),
+            ('limit', 20, 1, MAX_NEARBY_LIMIT),
+        ]:
+            value = request.query_params.get(name, default)
+            try:
+                value = float(value) if name != 'limit' else int(value)
+            except (TypeError, ValueError):
+                raise ValidationError({name: 'A number is required.'})
+            if not low <= value <= high:
+                raise ValidationError({name: f'Must be between {low} and {high}.'})
+            options[name] = value
+        return options
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Landmarks within ?radius= km (default 5) of ?lat=&lon=, nearest
+        first, each with its distance in km.
+        """
+        options = self.get_nearby_options(request)
+        queryset = self.filter_queryset(self.get_queryset()).exclude(latitude=None).exclude(longitude=None)
+        landmarks = nearby(queryset, options['lat'], options['lon'], options['radius'], limit=options['limit'])
+        
+        data = self.get_serializer(landmarks, many=True).data
+        for item, landmark in zip(data, landmarks):
+            item['distance'] = round(landmark.distance, 3)
+        return Response(data)
+    
     @action(detail=True, methods=['post'])
     def submit_for_review(self, request, slug=None):
         landmark = self.get_object()
@@ -266,39 +375,32 @@ class LandmarkViewSet(viewsets.ModelViewSet):
             comment=request.data.get('comment', '')
         )
         
-        # Notify admins
-        admins = User.objects.filter(role__in=[User.ROLE_ADMIN, User.ROLE_SUPERADMIN])
-        admin_emails = [admin.email for admin in admins]
-        
-        if admin_emails and settings.EMAIL_HOST_USER:
-            send_mail(
-                'New content submitted for review',
-                f'A new landmark "{landmark.title}" has been submitted for review by {request.user.email}.',
-                settings.DEFAULT_FROM_EMAIL,
-                admin_emails,
-                fail_silently=True,
-            )
+        # Notify admins about new content for review
+        notify_admins_of_submission(landmark, request.user)
         
         return Response({'status': 'submitted for review'})
     
     @action(detail=True, methods=['post'])
     def increment_view(self, request, slug=None):
         landmark = self.get_object()
-        landmark.view_count += 1
-        landmark.save(update_fields=['view_count'])
+        record_view(landmark, request)
         return Response({'status': 'view count incremented'})
     
     def perform_create(self, serializer):
         landmark = serializer.save()
-        # Compress featured image if present
-        if landmark.featured_image:
-            compress_image(landmark.featured_image)
-            landmark.save()
+        # Renditions of the featured image are generated by a background job
+        schedule_renditions(landmark)
+    
+    def perform_update(self, serializer):
+        landmark = serializer.save()
+        if 'featured_image' in serializer.validated_data:
+            schedule_renditions(landmark)
 
 
-class ImageViewSet(viewsets.ModelViewSet):
+class ImageViewSet(SparseFieldsMixin, QuerysetShapingMixin, viewsets.ModelViewSet):
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
+    pagination_class = ContentPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_published', 'status']
     search_fields = ['title', 'description', 'alt_text']
@@ -347,31 +449,26 @@ class ImageViewSet(viewsets.ModelViewSet):
             comment=request.data.get('comment', '')
         )
         
-        # Notify admins
-        admins = User.objects.filter(role__in=[User.ROLE_ADMIN, User.ROLE_SUPERADMIN])
-        admin_emails = [admin.email for admin in admins]
-        
-        if admin_emails and settings.EMAIL_HOST_USER:
-            send_mail(
-                'New content submitted for review',
-                f'A new image "{image.title}" has been submitted for review by {request.user.email}.',
-                settings.DEFAULT_FROM_EMAIL,
-                admin_emails,
-                fail_silently=True,
-            )
+        # Notify admins about new content for review
+        notify_admins_of_submission(image, request.user)
         
         return Response({'status': 'submitted for review'})
     
     def perform_create(self, serializer):
         image = serializer.save()
-        # Compress image
-        compress_image(image.image)
-        image.save()
+        # Renditions are generated by a background job, the upload returns right away
+        schedule_renditions(image)
+    
+    def perform_update(self, serializer):
+        image = serializer.save()
+        if 'image' in serializer.validated_data:
+            schedule_renditions(image)
 
 
-class VideoViewSet(viewsets.ModelViewSet):
+class VideoViewSet(SparseFieldsMixin, QuerysetShapingMixin, viewsets.ModelViewSet):
     queryset = Video.objects.all()
     serializer_class = VideoSerializer
+    pagination_class = ContentPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_published', 'status']
     search_fields = ['title', 'description']
@@ -420,27 +517,116 @@ class VideoViewSet(viewsets.ModelViewSet):
             comment=request.data.get('comment', '')
         )
         
-        # Notify admins
-        admins = User.objects.filter(role__in=[User.ROLE_ADMIN, User.ROLE_SUPERADMIN])
-        admin_emails = [admin.email for admin in admins]
-        
-        if admin_emails and settings.EMAIL_HOST_USER:
-            send_mail(
-                'New content submitted for review',
-                f'A new video "{video.title}" has been submitted for review by {request.user.email}.',
-                settings.DEFAULT_FROM_EMAIL,
-                admin_emails,
-                fail_silently=True,
-            )
+        # Notify admins about new content for review
+        notify_admins_of_submission(video, request.user)
         
         return Response({'status': 'submitted for review'})
     
     def perform_create(self, serializer):
         video = serializer.save()
-        # Compress thumbnail if present
-        if video.thumbnail:
-            compress_image(video.thumbnail)
-            video.save()
+        # Renditions of the thumbnail are generated by a background job
+        schedule_renditions(video)
+    
+    def perform_update(self, serializer):
+        video = serializer.save()
+        if 'thumbnail' in serializer.validated_data:
+            schedule_renditions(video)
+
+
+class ContentFeedView(generics.ListAPIView):
+    """
+    Published content of every type, newest first, from the denormalized
+    content index. Filter with ?type=article,story, ?category=<id> (add
+    ?descendants=true to include its subcategories) and ?tag=<id>; pages
+    are keyset-paginated with ?cursor=.
+    """
+    serializer_class = ContentIndexSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [AllowAny]
+    
+    def get_queryset(self):
+        queryset = ContentIndex.objects.published()
+        
+        content_types = self.request.query_params.get('type')
+        if content_types:
+            queryset = queryset.filter(content_type__in=content_types.split(','))
+        
+        category = self.request.query_params.get('category')
+        if category and category.isdigit():
+            path = None
+            if self.request.query_params.get('descendants') in ('true', 'True', '1'):
+                path = category_tree().path(int(category))
+            if path:
+                queryset = queryset.filter(category__path__startswith=path)
+            else:
+                queryset = queryset.filter(category_id=category)
+        
+        tag = self.request.query_params.get('tag')
+        if tag and tag.isdigit():
+            queryset = queryset.filter(tag_links__tag_id=tag)
+        
+        return queryset
+
+
+class ContentSearchView(ContentFeedView):
+    """Full-text search over the titles of all published content (?q=)."""
+    
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            return ContentIndex.objects.none()
+        return search(super().get_queryset(), query, ranked=False)
+
+
+class ModerationQueueView(generics.ListAPIView):
+    """
+    Content of every type waiting for review, oldest submission first.
+    Filter with ?type=article,story, ?category=<id> and ?submitter=<user id>;
+    pages are keyset-paginated with ?cursor=, so each page is one query.
+    """
+    serializer_class = ModerationQueueSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [IsAdmin]
+    keyset_ordering = ('submitted_at', 'id')
+    
+    def get_queryset(self):
+        queryset = ContentIndex.objects.submitted().select_related('category', 'user')
+        
+        content_types = self.request.query_params.get('type')
+        if content_types:
+            queryset = queryset.filter(content_type__in=content_types.split(','))
+        
+        category = self.request.query_params.get('category')
+        if category and category.isdigit():
+            queryset = queryset.filter(category_id=category)
+        
+        submitter = self.request.query_params.get('submitter')
+        if submitter and submitter.isdigit():
+            queryset = queryset.filter(user_id=submitter)
+        
+        return queryset
+
+
+class ModerationLogListView(QuerysetShapingMixin, generics.ListAPIView):
+    """
+    Moderation history, newest first. Filter with ?content_type=<id>,
+    ?object_id=<id>, ?moderator=<user id> and ?action=; pages are numbered,
+    or keyset-paginated with ?cursor=.
+    """
+    queryset = ModerationLog.objects.all()
+    serializer_class = ModerationLogSerializer
+    pagination_class = ContentPagination
+    permission_classes = [IsAdmin]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['content_type', 'object_id', 'moderator', 'action']
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the anonymous response cache."""
+    permission_classes = [IsAdmin]
+    
+    def get(self, request):
+        return Response(get_stats())
 
 
 class QRCodeViewSet(viewsets.ModelViewSet):
@@ -448,12 +634,93 @@ class QRCodeViewSet(viewsets.ModelViewSet):
     serializer_class = QRCodeSerializer
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'image']:
             return [AllowAny()]
         return [IsAdmin()]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'image':
+            queryset = queryset.filter(is_active=True)
+        return queryset
+    
+    def get_render_options(self, request):
+        """Size, error correction and format of a rendering, from ?size=, ?ec= and ?fmt=."""
+        image_format = request.query_params.get('fmt', 'png').lower()
+        error_correction = request.query_params.get('ec', 'M').upper()
+        size = request.query_params.get('size', '10')
+        
+        if image_format not in QR_CONTENT_TYPES:
+            raise ValidationError({'fmt': f"Choose one of: {', '.join(QR_CONTENT_TYPES)}"})
+        if error_correction not in ERROR_CORRECTION_LEVELS:
+            raise ValidationError({'ec': f"Choose one of: {', '.join(ERROR_CORRECTION_LEVELS)}"})
+        if not size.isdigit() or not QR_MIN_SIZE <= int(size) <= QR_MAX_SIZE:
+            raise ValidationError({'size': f'Must be between {QR_MIN_SIZE} and {QR_MAX_SIZE}'})
+        return int(size), error_correction, image_format
+    
+    @action(detail=True, methods=['get'])
+    def image(self, request, pk=None):
+        """
+        The QR code rendered on demand as PNG or SVG (?fmt=png|svg) at
+        ?size= pixels per module with error correction ?ec=L|M|Q|H.
+        """
+        qrcode = self.get_object()
+        url = get_qrcode_url(qrcode)
+        if url is None:
+            return Response({'detail': 'QR code content is missing'}, status=status.HTTP_404_NOT_FOUND)
+        
+        size, error_correction, image_format = self.get_render_options(request)
+        etag = '"{}"'.format(render_key(url, size, error_correction, image_format))
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        
+        content = render_qrcode(url, size, error_correction, image_format)
+        response = FileResponse(
+            io.BytesIO(content),
+            content_type=QR_CONTENT_TYPES[image_format],
+            filename=f'qrcode_{qrcode.uuid}.{image_format}',
+        )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=86400'
+        return response
+    
+    @action(detail=False, methods=['get'], url_path='landmarks')
+    def landmarks(self, request):
+        """
+        QR codes of many landmarks at once as a zip archive, for printing
+        signage. Pass ?ids=1,2,3 to pick landmarks, otherwise every published
+        landmark is included. Rendering options are the same as for image.
+        """
+        size, error_correction, image_format = self.get_render_options(request)
+        
+        landmarks = Landmark.objects.order_by('slug').only('id', 'slug')
+        ids = request.query_params.get('ids')
+        if ids:
+            ids = [pk for pk in ids.split(',') if pk.strip().isdigit()]
+            landmarks = landmarks.filter(pk__in=ids)
+        else:
+            landmarks = landmarks.filter(is_published=True, status='published')
+        
+        # PNG is already compressed, SVG shrinks a lot
+        compression = zipfile.ZIP_DEFLATED if image_format == 'svg' else zipfile.ZIP_STORED
+        archive = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+        count = 0
+        with zipfile.ZipFile(archive, 'w', compression) as zip_file:
+            for landmark in landmarks.iterator():
+                content = render_qrcode(get_landmark_url(landmark), size, error_correction, image_format)
+                zip_file.writestr(f'{landmark.slug}.{image_format}', content)
+                count += 1
+        archive.seek(0)
+        
+        response = FileResponse(
+            archive, content_type='application/zip', as_attachment=True,
+            filename=f'landmark-qrcodes-{image_format}.zip',
+        )
+        response['X-QR-Code-Count'] = str(count)
+        return response
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QuerysetShapingMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     
@@ -478,12 +745,13 @@ class ModerationViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def pending_content(self, request):
+        # Unpaginated; prefer the moderation queue (ModerationQueueView) for large backlogs
         # Get all content submitted for review
-        articles = Article.objects.filter(status='submitted')
-        stories = Story.objects.filter(status='submitted')
-        landmarks = Landmark.objects.filter(status='submitted')
-        images = Image.objects.filter(status='submitted')
-        videos = Video.objects.filter(status='submitted')
+        articles = shape_queryset(Article.objects.filter(status='submitted'), ArticleSerializer)
+        stories = shape_queryset(Story.objects.filter(status='submitted'), StorySerializer)
+        landmarks = shape_queryset(Landmark.objects.filter(status='submitted'), LandmarkSerializer)
+        images = shape_queryset(Image.objects.filter(status='submitted'), ImageSerializer)
+        videos = shape_queryset(Video.objects.filter(status='submitted'), VideoSerializer)
         
         # Serialize the data
         article_data = ArticleSerializer(articles, many=True, context={'request': request}).data
@@ -500,6 +768,26 @@ class ModerationViewSet(viewsets.ViewSet):
             'videos': video_data,
         })
     
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Pending content and report counts, cached so the dashboard can poll them."""
+        return Response(get_dashboard_stats())
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Approve, reject or publish many items of any content type in one
+        transaction. Returns a result per item; items that could not be
+        moderated carry an error and leave the others unaffected.
+        """
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk_moderate(serializer.validated_data['items'], request.user)
+        return Response({
+            'results': results,
+            'moderated': sum('error' not in result for result in results),
+        })
+    
     @action(detail=False, methods=['post'])
     def approve_content(self, request):
         content_type = request.data.get('content_type')
@@ -531,14 +819,7 @@ class ModerationViewSet(viewsets.ViewSet):
             )
             
             # Notify content creator
-            if settings.EMAIL_HOST_USER:
-                send_mail(
-                    'Your content has been approved',
-                    f'Your {content_type} "{content_obj.title}" has been approved by a moderator.',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [content_obj.user.email],
-                    fail_silently=True,
-                )
+            notify_author(content_obj, 'approved', content_type)
             
             return Response({'status': 'content approved'})
             
@@ -584,14 +865,7 @@ class ModerationViewSet(viewsets.ViewSet):
             )
             
             # Notify content creator
-            if settings.EMAIL_HOST_USER:
-                send_mail(
-                    'Your content needs revisions',
-                    f'Your {content_type} "{content_obj.title}" has been reviewed and needs revisions.\n\nModerator comment: {comment}',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [content_obj.user.email],
-                    fail_silently=True,
-                )
+            notify_author(content_obj, 'rejected', content_type, comment)
             
             return Response({'status': 'content rejected'})
             
@@ -643,14 +917,7 @@ class ModerationViewSet(viewsets.ViewSet):
             )
             
             # Notify content creator
-            if settings.EMAIL_HOST_USER:
-                send_mail(
-                    'Your content has been published',
-                    f'Your {content_type} "{content_obj.title}" has been published and is now live.',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [content_obj.user.email],
-                    fail_silently=True,
-                )
+            notify_author(content_obj, 'published', content_type)
             
             return Response({'status': 'content published'})
             
@@ -666,9 +933,10 @@ class ModerationViewSet(viewsets.ViewSet):
             )
 
 
-class ContentReportViewSet(viewsets.ModelViewSet):
+class ContentReportViewSet(QuerysetShapingMixin, viewsets.ModelViewSet):
     queryset = ContentReport.objects.all()
     serializer_class = ContentReportSerializer
+    pagination_class = ContentPagination
     
     def get_permissions(self):
         if self.action in ['create']:
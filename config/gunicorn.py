@@ -0,0 +1,62 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn -c config/gunicorn.py config.wsgi:application
+
+Each setting can be overridden with the GUNICORN_* environment variable
+next to it.
+"""
+import multiprocessing
+import os
+
+
+def _cores():
+    # The CPUs this process may run on, which a container can restrict
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# 'sync' handles one request per worker; 'gthread' runs GUNICORN_THREADS requests per worker,
+# which suits the I/O-bound API better and shares one copy of the app between the threads.
+# Sync workers keep a single thread, since gunicorn turns them into gthread workers otherwise.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+
+# Sync workers spend part of each request waiting on the database, so run about two per core;
+# threaded workers get their concurrency from threads instead
+workers = int(os.environ.get('GUNICORN_WORKERS') or 0) or (
+    _cores() + 1 if worker_class == 'gthread' else 2 * _cores() + 1
+)
+
+# Load the app once in the master so the workers share its memory copy-on-write and start faster.
+# Code reloading needs the app to be loaded in each worker instead.
+reload = os.environ.get('GUNICORN_RELOAD', 'False') == 'True'
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True' and not reload
+
+# Restart each worker after this many requests to cap slow memory growth; the jitter keeps
+# the workers from restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Worker heartbeats go to a file; keep it in memory rather than on a container's overlay disk
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    # Connections opened while preloading the app must not be shared by the workers
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
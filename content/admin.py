@@ -4,6 +4,7 @@ from .models import (
     Category, Tag, Article, Story, Landmark,
     Image, Video, QRCode
 )
+from .tasks import RENDITION_FIELDS, schedule_renditions
 
 @admin.register(Category)
 class CategoryAdmin(TranslationAdmin):
@@ -20,6 +21,15 @@ class TagAdmin(TranslationAdmin):
     search_fields = ['name']
 
 
+class RenditionsAdminMixin:
+    """Queue rendition generation when an image is uploaded through the admin"""
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if RENDITION_FIELDS[type(obj)] in form.changed_data:
+            schedule_renditions(obj)
+
+
 class BaseContentAdmin(TranslationAdmin):
     list_display = ['title', 'slug', 'user', 'category', 'status', 'is_published', 'is_featured', 'created_at']
     list_filter = ['status', 'is_published', 'is_featured', 'category', 'created_at']
@@ -35,7 +45,7 @@ class BaseContentAdmin(TranslationAdmin):
 
 
 @admin.register(Article)
-class ArticleAdmin(BaseContentAdmin):
+class ArticleAdmin(RenditionsAdminMixin, BaseContentAdmin):
     fieldsets = (
         (None, {'fields': ('title', 'slug', 'content', 'summary', 'featured_image')}),
         ('Categorization', {'fields': ('category', 'tags')}),
@@ -56,7 +66,7 @@ class StoryAdmin(BaseContentAdmin):
 
 
 @admin.register(Landmark)
-class LandmarkAdmin(BaseContentAdmin):
+class LandmarkAdmin(RenditionsAdminMixin, BaseContentAdmin):
     fieldsets = (
         (None, {'fields': ('title', 'slug', 'content', 'summary', 'featured_image')}),
         ('Location', {'fields': ('location', 'latitude', 'longitude', 'historical_period')}),
@@ -67,11 +77,11 @@ class LandmarkAdmin(BaseContentAdmin):
 
 
 @admin.register(Image)
-class ImageAdmin(TranslationAdmin):
-    list_display = ['title', 'user', 'status', 'is_published', 'created_at']
-    list_filter = ['status', 'is_published', 'created_at']
+class ImageAdmin(RenditionsAdminMixin, TranslationAdmin):
+    list_display = ['title', 'user', 'status', 'is_published', 'processing_status', 'created_at']
+    list_filter = ['status', 'is_published', 'processing_status', 'created_at']
     search_fields = ['title', 'description', 'alt_text']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'processing_status']
     
     def save_model(self, request, obj, form, change):
         if not change:  # If this is a new object
@@ -80,7 +90,7 @@ class ImageAdmin(TranslationAdmin):
 
 
 @admin.register(Video)
-class VideoAdmin(TranslationAdmin):
+class VideoAdmin(RenditionsAdminMixin, TranslationAdmin):
     list_display = ['title', 'user', 'status', 'is_published', 'created_at']
     list_filter = ['status', 'is_published', 'created_at']
     search_fields = ['title', 'description']
@@ -94,10 +104,10 @@ class VideoAdmin(TranslationAdmin):
 
 @admin.register(QRCode)
 class QRCodeAdmin(admin.ModelAdmin):
-    list_display = ['title', 'content_type', 'created_by', 'created_at', 'is_active']
+    list_display = ['title', 'content_type', 'created_by', 'created_at', 'is_active', 'scan_count']
     list_filter = ['content_type', 'is_active', 'created_at']
     search_fields = ['title', 'description']
-    readonly_fields = ['qr_image', 'created_at']
+    readonly_fields = ['qr_image', 'created_at', 'scan_count']
     
     def save_model(self, request, obj, form, change):
         if not change:  # If this is a new object
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+from django.utils.translation import gettext_lazy as _
+
+
+class ContentConfig(AppConfig):
+    name = 'content'
+    verbose_name = _('Content')
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+        from .search import create_search_vector_indexes
+
+        post_migrate.connect(create_search_vector_indexes, sender=self)
@@ -0,0 +1,160 @@
+from django.db import transaction
+from django.db.models import Count, Max, Value
+from django.db.models.functions import Concat, Now, Substr
+from django.utils import translation
+from django.utils.translation import get_language
+
+from utils.response_cache import invalidate_tags
+
+from .models import Category
+
+# Every category change moves this tag to a new generation (see
+# content/signals.py)
+CACHE_TAG = 'content.category'
+
+# Trees built by this process, by language: (validators, CategoryTree)
+_trees = {}
+
+
+def move_subtree(old_prefix, new_prefix):
+    """
+    Rewrite the paths of every category under old_prefix to start with
+    new_prefix instead, in one UPDATE.
+    """
+    if old_prefix == new_prefix:
+        return
+    Category.objects.filter(path__startswith=old_prefix).update(
+        path=Concat(Value(new_prefix), Substr('path', len(old_prefix) + 1)), updated_at=Now()
+    )
+
+
+def update_path(category):
+    """
+    Store the materialized path of a saved category and move its
+    subcategories along with it if its parent changed.
+    """
+    parent_path = ''
+    if category.parent_id:
+        parent_path = Category.objects.filter(pk=category.parent_id).values_list('path', flat=True).first() or ''
+    new_path = f'{parent_path}{category.pk}/'
+    if new_path == category.path:
+        return
+
+    old_path = category.path
+    with transaction.atomic():
+        if old_path:
+            move_subtree(old_path, new_path)
+        else:
+            Category.objects.filter(pk=category.pk).update(path=new_path, updated_at=Now())
+    category.path = new_path
+
+
+def detach_subtree(category):
+    """
+    Turn the children of a deleted category into roots. The database has
+    already cleared their parent (SET_NULL); their paths follow here.
+    """
+    if category.path:
+        move_subtree(category.path, '')
+
+
+def rebuild_paths():
+    """Recompute the path of every category from the parent links. Returns the number of categories."""
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    paths = {}
+
+    def path_of(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents[pk]
+            # A parent link that loops back is cut there
+            if parent_id is None or parent_id not in parents or parent_id in seen:
+                paths[pk] = f'{pk}/'
+            else:
+                paths[pk] = f'{path_of(parent_id, seen + (pk,))}{pk}/'
+        return paths[pk]
+
+    with transaction.atomic():
+        for pk in parents:
+            Category.objects.filter(pk=pk).update(path=path_of(pk), updated_at=Now())
+    invalidate_tags(CACHE_TAG)
+    return len(parents)
+
+
+class CategoryTree:
+    """
+    Every category of one language, built from a single query, with each
+    node's ancestors and descendants resolved up front so lookups don't
+    touch the database.
+    """
+
+    def __init__(self, categories):
+        self.nodes = {
+            category.pk: {
+                'id': category.pk,
+                'name': category.name,
+                'slug': category.slug,
+                'description': category.description,
+                'parent': category.parent_id,
+                'children': [],
+            }
+            for category in categories
+        }
+        self.roots = []
+        for node in sorted(self.nodes.values(), key=lambda node: node['name']):
+            parent = self.nodes.get(node['parent'])
+            (parent['children'] if parent else self.roots).append(node)
+
+        self._ancestors = {}
+        self._descendants = {pk: [pk] for pk in self.nodes}
+        for pk, node in self.nodes.items():
+            ancestors = []
+            parent_id = node['parent']
+            # Follows the parent links rather than the stored paths, and stops at a loop
+            while parent_id in self.nodes and parent_id != pk and parent_id not in ancestors:
+                ancestors.insert(0, parent_id)
+                parent_id = self.nodes[parent_id]['parent']
+            self._ancestors[pk] = ancestors
+            node['depth'] = len(ancestors)
+            for ancestor in ancestors:
+                self._descendants[ancestor].append(pk)
+
+    def ancestors(self, pk):
+        """pks of the categories above pk, root first."""
+        return self._ancestors.get(pk, [])
+
+    def descendants(self, pk):
+        """pk and the pks of every category below it."""
+        return self._descendants.get(pk, [])
+
+    def path(self, pk):
+        """The materialized path of pk, or None if there is no such category."""
+        if pk not in self.nodes:
+            return None
+        return ''.join(f'{ancestor}/' for ancestor in self.ancestors(pk) + [pk])
+
+
+def tree_validators():
+    """
+    The newest updated_at and the number of categories, read in one
+    aggregate query. Unlike the cache tag generation, these move for
+    changes made by any process.
+    """
+    values = Category.objects.order_by().aggregate(latest=Max('updated_at'), count=Count('pk'))
+    return (values['latest'], values['count'])
+
+
+def category_tree(language=None):
+    """
+    The CategoryTree in language (default: the active one), built once per
+    process and rebuilt after any category changes, wherever they were made.
+    """
+    language = language or get_language()
+    validators = tree_validators()
+    cached = _trees.get(language)
+    if cached is not None and cached[0] == validators:
+        return cached[1]
+
+    with translation.override(language):
+        tree = CategoryTree(list(Category.objects.all()))
+    _trees[language] = (validators, tree)
+    return tree
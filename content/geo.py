@@ -0,0 +1,79 @@
+import math
+
+from django.db.models import Q
+
+# Mean radius of the Earth
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Filter matching every point within radius_km of (lat, lon), and some
+    points just outside it. It only compares the latitude and longitude
+    columns, so the (latitude, longitude) index can answer it.
+    """
+    lat, lon = float(lat), float(lon)
+    delta_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole, so every longitude is in range
+        return Q(latitude__gte=max(min_lat, -90), latitude__lte=min(max_lat, 90))
+
+    # Widest longitude span of the circle, at its latitude furthest from the equator
+    delta_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    condition = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lon < -180:
+        return condition & (Q(longitude__gte=min_lon + 360) | Q(longitude__lte=max_lon))
+    if max_lon > 180:
+        return condition & (Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon - 360))
+    return condition & Q(longitude__gte=min_lon, longitude__lte=max_lon)
+
+
+def nearby(queryset, lat, lon, radius_km, limit=None):
+    """
+    Objects of queryset within radius_km of (lat, lon), nearest first, each
+    with a ``distance`` attribute in kilometres.
+
+    The bounding box narrows the rows in the database; only the coordinates
+    of those candidates are loaded and ranked by haversine distance, and the
+    full rows are fetched for the ones that are kept.
+    """
+    # Ranked here, so the model's default ordering would only add a sort
+    candidates = (
+        queryset.filter(bounding_box(lat, lon, radius_km))
+        .order_by()
+        .values_list('pk', 'latitude', 'longitude')
+    )
+    distances = {}
+    for pk, latitude, longitude in candidates:
+        distance = haversine_km(lat, lon, latitude, longitude)
+        if distance <= radius_km:
+            distances[pk] = distance
+
+    ranked = sorted(distances, key=distances.get)
+    if limit is not None:
+        ranked = ranked[:limit]
+    if not ranked:
+        return []
+
+    objects = queryset.in_bulk(ranked)
+    results = []
+    for pk in ranked:
+        obj = objects[pk]
+        obj.distance = distances[pk]
+        results.append(obj)
+    return results
@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import (
+    Article, Story, Landmark, Image, Video, BaseContent, ContentIndex, ContentIndexTag,
+    SEARCH_LANGUAGES, SEARCH_VECTOR_FIELDS,
+)
+
+INDEXED_MODELS = {
+    'article': Article,
+    'story': Story,
+    'landmark': Landmark,
+    'image': Image,
+    'video': Video,
+}
+
+CONTENT_TYPES = {model: content_type for content_type, model in INDEXED_MODELS.items()}
+
+# Sent after rebuild_content_index replaced every entry, with sender=ContentIndex.
+# The rebuild deletes entries one signal at a time but inserts them in bulk,
+# so anything derived from those signals has to start over
+content_index_rebuilt = Signal()
+
+
+def content_type_for(model):
+    return CONTENT_TYPES.get(model)
+
+
+def format_tag_ids(tag_ids):
+    tag_ids = sorted(set(tag_ids))
+    return ',{},'.format(','.join(str(tag_id) for tag_id in tag_ids)) if tag_ids else ''
+
+
+def index_values(obj):
+    """Column values of the ContentIndex entry for a content object (without tags)."""
+    values = {
+        'slug': getattr(obj, 'slug', ''),
+        'status': obj.status,
+        'is_published': obj.is_published,
+        'category_id': getattr(obj, 'category_id', None),
+        'user_id': obj.user_id,
+        'created_at': obj.created_at,
+        'view_count': getattr(obj, 'view_count', 0),
+    }
+    for language in SEARCH_LANGUAGES:
+        values[f'title_{language}'] = getattr(obj, f'title_{language}', None) or ''
+    return values
+
+
+def sync_content_index(obj):
+    """Create or update the index entry of a saved content object."""
+    values = index_values(obj)
+    if obj.status != 'submitted':
+        values['submitted_at'] = None
+    entry, created = ContentIndex.objects.update_or_create(
+        content_type=CONTENT_TYPES[type(obj)],
+        object_id=obj.pk,
+        defaults=values,
+    )
+    if obj.status == 'submitted' and entry.submitted_at is None:
+        # Just submitted; later saves while in review keep its place in the queue
+        entry.submitted_at = timezone.now()
+        ContentIndex.objects.filter(pk=entry.pk).update(submitted_at=entry.submitted_at)
+    return entry
+
+
+def tag_links(entry_id, tag_ids):
+    return [ContentIndexTag(entry_id=entry_id, tag_id=tag_id) for tag_id in set(tag_ids)]
+
+
+def sync_content_index_tags(obj):
+    """Store the tags of a content object on its index entry, as text and as ContentIndexTag rows."""
+    tag_ids = list(obj.tags.values_list('id', flat=True))
+    entries = ContentIndex.objects.filter(content_type=CONTENT_TYPES[type(obj)], object_id=obj.pk)
+    with transaction.atomic():
+        entries.update(tag_ids=format_tag_ids(tag_ids))
+        entry_id = entries.values_list('pk', flat=True).first()
+        if entry_id is not None:
+            ContentIndexTag.objects.filter(entry_id=entry_id).delete()
+            ContentIndexTag.objects.bulk_create(tag_links(entry_id, tag_ids))
+
+
+def remove_from_content_index(obj):
+    ContentIndex.objects.filter(content_type=CONTENT_TYPES[type(obj)], object_id=obj.pk).delete()
+
+
+def add_index_view_counts(model, pks, amount):
+    """Mirror a batched view count increment onto the index entries."""
+    content_type = CONTENT_TYPES.get(model)
+    if content_type:
+        ContentIndex.objects.filter(content_type=content_type, object_id__in=pks).update(
+            view_count=F('view_count') + amount
+        )
+
+
+def rebuild_content_index(batch_size=500):
+    """Repopulate the whole index from the content tables. Returns the number of entries."""
+    ContentIndex.objects.all().delete()
+    total = 0
+    for content_type, model in INDEXED_MODELS.items():
+        queryset = model._base_manager.order_by('pk')
+        if issubclass(model, BaseContent):
+            queryset = queryset.defer(*SEARCH_VECTOR_FIELDS)
+        has_tags = hasattr(model, 'tags')
+        if has_tags:
+            queryset = queryset.prefetch_related('tags')
+
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            values = index_values(obj)
+            if obj.status == 'submitted':
+                # The submission time isn't stored on the content itself
+                values['submitted_at'] = getattr(obj, 'updated_at', obj.created_at)
+            if has_tags:
+                values['tag_ids'] = format_tag_ids(tag.pk for tag in obj.tags.all())
+            batch.append(ContentIndex(content_type=content_type, object_id=obj.pk, **values))
+            if len(batch) >= batch_size:
+                total += _create_entries(batch, has_tags)
+                batch = []
+        if batch:
+            total += _create_entries(batch, has_tags)
+    content_index_rebuilt.send(sender=ContentIndex)
+    return total
+
+
+def _create_entries(entries, has_tags):
+    """Insert a batch of index entries and, with their new pks, their tag rows."""
+    ContentIndex.objects.bulk_create(entries)
+    if has_tags:
+        ContentIndexTag.objects.bulk_create([
+            link for entry in entries for link in tag_links(entry.pk, entry.tag_id_list)
+        ])
+    return len(entries)
@@ -0,0 +1,126 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from content.models import Article
+from moderation.models import ModerationLog, ContentReport
+
+BATCH_SIZE = 10000
+
+STATUSES = ['draft', 'submitted', 'approved', 'rejected', 'published']
+
+# Indexes dropped for the "before" plans
+BENCHMARKED_INDEXES = {
+    Article: ['content_article_feed', 'content_article_status'],
+    ModerationLog: ['modlog_object', 'modlog_moderator'],
+    ContentReport: ['report_status', 'report_object'],
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed benchmark rows and print the plans and timings of the main listing '
+        'queries without and with the content and moderation indexes. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Articles and moderation logs to seed')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                queries = self.queries()
+
+                self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+                try:
+                    with transaction.atomic():
+                        self.drop_indexes()
+                        self.report(queries)
+                        raise Rollback
+                except Rollback:
+                    pass
+
+                self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+                self.report(queries)
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('Benchmark rows rolled back'))
+
+    def seed(self, rows):
+        started = time.monotonic()
+        user = User.objects.create_user(email='benchmark@example.com', password=None)
+        article_type = ContentType.objects.get_for_model(Article)
+
+        for start in range(0, rows, BATCH_SIZE):
+            Article.objects.bulk_create([
+                Article(
+                    title=f'Benchmark {i}', slug=f'benchmark-{i}', content='Benchmark', user=user,
+                    status=STATUSES[i % len(STATUSES)], is_published=i % len(STATUSES) == 4,
+                )
+                for i in range(start, min(start + BATCH_SIZE, rows))
+            ])
+        first_id = Article.objects.filter(user=user).order_by('pk').values_list('pk', flat=True).first()
+
+        for start in range(0, rows, BATCH_SIZE):
+            ModerationLog.objects.bulk_create([
+                ModerationLog(content_type=article_type, object_id=first_id + i, moderator=user, action='approved')
+                for i in range(start, min(start + BATCH_SIZE, rows))
+            ])
+        for start in range(0, rows // 10, BATCH_SIZE):
+            ContentReport.objects.bulk_create([
+                ContentReport(
+                    content_type=article_type, object_id=first_id + i, reporter=user, reason='spam',
+                    details='Benchmark', status='pending' if i % 20 == 0 else 'resolved',
+                )
+                for i in range(start, min(start + BATCH_SIZE, rows // 10))
+            ])
+
+        self.article_type = article_type
+        self.object_id = first_id + rows // 2
+        self.analyze()
+        self.stdout.write(f'Seeded {rows} rows in {time.monotonic() - started:.1f}s')
+
+    def queries(self):
+        return [
+            ('Published feed', Article.objects.filter(is_published=True, status='published')[:20]),
+            ('Review queue', Article.objects.filter(status='submitted')[:20]),
+            ('Content history', ModerationLog.objects.filter(
+                content_type=self.article_type, object_id=self.object_id
+            )),
+            ('Pending reports', ContentReport.objects.filter(status='pending')[:20]),
+        ]
+
+    def drop_indexes(self):
+        # Plain DDL, which both PostgreSQL and SQLite roll back with the transaction
+        with connection.cursor() as cursor:
+            for names in BENCHMARKED_INDEXES.values():
+                for name in names:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        self.analyze()
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for model in BENCHMARKED_INDEXES:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def report(self, queries):
+        explain_options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+        for label, queryset in queries:
+            started = time.monotonic()
+            list(queryset.all())  # a fresh query, not the cached rows of the previous run
+            elapsed = (time.monotonic() - started) * 1000
+            self.stdout.write(self.style.SQL_FIELD(f'{label}: {elapsed:.1f} ms'))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
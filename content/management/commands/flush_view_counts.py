@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from content.view_counter import CacheViewCountBuffer, flush_view_counts, view_counter
+
+
+class Command(BaseCommand):
+    help = 'Write buffered view counts to the database'
+
+    def handle(self, *args, **options):
+        if not isinstance(view_counter.buffer, CacheViewCountBuffer):
+            # A local buffer belongs to the process that counted the views,
+            # and this command runs in a fresh one
+            self.stderr.write(self.style.WARNING(
+                "VIEW_COUNT_BUFFER is 'local', so only this process's buffer is flushed, not the web "
+                "workers'. Set VIEW_COUNT_BUFFER=cache with a shared cache backend to flush them from here."
+            ))
+        updated = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f'Flushed view counts for {updated} objects'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from content.tasks import RENDITION_FIELDS, schedule_renditions
+
+
+class Command(BaseCommand):
+    help = 'Queue rendition generation for uploaded images that have no renditions yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate existing renditions too')
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field in RENDITION_FIELDS.items():
+            queryset = model._base_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            if not options['all']:
+                queryset = queryset.filter(renditions__isnull=True)
+            for obj in queryset.distinct().iterator():
+                schedule_renditions(obj)
+                total += 1
+        self.stdout.write(self.style.SUCCESS(f'Queued renditions for {total} objects'))
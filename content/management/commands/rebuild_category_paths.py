@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content.categories import rebuild_paths
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized path of every category from its parent'
+
+    def handle(self, *args, **options):
+        total = rebuild_paths()
+        self.stdout.write(self.style.SUCCESS(f'Paths computed for {total} categories'))
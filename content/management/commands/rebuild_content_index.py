@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from content.indexing import rebuild_content_index
+from content.models import ContentIndex
+from content.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the cross-type content index from the content tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_content_index(batch_size=options['batch_size'])
+        update_search_vectors(ContentIndex.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} content objects'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content.related import rebuild_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related content of every published article, story and landmark'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_related(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Related content computed for {total} objects'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content.tag_stats import reconcile_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount the published content of every tag and repair usage counts that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report without changing anything')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counts(dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(f'Corrected the usage counts of {fixed} tags'))
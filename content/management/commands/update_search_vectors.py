@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from content.search import SEARCH_FIELDS, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored full-text search vectors of all searchable content'
+
+    def handle(self, *args, **options):
+        for model in SEARCH_FIELDS:
+            update_search_vectors(model._base_manager.all())
+            self.stdout.write(f'Updated search vectors for {model._meta.verbose_name_plural}')
+        self.stdout.write(self.style.SUCCESS('Search vectors are up to date'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content.qr_redirects import warm_qr_redirects
+
+
+class Command(BaseCommand):
+    help = 'Precompute the cached redirect targets of every QR code'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='QR codes loaded per query')
+
+    def handle(self, *args, **options):
+        total = warm_qr_redirects(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Cached redirect targets for {total} QR codes'))
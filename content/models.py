@@ -1,7 +1,28 @@
 import uuid
 from django.db import models
 from django.conf import settings
-from django.utils.translation import gettext_lazy as _
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.utils.translation import get_language, gettext_lazy as _
+
+from utils.models import TracksLoadedStatus
+from utils.storage import get_media_storage
+
+# Full-text search vectors are stored per language, see content/search.py
+SEARCH_LANGUAGES = [code for code, name in settings.LANGUAGES]
+
+# The stored vectors are large and only full-text search reads them, in SQL
+SEARCH_VECTOR_FIELDS = [f'search_vector_{lang}' for lang in SEARCH_LANGUAGES]
+
+
+class SearchVectorsDeferredManager(models.Manager):
+    """Loads rows without their search vectors, which search filters on without reading them."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*SEARCH_VECTOR_FIELDS)
+
 
 class Category(models.Model):
     """Categories for organizing content"""
@@ -10,6 +31,12 @@ class Category(models.Model):
     description = models.TextField(_('description'), blank=True)
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, 
                               related_name='children', verbose_name=_('parent category'))
+    # Materialized path: the pks from the root down to this category, each
+    # followed by a slash ("3/12/"), so a subtree is one prefix match.
+    # Maintained by the signal handlers in content/signals.py.
+    path = models.CharField(_('path'), max_length=255, blank=True, default='', editable=False, db_index=True)
+    # Also moved by subtree moves, so list validators see every change
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
     class Meta:
         verbose_name = _('category')
@@ -18,11 +45,33 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def depth(self):
+        """0 for a root category, 1 for its children and so on."""
+        return max(self.path.count('/') - 1, 0)
+
+    def is_ancestor_of(self, other):
+        """True if other is this category or one of its subcategories."""
+        return bool(self.path) and other.path.startswith(self.path)
+
+    def clean(self):
+        super().clean()
+        if self.parent is not None and self.is_ancestor_of(self.parent):
+            raise ValidationError({'parent': _('A category cannot be moved into itself or its subcategories.')})
+
 
 class Tag(models.Model):
     """Tags for content categorization"""
     name = models.CharField(_('name'), max_length=50)
     slug = models.SlugField(_('slug'), max_length=50, unique=True)
+    # Published content carrying the tag, by type and in total. Kept up to
+    # date by content/tag_stats.py; reconcile_tag_counts repairs drift.
+    article_count = models.PositiveIntegerField(_('article count'), default=0, editable=False)
+    story_count = models.PositiveIntegerField(_('story count'), default=0, editable=False)
+    landmark_count = models.PositiveIntegerField(_('landmark count'), default=0, editable=False)
+    usage_count = models.PositiveIntegerField(_('usage count'), default=0, editable=False, db_index=True)
+    # Also moved when the counts change, so list validators see every change
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
     class Meta:
         verbose_name = _('tag')
@@ -32,8 +81,25 @@ class Tag(models.Model):
         return self.name
 
 
-class BaseContent(models.Model):
+def content_indexes():
+    """
+    Indexes for the two ways content is listed: the published feed, newest
+    first, and listings by moderation status (the review queue, drafts).
+    """
+    return [
+        models.Index(
+            fields=['-created_at'], name='%(app_label)s_%(class)s_feed',
+            condition=models.Q(is_published=True, status='published'),
+        ),
+        models.Index(fields=['status', '-created_at'], name='%(app_label)s_%(class)s_status'),
+    ]
+
+
+class BaseContent(TracksLoadedStatus, models.Model):
     """Base abstract model for all content types"""
+    # The tag usage counts follow content in and out of publication
+    loaded_fields = ('status', 'is_published')
+
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     title = models.CharField(_('title'), max_length=255)
     slug = models.SlugField(_('slug'), max_length=255, unique=True)
@@ -62,10 +128,16 @@ class BaseContent(models.Model):
     )
     moderation_comment = models.TextField(_('moderation comment'), blank=True)
     view_count = models.PositiveIntegerField(_('view count'), default=0)
+    search_vector_en = SearchVectorField(null=True, editable=False)
+    search_vector_ky = SearchVectorField(null=True, editable=False)
+    search_vector_ru = SearchVectorField(null=True, editable=False)
+
+    objects = SearchVectorsDeferredManager()
     
     class Meta:
         abstract = True
         ordering = ['-created_at']
+        indexes = content_indexes()
         
     def __str__(self):
         return self.title
@@ -73,9 +145,11 @@ class BaseContent(models.Model):
 
 class Article(BaseContent):
     """Article content type for longer text-based content"""
-    featured_image = models.ImageField(_('featured image'), upload_to='articles/images/', blank=True, null=True)
+    featured_image = models.ImageField(_('featured image'), upload_to='articles/images/', blank=True, null=True,
+                                       storage=get_media_storage)
+    renditions = GenericRelation('ImageRendition')
     
-    class Meta:
+    class Meta(BaseContent.Meta):
         verbose_name = _('article')
         verbose_name_plural = _('articles')
 
@@ -85,7 +159,7 @@ class Story(BaseContent):
     location = models.CharField(_('location'), max_length=255, blank=True)
     period = models.CharField(_('time period'), max_length=100, blank=True)
     
-    class Meta:
+    class Meta(BaseContent.Meta):
         verbose_name = _('story')
         verbose_name_plural = _('stories')
 
@@ -95,8 +169,9 @@ class Image(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     title = models.CharField(_('title'), max_length=255)
     description = models.TextField(_('description'), blank=True)
-    image = models.ImageField(_('image'), upload_to='uploads/images/')
+    image = models.ImageField(_('image'), upload_to='uploads/images/', storage=get_media_storage)
     alt_text = models.CharField(_('alternative text'), max_length=255, blank=True)
+    renditions = GenericRelation('ImageRendition')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, 
                            related_name='images', verbose_name=_('uploader'))
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
@@ -113,10 +188,22 @@ class Image(models.Model):
         ],
         default='draft'
     )
+    processing_status = models.CharField(
+        _('processing status'),
+        max_length=20,
+        choices=[
+            ('pending', _('Pending')),
+            ('processing', _('Processing')),
+            ('ready', _('Ready')),
+            ('failed', _('Failed')),
+        ],
+        default='pending'
+    )
     
     class Meta:
         verbose_name = _('image')
         verbose_name_plural = _('images')
+        indexes = content_indexes()
         
     def __str__(self):
         return self.title
@@ -129,7 +216,9 @@ class Video(models.Model):
     description = models.TextField(_('description'), blank=True)
     video_file = models.FileField(_('video file'), upload_to='uploads/videos/', blank=True, null=True)
     video_url = models.URLField(_('video URL'), blank=True, help_text=_('YouTube, Vimeo, or other video URL'))
-    thumbnail = models.ImageField(_('thumbnail'), upload_to='uploads/video_thumbnails/', blank=True, null=True)
+    thumbnail = models.ImageField(_('thumbnail'), upload_to='uploads/video_thumbnails/', blank=True, null=True,
+                                  storage=get_media_storage)
+    renditions = GenericRelation('ImageRendition')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, 
                            related_name='videos', verbose_name=_('uploader'))
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
@@ -151,22 +240,72 @@ class Video(models.Model):
     class Meta:
         verbose_name = _('video')
         verbose_name_plural = _('videos')
+        indexes = content_indexes()
         
     def __str__(self):
         return self.title
 
 
+class ImageRendition(models.Model):
+    """Resized copy of an uploaded image, generated in the background"""
+    SIZE_CHOICES = [
+        ('thumb', _('Thumbnail')),
+        ('medium', _('Medium')),
+        ('large', _('Large')),
+    ]
+    FORMAT_CHOICES = [
+        ('jpeg', 'JPEG'),
+        ('webp', 'WebP'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    field = models.CharField(_('source field'), max_length=50)
+    size = models.CharField(_('size'), max_length=10, choices=SIZE_CHOICES)
+    format = models.CharField(_('format'), max_length=10, choices=FORMAT_CHOICES)
+    file = models.ImageField(_('file'), upload_to='renditions/', storage=get_media_storage)
+    # SHA-256 of the source image, so identical uploads can share renditions
+    source_hash = models.CharField(_('source hash'), max_length=64, blank=True, db_index=True)
+    width = models.PositiveIntegerField(_('width'), default=0)
+    height = models.PositiveIntegerField(_('height'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('image rendition')
+        verbose_name_plural = _('image renditions')
+        ordering = ['content_type', 'object_id', 'width', 'format']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'field', 'size', 'format'],
+                name='image_rendition_unique_size',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.size} {self.format} rendition of {self.content_type} #{self.object_id}"
+
+
 class Landmark(BaseContent):
     """Landmarks of Naryn with location and historical information"""
     location = models.CharField(_('location'), max_length=255)
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6, null=True, blank=True)
     historical_period = models.CharField(_('historical period'), max_length=100, blank=True)
-    featured_image = models.ImageField(_('featured image'), upload_to='landmarks/images/', blank=True, null=True)
+    featured_image = models.ImageField(_('featured image'), upload_to='landmarks/images/', blank=True, null=True,
+                                       storage=get_media_storage)
+    renditions = GenericRelation('ImageRendition')
     
-    class Meta:
+    class Meta(BaseContent.Meta):
         verbose_name = _('landmark')
         verbose_name_plural = _('landmarks')
+        indexes = BaseContent.Meta.indexes + [
+            # Bounding box prefilter of nearby searches, see content/geo.py
+            models.Index(
+                fields=['latitude', 'longitude'], name='content_landmark_location',
+                condition=models.Q(is_published=True, status='published'),
+            ),
+        ]
 
 
 class QRCode(models.Model):
@@ -192,10 +331,13 @@ class QRCode(models.Model):
     landmark = models.ForeignKey(Landmark, on_delete=models.SET_NULL, null=True, blank=True, 
                                related_name='qrcodes', verbose_name=_('landmark'))
     custom_url = models.URLField(_('custom URL'), blank=True)
+    # URL the stored qr_image encodes, to skip regenerating an unchanged image
+    encoded_url = models.URLField(_('encoded URL'), max_length=500, blank=True, editable=False)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, 
                                  related_name='created_qrcodes', verbose_name=_('created by'))
     is_active = models.BooleanField(_('is active'), default=True)
+    scan_count = models.PositiveIntegerField(_('scan count'), default=0)
     
     class Meta:
         verbose_name = _('QR code')
@@ -203,3 +345,140 @@ class QRCode(models.Model):
         
     def __str__(self):
         return self.title
+
+
+class ContentIndexQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(is_published=True, status='published')
+
+    def submitted(self):
+        """The moderation queue: content waiting for review"""
+        return self.filter(status='submitted')
+
+
+class ContentIndex(TracksLoadedStatus, models.Model):
+    """Denormalized listing of every content type, kept in sync by signals (see content/indexing.py)"""
+    content_type = models.CharField(
+        _('content type'),
+        max_length=20,
+        choices=[
+            ('article', _('Article')),
+            ('story', _('Story')),
+            ('landmark', _('Landmark')),
+            ('image', _('Image')),
+            ('video', _('Video')),
+        ]
+    )
+    object_id = models.PositiveBigIntegerField(_('object ID'))
+    slug = models.SlugField(_('slug'), max_length=255, blank=True)
+    title_en = models.CharField(_('title (English)'), max_length=255, blank=True)
+    title_ky = models.CharField(_('title (Kyrgyz)'), max_length=255, blank=True)
+    title_ru = models.CharField(_('title (Russian)'), max_length=255, blank=True)
+    status = models.CharField(_('status'), max_length=20)
+    is_published = models.BooleanField(_('is published'), default=False)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='index_entries', verbose_name=_('category'))
+    # Comma-delimited with leading and trailing commas (",3,7,"), for
+    # listing; filtering by tag goes through the indexed ContentIndexTag rows
+    tag_ids = models.TextField(_('tag IDs'), blank=True, default='')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='index_entries', verbose_name=_('author'))
+    created_at = models.DateTimeField(_('created at'))
+    # When the content was last submitted for review, while it is waiting
+    submitted_at = models.DateTimeField(_('submitted at'), null=True, blank=True)
+    view_count = models.PositiveIntegerField(_('view count'), default=0)
+    search_vector_en = SearchVectorField(null=True, editable=False)
+    search_vector_ky = SearchVectorField(null=True, editable=False)
+    search_vector_ru = SearchVectorField(null=True, editable=False)
+
+    objects = SearchVectorsDeferredManager.from_queryset(ContentIndexQuerySet)()
+
+    class Meta:
+        verbose_name = _('content index entry')
+        verbose_name_plural = _('content index')
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='content_index_unique_object'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'], name='content_index_feed',
+                condition=models.Q(is_published=True, status='published'),
+            ),
+            models.Index(
+                fields=['content_type', '-created_at', '-id'], name='content_index_type_feed',
+                condition=models.Q(is_published=True, status='published'),
+            ),
+            models.Index(
+                fields=['submitted_at', 'id'], name='content_index_review_queue',
+                condition=models.Q(status='submitted'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type}: {self.title}'
+
+    @property
+    def title(self):
+        language = (get_language() or settings.MODELTRANSLATION_DEFAULT_LANGUAGE)[:2]
+        return getattr(self, f'title_{language}', '') or self.title_en
+
+    @property
+    def tag_id_list(self):
+        return [int(tag_id) for tag_id in self.tag_ids.strip(',').split(',') if tag_id]
+
+
+class ContentIndexTag(models.Model):
+    """A tag of a content index entry, so the feed can filter by tag through an index"""
+    entry = models.ForeignKey(ContentIndex, on_delete=models.CASCADE, related_name='tag_links',
+                              verbose_name=_('content index entry'))
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='index_links', verbose_name=_('tag'))
+
+    class Meta:
+        verbose_name = _('content index tag')
+        verbose_name_plural = _('content index tags')
+        constraints = [
+            # Also the index the feed's ?tag= filter looks entries up by
+            models.UniqueConstraint(fields=['tag', 'entry'], name='content_index_tag_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.entry} #{self.tag_id}'
+
+
+class RelatedContent(models.Model):
+    """
+    Precomputed neighbours of a piece of content of the same type, best
+    first, kept current by the content.refresh_related job (see
+    content/related.py).
+    """
+    content_type = models.CharField(
+        _('content type'),
+        max_length=20,
+        choices=[
+            ('article', _('Article')),
+            ('story', _('Story')),
+            ('landmark', _('Landmark')),
+        ]
+    )
+    object_id = models.PositiveBigIntegerField(_('object ID'))
+    related_id = models.PositiveBigIntegerField(_('related object ID'))
+    rank = models.PositiveSmallIntegerField(_('rank'))
+    score = models.FloatField(_('score'))
+
+    class Meta:
+        verbose_name = _('related content')
+        verbose_name_plural = _('related content')
+        ordering = ['content_type', 'object_id', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'rank'], name='related_content_unique_rank',
+            ),
+        ]
+        indexes = [
+            # Items that list an object, refreshed when it changes
+            models.Index(fields=['content_type', 'related_id'], name='related_content_reverse'),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type} {self.object_id} -> {self.related_id} (#{self.rank})'
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import translation
+
+from .models import QRCode
+from .view_counter import view_counter
+
+CACHE_PREFIX = 'qr:target'
+
+# Cached for QR codes that are inactive, unknown or point at deleted content
+MISSING = ''
+
+
+def _timeout():
+    # Finite, so processes the refresh on save doesn't reach catch up
+    return getattr(settings, 'QR_REDIRECT_CACHE_TIMEOUT', 5 * 60)
+
+DETAIL_URL_NAMES = {
+    'article': 'article-detail',
+    'story': 'story-detail',
+    'landmark': 'landmark-detail',
+}
+
+
+def _key(uuid, language):
+    return f'{CACHE_PREFIX}:{language}:{uuid}'
+
+
+def _languages():
+    return [code for code, name in settings.LANGUAGES]
+
+
+def target_url(qrcode, language):
+    """Where a scan of qrcode sends visitors using language, or None."""
+    if not qrcode.is_active:
+        return None
+    if qrcode.content_type == 'custom':
+        return qrcode.custom_url or None
+    content = getattr(qrcode, qrcode.content_type, None)
+    if content is None:
+        return None
+    with translation.override(language):
+        return reverse(DETAIL_URL_NAMES[qrcode.content_type], kwargs={'slug': content.slug})
+
+
+def _entry(qrcode, language):
+    target = target_url(qrcode, language)
+    return (qrcode.pk, target) if target else MISSING
+
+
+def refresh_qrcodes(qrcodes):
+    """Precompute the cached targets of the given QR codes in every language."""
+    entries = {}
+    for qrcode in qrcodes:
+        for language in _languages():
+            entries[_key(qrcode.uuid, language)] = _entry(qrcode, language)
+    if entries:
+        cache.set_many(entries, _timeout())
+
+
+def forget_qrcodes(uuids):
+    cache.delete_many([_key(uuid, language) for uuid in uuids for language in _languages()])
+
+
+def warm_qr_redirects(batch_size=500):
+    """Fill the lookup table for every QR code. Returns the number of QR codes."""
+    queryset = QRCode.objects.select_related('article', 'story', 'landmark').order_by('pk')
+    total = 0
+    batch = []
+    for qrcode in queryset.iterator(chunk_size=batch_size):
+        batch.append(qrcode)
+        if len(batch) >= batch_size:
+            refresh_qrcodes(batch)
+            total += len(batch)
+            batch = []
+    refresh_qrcodes(batch)
+    return total + len(batch)
+
+
+def resolve(uuid, language=None):
+    """
+    (QR code pk, target URL) for a scanned uuid, or None if it should 404.
+    Served from the cache; only a cold entry reads the database.
+    """
+    language = (language or translation.get_language() or settings.LANGUAGE_CODE)[:2]
+    key = _key(uuid, language)
+    entry = cache.get(key)
+    if entry is None:
+        qrcode = QRCode.objects.select_related('article', 'story', 'landmark').filter(uuid=uuid).first()
+        if qrcode is None:
+            # Unknown uuids are only remembered briefly, so random scans can't fill the cache
+            cache.set(key, MISSING, 60)
+            return None
+        entry = _entry(qrcode, language)
+        cache.set(key, entry, _timeout())
+    return entry or None
+
+
+def record_scan(pk):
+    """Count a scan; written to QRCode.scan_count with the buffered view counts."""
+    view_counter.record_key(f'{QRCode._meta.label_lower}:{pk}:scan_count')
@@ -0,0 +1,208 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Q, Subquery
+
+from utils.jobs import enqueue_many, job
+from utils.models import BackgroundJob
+from utils.response_cache import invalidate_tags
+
+from .models import Article, Story, Landmark, RelatedContent
+
+RELATED_MODELS = {
+    'article': Article,
+    'story': Story,
+    'landmark': Landmark,
+}
+
+CONTENT_TYPES = {model: content_type for content_type, model in RELATED_MODELS.items()}
+
+REFRESH_JOB = 'content.refresh_related'
+
+# Weights of the shared tags (Jaccard similarity, 0 to 1), the same
+# category and the same location in a relatedness score
+TAG_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.3
+LOCATION_WEIGHT = 0.2
+
+# Candidates scored per object, most recent first
+MAX_CANDIDATES = 500
+
+# Saves that change only other fields leave the neighbours as they are
+SCORED_FIELDS = {'status', 'is_published', 'category', 'location'}
+
+
+def _limit():
+    return getattr(settings, 'RELATED_CONTENT_LIMIT', 6)
+
+
+def _published(model):
+    return model.objects.filter(is_published=True, status='published')
+
+
+def _has_location(model):
+    return any(field.name == 'location' for field in model._meta.concrete_fields)
+
+
+def _tag_sets(model, pks):
+    """pk -> set of tag ids, for the given objects, in one query."""
+    through = model.tags.through
+    source = f'{model._meta.model_name}_id'
+    tags = {pk: set() for pk in pks}
+    for pk, tag_id in through.objects.filter(**{f'{source}__in': pks}).values_list(source, 'tag_id'):
+        tags[pk].add(tag_id)
+    return tags
+
+
+def score(tags, other_tags, same_category, same_location):
+    shared = len(tags & other_tags)
+    jaccard = shared / len(tags | other_tags) if shared else 0
+    return TAG_WEIGHT * jaccard + CATEGORY_WEIGHT * same_category + LOCATION_WEIGHT * same_location
+
+
+def _score_candidates(obj):
+    """
+    Every published object of the same type that shares a tag, the
+    category or the location with obj, as a list of (pk, score), best first.
+    """
+    model = type(obj)
+    has_location = _has_location(model)
+    tags = _tag_sets(model, [obj.pk])[obj.pk]
+
+    condition = Q(tags__in=list(tags)) if tags else Q()
+    if obj.category_id:
+        condition |= Q(category_id=obj.category_id)
+    if has_location and obj.location:
+        condition |= Q(location=obj.location)
+    if not condition:
+        return []
+
+    fields = ['pk', 'category_id'] + (['location'] if has_location else [])
+    candidates = list(
+        _published(model).filter(condition).exclude(pk=obj.pk)
+        .order_by('-created_at').values_list(*fields).distinct()[:MAX_CANDIDATES]
+    )
+    candidate_tags = _tag_sets(model, [row[0] for row in candidates])
+
+    scored = []
+    for row in candidates:
+        pk, category_id = row[0], row[1]
+        same_location = has_location and bool(obj.location) and row[2] == obj.location
+        value = score(tags, candidate_tags[pk], bool(obj.category_id) and category_id == obj.category_id, same_location)
+        if value > 0:
+            scored.append((pk, value))
+    scored.sort(key=lambda item: (-item[1], -item[0]))
+    return scored
+
+
+def compute_related(obj, limit=None):
+    """The published objects of the same type most related to obj, as a list of (pk, score), best first."""
+    return _score_candidates(obj)[:limit or _limit()]
+
+
+def store_related(content_type, pk, ranked):
+    with transaction.atomic():
+        RelatedContent.objects.filter(content_type=content_type, object_id=pk).delete()
+        RelatedContent.objects.bulk_create([
+            RelatedContent(content_type=content_type, object_id=pk, related_id=related_id, rank=rank, score=value)
+            for rank, (related_id, value) in enumerate(ranked, 1)
+        ])
+
+
+def _refresh_one(model, pk):
+    """Store the neighbours of pk and return every candidate it was scored against."""
+    obj = _published(model).filter(pk=pk).first()
+    content_type = CONTENT_TYPES[model]
+    if obj is None:
+        RelatedContent.objects.filter(content_type=content_type, object_id=pk).delete()
+        return []
+    scored = _score_candidates(obj)
+    store_related(content_type, pk, scored[:_limit()])
+    return scored
+
+
+def _would_list(content_type, scored):
+    """
+    The candidates whose stored lists the object scored against them
+    belongs in: those with room left, or whose lowest stored score it
+    reaches. Scores are symmetric, so the object's own scores tell.
+    """
+    if not scored:
+        return set()
+    stored = {
+        row['object_id']: row
+        for row in RelatedContent.objects.filter(content_type=content_type, object_id__in=[pk for pk, value in scored])
+        .order_by().values('object_id').annotate(lowest=Min('score'), entries=Count('pk'))
+    }
+    limit = _limit()
+    wanted = set()
+    for pk, value in scored:
+        row = stored.get(pk)
+        if row is None or row['entries'] < limit or value >= row['lowest']:
+            wanted.add(pk)
+    return wanted
+
+
+@job(REFRESH_JOB)
+def refresh_related(content_type, pk):
+    """
+    Recompute the neighbours of an object after it changed, and of the
+    objects its change can reorder: those listing it and those whose
+    lists it now belongs in.
+    """
+    model = RELATED_MODELS[content_type]
+    listing = set(
+        RelatedContent.objects.filter(content_type=content_type, related_id=pk).values_list('object_id', flat=True)
+    )
+    scored = _refresh_one(model, pk)
+    for other in listing | _would_list(content_type, scored):
+        if other != pk:
+            _refresh_one(model, other)
+    invalidate_tags(model._meta.label_lower)
+
+
+def schedule_refresh(obj):
+    """Queue a refresh of obj's neighbours once the current transaction commits."""
+    schedule_refresh_many(CONTENT_TYPES[type(obj)], [obj.pk])
+
+
+def schedule_refresh_many(content_type, pks):
+    """
+    Queue a refresh per object, skipping those already waiting for one,
+    with one query for the waiting jobs and one INSERT for the rest.
+    """
+    pks = list(pks)
+
+    def enqueue():
+        waiting = BackgroundJob.objects.filter(
+            name=REFRESH_JOB, status=BackgroundJob.STATUS_PENDING, args__0=content_type
+        ).order_by().values_list('args', flat=True)
+        queued = {args[1] for args in waiting}
+        enqueue_many(REFRESH_JOB, [[content_type, pk] for pk in pks if pk not in queued])
+
+    transaction.on_commit(enqueue)
+
+
+def rebuild_related(batch_size=500):
+    """Recompute the neighbours of every published object. Returns the number of objects."""
+    total = 0
+    for content_type, model in RELATED_MODELS.items():
+        RelatedContent.objects.filter(content_type=content_type).delete()
+        for obj in _published(model).order_by('pk').iterator(chunk_size=batch_size):
+            store_related(content_type, obj.pk, compute_related(obj))
+            total += 1
+        invalidate_tags(model._meta.label_lower)
+    return total
+
+
+def related_items(obj, limit=None):
+    """Published neighbours of obj, best first, read in one query."""
+    model = type(obj)
+    content_type = CONTENT_TYPES[model]
+    entries = RelatedContent.objects.filter(content_type=content_type, object_id=obj.pk)
+    queryset = (
+        _published(model)
+        .filter(pk__in=entries.values('related_id'))
+        .annotate(related_rank=Subquery(entries.filter(related_id=OuterRef('pk')).values('rank')[:1]))
+        .order_by('related_rank')
+    )
+    return queryset[:limit] if limit else queryset
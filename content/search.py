@@ -0,0 +1,268 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Case, F, FloatField, TextField, Value, When
+from django.db.models.functions import Coalesce, NullIf
+from django.utils.translation import get_language
+
+from .models import Article, Story, Landmark, ContentIndex, SEARCH_LANGUAGES
+
+# Searchable fields per model with their rank weight (A is the most important)
+SEARCH_FIELDS = {
+    Article: [('title', 'A'), ('summary', 'B'), ('content', 'C')],
+    Story: [('title', 'A'), ('summary', 'B'), ('location', 'B'), ('period', 'B'), ('content', 'C')],
+    Landmark: [('title', 'A'), ('summary', 'B'), ('location', 'B'), ('historical_period', 'B'), ('content', 'C')],
+    # Cross-type index entries are searched by title only
+    ContentIndex: [('title', 'A')],
+}
+
+# PostgreSQL text search configuration per language; Kyrgyz has no
+# dictionary of its own, so it is indexed without stemming
+SEARCH_CONFIGS = getattr(settings, 'SEARCH_CONFIGS', {
+    'en': 'english',
+    'ky': 'simple',
+    'ru': 'russian',
+})
+
+# Relative weights used by the in-memory fallback index
+FALLBACK_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_vector_index_sql(schema_connection):
+    """
+    CREATE INDEX statements for GIN indexes over every stored search vector.
+    They are kept out of Meta.indexes so the model state, and the migrations
+    made from it, are the same whatever database makemigrations runs against.
+    """
+    quote = schema_connection.ops.quote_name
+    statements = []
+    for model in SEARCH_FIELDS:
+        table = model._meta.db_table
+        for language in SEARCH_LANGUAGES:
+            name = f'{table}_fts_{language}'
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+                f'USING gin ({quote(f"search_vector_{language}")})'
+            )
+    return statements
+
+
+def create_search_vector_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate handler adding the search vector indexes on PostgreSQL; other databases have no GIN."""
+    schema_connection = connections[using]
+    if schema_connection.vendor != 'postgresql':
+        return
+    with schema_connection.cursor() as cursor:
+        for statement in search_vector_index_sql(schema_connection):
+            cursor.execute(statement)
+
+
+def is_searchable(model):
+    return model in SEARCH_FIELDS
+
+
+def search_language(language=None):
+    language = (language or get_language() or settings.MODELTRANSLATION_DEFAULT_LANGUAGE)[:2]
+    if language not in SEARCH_LANGUAGES:
+        language = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    return language
+
+
+def use_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def _localized_column(field, language):
+    """The column users see for a field in a language, falling back to the default language."""
+    default = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    if language == default:
+        return F(f'{field}_{default}')
+    return Coalesce(
+        NullIf(f'{field}_{language}', Value(''), output_field=TextField()),
+        f'{field}_{default}',
+        output_field=TextField(),
+    )
+
+
+def build_search_vector(model, language):
+    """SearchVector expression over the localized searchable fields of a model."""
+    config = SEARCH_CONFIGS.get(language, 'simple')
+    vector = None
+    for field, weight in SEARCH_FIELDS[model]:
+        part = SearchVector(
+            _localized_column(field, language),
+            config=config,
+            weight=weight,
+        )
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def _tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class FallbackSearchIndex:
+    """
+    Pure-Python inverted index used when the database is not PostgreSQL,
+    mainly so the search code paths run under SQLite in tests.
+
+    The index for a model is built from the database on first use and then
+    kept current by update()/remove() from the content signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # model -> language -> token -> {pk: weight}
+        self._postings = {}
+        # model -> language -> pk -> set of tokens, to remove stale postings
+        self._documents = {}
+
+    def _document_tokens(self, obj, model, language):
+        default = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+        tokens = defaultdict(float)
+        for field, weight in SEARCH_FIELDS[model]:
+            text = getattr(obj, f'{field}_{language}', None) or getattr(obj, f'{field}_{default}', None)
+            for token in _tokenize(text):
+                tokens[token] += FALLBACK_WEIGHTS[weight]
+        return tokens
+
+    def _add(self, model, obj):
+        for language in SEARCH_LANGUAGES:
+            postings = self._postings[model][language]
+            documents = self._documents[model][language]
+            for token in documents.pop(obj.pk, ()):
+                postings[token].pop(obj.pk, None)
+            tokens = self._document_tokens(obj, model, language)
+            for token, weight in tokens.items():
+                postings[token][obj.pk] = weight
+            documents[obj.pk] = set(tokens)
+
+    def _ensure_built(self, model):
+        if model in self._postings:
+            return
+        self._postings[model] = {lang: defaultdict(dict) for lang in SEARCH_LANGUAGES}
+        self._documents[model] = {lang: {} for lang in SEARCH_LANGUAGES}
+        for obj in model._base_manager.all().iterator():
+            self._add(model, obj)
+
+    def update(self, obj):
+        model = type(obj)
+        with self._lock:
+            if model in self._postings:
+                self._add(model, obj)
+
+    def remove(self, obj):
+        model = type(obj)
+        with self._lock:
+            if model not in self._postings:
+                return
+            for language in SEARCH_LANGUAGES:
+                postings = self._postings[model][language]
+                for token in self._documents[model][language].pop(obj.pk, ()):
+                    postings[token].pop(obj.pk, None)
+
+    def search(self, model, query, language):
+        """Return {pk: score} for documents containing every query term."""
+        terms = _tokenize(query)
+        if not terms:
+            return {}
+        with self._lock:
+            self._ensure_built(model)
+            postings = self._postings[model][language]
+            scores = None
+            for term in terms:
+                matches = postings.get(term, {})
+                if scores is None:
+                    scores = dict(matches)
+                else:
+                    scores = {pk: score + matches[pk] for pk, score in scores.items() if pk in matches}
+                if not scores:
+                    return {}
+        return scores
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+
+
+fallback_index = FallbackSearchIndex()
+
+
+def searchable_fields(model):
+    """Database columns the search vectors of a model are built from."""
+    return {
+        f'{field}_{language}'
+        for field, weight in SEARCH_FIELDS[model]
+        for language in SEARCH_LANGUAGES
+    } | {field for field, weight in SEARCH_FIELDS[model]}
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vectors for every row of a queryset."""
+    if not use_postgres():
+        for obj in queryset:
+            fallback_index.update(obj)
+        return
+
+    model = queryset.model
+    queryset.update(**{
+        f'search_vector_{language}': build_search_vector(model, language)
+        for language in SEARCH_LANGUAGES
+    })
+
+
+def update_search_vector(instance, update_fields=None):
+    """Keep the search vectors of a saved instance current."""
+    model = type(instance)
+    if update_fields is not None and not set(update_fields) & searchable_fields(model):
+        return
+    if use_postgres():
+        update_search_vectors(model._base_manager.filter(pk=instance.pk))
+    else:
+        fallback_index.update(instance)
+
+
+def remove_search_vector(instance):
+    if not use_postgres():
+        fallback_index.remove(instance)
+
+
+def search(queryset, query, language=None, ranked=True):
+    """
+    Filter queryset to rows matching a full-text query in the active
+    language. When ranked, results are annotated with ``search_rank`` and
+    ordered by it; otherwise the queryset ordering is left alone.
+    """
+    model = queryset.model
+    language = search_language(language)
+
+    if use_postgres():
+        vector_field = f'search_vector_{language}'
+        search_query = SearchQuery(query, config=SEARCH_CONFIGS.get(language, 'simple'), search_type='websearch')
+        queryset = queryset.filter(**{vector_field: search_query})
+        if not ranked:
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(F(vector_field), search_query)
+        ).order_by('-search_rank', '-created_at')
+
+    scores = fallback_index.search(model, query, language)
+    if not scores:
+        return queryset.none()
+    queryset = queryset.filter(pk__in=scores)
+    if not ranked:
+        return queryset
+    return queryset.annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+            output_field=FloatField(),
+        )
+    ).order_by('-search_rank', '-created_at')
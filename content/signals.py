@@ -0,0 +1,236 @@
+from django.conf import settings
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from utils.response_cache import invalidate_tags
+
+from .models import Article, Story, Landmark, Image, Video, Category, Tag, QRCode, ContentIndex
+from .categories import detach_subtree, update_path
+from .qr_redirects import refresh_qrcodes, forget_qrcodes
+from .related import SCORED_FIELDS, schedule_refresh
+from .search import update_search_vector, remove_search_vector
+from .tag_stats import content_deleted, publication_changed, tags_changed
+from .indexing import (
+    sync_content_index, sync_content_index_tags, remove_from_content_index,
+    add_index_view_counts,
+)
+from .view_counter import view_counts_flushed
+
+
+# Full-text search
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Landmark)
+@receiver(post_save, sender=ContentIndex)
+def update_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        update_search_vector(instance, update_fields=update_fields)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=Landmark)
+@receiver(post_delete, sender=ContentIndex)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_search_vector(instance)
+
+
+# Cross-type content index
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Landmark)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=Video)
+def update_content_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_content_index(instance)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=Landmark)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Video)
+def delete_content_index(sender, instance, **kwargs):
+    remove_from_content_index(instance)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+@receiver(m2m_changed, sender=Story.tags.through)
+@receiver(m2m_changed, sender=Landmark.tags.through)
+def update_content_index_tags(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+
+    if not reverse:
+        if action != 'pre_clear':
+            sync_content_index_tags(instance)
+        return
+
+    # tag.articles.add(...) and friends: instance is the tag, model the content model
+    if action == 'pre_clear':
+        # pk_set is not provided for clear, remember the affected objects first
+        instance._content_index_cleared = list(model._base_manager.filter(tags=instance))
+        return
+    if action == 'post_clear':
+        objects = getattr(instance, '_content_index_cleared', [])
+    else:
+        objects = model._base_manager.filter(pk__in=pk_set)
+    for obj in objects:
+        sync_content_index_tags(obj)
+
+
+@receiver(view_counts_flushed)
+def update_content_index_view_counts(sender, pks, amount, field, **kwargs):
+    if field == 'view_count':
+        add_index_view_counts(sender, pks, amount)
+
+
+# Tag usage counts
+@receiver(m2m_changed, sender=Article.tags.through)
+@receiver(m2m_changed, sender=Story.tags.through)
+@receiver(m2m_changed, sender=Landmark.tags.through)
+def update_tag_counts(sender, instance, action, reverse, model, pk_set, **kwargs):
+    tags_changed(instance, action, reverse, model, pk_set)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Landmark)
+def count_tags_on_publication(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        publication_changed(instance, created)
+
+
+@receiver(pre_delete, sender=Article)
+@receiver(pre_delete, sender=Story)
+@receiver(pre_delete, sender=Landmark)
+def uncount_deleted_tags(sender, instance, **kwargs):
+    content_deleted(instance)
+
+
+# Category paths, before the response cache moves the category tag on
+@receiver(post_save, sender=Category)
+def update_category_path(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and instance.path and 'parent' not in update_fields):
+        return
+    update_path(instance)
+
+
+@receiver(post_delete, sender=Category)
+def detach_subcategories(sender, instance, **kwargs):
+    detach_subtree(instance)
+
+
+# Response cache
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Landmark)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=Video)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=QRCode)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=Landmark)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Video)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=QRCode)
+def invalidate_cached_responses(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_tags(sender._meta.label_lower)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+@receiver(m2m_changed, sender=Story.tags.through)
+@receiver(m2m_changed, sender=Landmark.tags.through)
+def invalidate_cached_tag_responses(sender, action, reverse, model, instance, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        content_model = model if reverse else type(instance)
+        invalidate_tags(content_model._meta.label_lower, 'content.tag')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_author_responses(sender, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no cached response renders
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_tags('accounts.user')
+
+
+# QR redirect lookup table
+@receiver(post_save, sender=QRCode)
+def refresh_qr_redirect(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_qrcodes([instance])
+
+
+@receiver(post_delete, sender=QRCode)
+def forget_qr_redirect(sender, instance, **kwargs):
+    forget_qrcodes([instance.uuid])
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Landmark)
+def refresh_content_qr_redirects(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Only the slug ends up in a redirect target
+    if raw or (update_fields is not None and 'slug' not in update_fields):
+        return
+    refresh_qrcodes(instance.qrcodes.select_related('article', 'story', 'landmark'))
+
+
+@receiver(pre_delete, sender=Article)
+@receiver(pre_delete, sender=Story)
+@receiver(pre_delete, sender=Landmark)
+def remember_content_qr_redirects(sender, instance, **kwargs):
+    # The QR codes are unlinked with a plain UPDATE, which sends no signal
+    instance._qr_redirect_uuids = list(instance.qrcodes.values_list('uuid', flat=True))
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=Landmark)
+def refresh_deleted_content_qr_redirects(sender, instance, **kwargs):
+    uuids = getattr(instance, '_qr_redirect_uuids', None)
+    if uuids:
+        refresh_qrcodes(QRCode.objects.filter(uuid__in=uuids).select_related('article', 'story', 'landmark'))
+
+
+# Related content
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Landmark)
+def refresh_related_content(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not SCORED_FIELDS & set(update_fields)):
+        return
+    schedule_refresh(instance)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=Landmark)
+def refresh_deleted_related_content(sender, instance, **kwargs):
+    schedule_refresh(instance)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+@receiver(m2m_changed, sender=Story.tags.through)
+@receiver(m2m_changed, sender=Landmark.tags.through)
+def refresh_tagged_related_content(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._related_cleared = list(model._base_manager.filter(tags=instance))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_refresh(instance)
+    elif action == 'post_clear':
+        for obj in getattr(instance, '_related_cleared', []):
+            schedule_refresh(obj)
+    else:
+        for obj in model._base_manager.filter(pk__in=pk_set):
+            schedule_refresh(obj)
@@ -0,0 +1,161 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest, Now
+
+from utils.response_cache import invalidate_tags
+
+from .models import Article, Story, Landmark, Tag
+
+# Content types whose published items are counted per tag, by the name of
+# their count column prefix (article -> Tag.article_count)
+COUNTED_MODELS = {
+    'article': Article,
+    'story': Story,
+    'landmark': Landmark,
+}
+
+CONTENT_TYPES = {model: content_type for content_type, model in COUNTED_MODELS.items()}
+
+COUNT_FIELDS = [f'{content_type}_count' for content_type in COUNTED_MODELS]
+
+# Moved whenever a count changes, so cached tag responses are refreshed
+# without touching every content list that renders tag names
+CACHE_TAG = 'content.tag_counts'
+
+
+def is_published(obj):
+    return bool(obj.is_published) and obj.status == 'published'
+
+
+def was_published(obj):
+    """
+    Whether obj was published as it was last loaded or saved, or None if
+    that is unknown (built in memory, or loaded without those fields).
+    """
+    status = getattr(obj, '_loaded_status', None)
+    published = getattr(obj, '_loaded_is_published', None)
+    if status is None or published is None:
+        return None
+    return published and status == 'published'
+
+
+def _published(model):
+    return model.objects.filter(is_published=True, status='published')
+
+
+def adjust_counts(content_type, amounts):
+    """
+    Add amounts ({tag pk: change}) to the usage counts of content_type,
+    with one UPDATE per distinct change. Counts never go below zero.
+    """
+    field = f'{content_type}_count'
+    by_amount = defaultdict(list)
+    for tag_id, amount in amounts.items():
+        if amount:
+            by_amount[amount].append(tag_id)
+    for amount, tag_ids in by_amount.items():
+        Tag.objects.filter(pk__in=tag_ids).update(**{
+            field: Greatest(F(field) + amount, Value(0)),
+            'usage_count': Greatest(F('usage_count') + amount, Value(0)),
+            'updated_at': Now(),
+        })
+    if by_amount:
+        invalidate_tags(CACHE_TAG)
+
+
+def tags_changed(instance, action, reverse, model, pk_set):
+    """
+    Follow one m2m_changed signal of a tags relation. Only published
+    content counts, and the pre_* actions remember which links will go.
+    """
+    if reverse:
+        # tag.articles.add(...) and friends: instance is the tag, model the content model
+        content_type = CONTENT_TYPES[model]
+        if action == 'post_add':
+            adjust_counts(content_type, {instance.pk: _published(model).filter(pk__in=pk_set).count()})
+        elif action in ('pre_remove', 'pre_clear'):
+            linked = _published(model).filter(tags=instance)
+            if action == 'pre_remove':
+                linked = linked.filter(pk__in=pk_set)
+            instance._tag_count_removed = linked.count()
+        elif action in ('post_remove', 'post_clear'):
+            adjust_counts(content_type, {instance.pk: -getattr(instance, '_tag_count_removed', 0)})
+        return
+
+    if not is_published(instance):
+        return
+    content_type = CONTENT_TYPES[type(instance)]
+    if action == 'post_add':
+        adjust_counts(content_type, {tag_id: 1 for tag_id in pk_set})
+    elif action in ('pre_remove', 'pre_clear'):
+        # remove() reports the pks it was given, linked or not
+        linked = instance.tags.all()
+        if action == 'pre_remove':
+            linked = linked.filter(pk__in=pk_set)
+        instance._tag_count_removed = list(linked.values_list('pk', flat=True))
+    elif action in ('post_remove', 'post_clear'):
+        adjust_counts(content_type, {tag_id: -1 for tag_id in getattr(instance, '_tag_count_removed', [])})
+
+
+def publication_changed(instance, created):
+    """
+    Count the tags of a saved object in or out when it enters or leaves
+    publication. Saves that keep it published or unpublished cost nothing.
+    """
+    before = False if created else was_published(instance)
+    now = is_published(instance)
+    instance._loaded_status = instance.status
+    instance._loaded_is_published = instance.is_published
+    # A new object gets its tags after it is saved
+    if created or before is None or before == now:
+        return
+    tag_ids = instance.tags.values_list('pk', flat=True)
+    adjust_counts(CONTENT_TYPES[type(instance)], {tag_id: 1 if now else -1 for tag_id in tag_ids})
+
+
+def content_deleted(instance):
+    """Count a published object's tags out before its tag links are deleted with it."""
+    before = was_published(instance)
+    if before if before is not None else is_published(instance):
+        tag_ids = instance.tags.values_list('pk', flat=True)
+        adjust_counts(CONTENT_TYPES[type(instance)], {tag_id: -1 for tag_id in tag_ids})
+
+
+def count_published_tags(content_type, pks, amount):
+    """
+    Add amount to the counts of every tag of the given objects, for
+    changes that bypass save(), such as bulk moderation.
+    """
+    model = COUNTED_MODELS[content_type]
+    tag_ids = Counter(model.tags.through.objects.filter(**{
+        f'{model._meta.model_name}_id__in': pks
+    }).values_list('tag_id', flat=True))
+    adjust_counts(content_type, {tag_id: count * amount for tag_id, count in tag_ids.items()})
+
+
+def reconcile_counts(dry_run=False):
+    """
+    Recount the published content of every tag, by type, and repair the
+    stored counts that drifted. Returns the number of tags that were off.
+    """
+    actual = defaultdict(dict)
+    for content_type, model in COUNTED_MODELS.items():
+        rows = _published(model).exclude(tags=None).values('tags').annotate(total=Count('pk'))
+        for row in rows:
+            actual[row['tags']][f'{content_type}_count'] = row['total']
+
+    fixed = 0
+    with transaction.atomic():
+        for tag in Tag.objects.only('pk', *COUNT_FIELDS, 'usage_count').iterator():
+            counts = {field: actual[tag.pk].get(field, 0) for field in COUNT_FIELDS}
+            counts['usage_count'] = sum(counts.values())
+            if all(getattr(tag, field) == value for field, value in counts.items()):
+                continue
+            fixed += 1
+            if not dry_run:
+                Tag.objects.filter(pk=tag.pk).update(**counts, updated_at=Now())
+    if fixed and not dry_run:
+        invalidate_tags(CACHE_TAG)
+    return fixed
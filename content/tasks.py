@@ -0,0 +1,121 @@
+import logging
+
+from django.apps import apps
+from django.db import transaction
+
+from utils.file_compressor import ImageTooLargeError, RENDITION_FORMATS, RENDITION_SIZES, generate_renditions
+from utils.jobs import job
+from utils.response_cache import invalidate_tags
+from utils.storage import blob_hash, media_storage
+
+from .models import Article, Landmark, Image, Video, ImageRendition
+
+logger = logging.getLogger(__name__)
+
+# The image field renditions are generated from, per model
+RENDITION_FIELDS = {
+    Image: 'image',
+    Article: 'featured_image',
+    Landmark: 'featured_image',
+    Video: 'thumbnail',
+}
+
+
+def _set_processing_status(obj, processing_status):
+    # Only standalone images track their processing state
+    if isinstance(obj, Image):
+        Image.objects.filter(pk=obj.pk).update(processing_status=processing_status)
+        obj.processing_status = processing_status
+
+
+def schedule_renditions(obj):
+    """Queue rendition generation for the image of a saved object, if it has one."""
+    field = RENDITION_FIELDS[type(obj)]
+    if not getattr(obj, field):
+        return None
+    _set_processing_status(obj, 'pending')
+    return process_renditions.delay(obj._meta.label_lower, obj.pk)
+
+
+def _copy_renditions(obj, field, source_hash):
+    """
+    Renditions already generated from the same source bytes, copied for obj
+    so an image uploaded again is not decoded and resized again. Returns
+    None when there is no complete set to copy.
+    """
+    if not source_hash:
+        return None
+    first = ImageRendition.objects.filter(source_hash=source_hash).first()
+    if first is None:
+        return None
+    existing = list(ImageRendition.objects.filter(
+        source_hash=source_hash, content_type_id=first.content_type_id,
+        object_id=first.object_id, field=first.field,
+    ))
+    if len(existing) != len(RENDITION_SIZES) * len(RENDITION_FORMATS):
+        return None
+
+    copies = []
+    for rendition in existing:
+        # The copy shares the stored file, which must outlive both rows
+        media_storage.add_reference(rendition.file.name)
+        copies.append(ImageRendition(
+            content_object=obj, field=field, size=rendition.size, format=rendition.format,
+            file=rendition.file.name, width=rendition.width, height=rendition.height,
+            source_hash=source_hash,
+        ))
+    return copies
+
+
+def _replace_renditions(obj, field, renditions):
+    with transaction.atomic():
+        obj.renditions.filter(field=field).delete()
+        ImageRendition.objects.bulk_create(renditions)
+    _set_processing_status(obj, 'ready')
+    invalidate_tags(obj._meta.label_lower)
+
+
+@job('content.process_renditions')
+def process_renditions(label, pk):
+    """
+    Replace the renditions of an object's image with freshly generated ones,
+    or with copies of those of an identical earlier upload.
+    """
+    model = apps.get_model(label)
+    obj = model._base_manager.filter(pk=pk).first()
+    if obj is None:
+        return
+
+    field = RENDITION_FIELDS[model]
+    image_field = getattr(obj, field)
+    source_hash = blob_hash(image_field.name) if image_field else ''
+    renditions = _copy_renditions(obj, field, source_hash)
+    if renditions is not None:
+        _replace_renditions(obj, field, renditions)
+        return
+
+    _set_processing_status(obj, 'processing')
+    renditions = []
+    try:
+        for size, format_name, width, height, content in generate_renditions(image_field):
+            rendition = ImageRendition(
+                content_object=obj, field=field, size=size, format=format_name,
+                width=width, height=height, source_hash=source_hash,
+            )
+            rendition.file.save(content.name, content, save=False)
+            renditions.append(rendition)
+    except ImageTooLargeError as error:
+        # Retrying won't make the image any smaller
+        for rendition in renditions:
+            rendition.file.delete(save=False)
+        _set_processing_status(obj, 'failed')
+        logger.warning('Not generating renditions for %s #%s: %s', label, pk, error)
+        return
+    except Exception:
+        for rendition in renditions:
+            rendition.file.delete(save=False)
+        _set_processing_status(obj, 'failed')
+        raise
+
+    _replace_renditions(obj, field, renditions)
+
@@ -0,0 +1,256 @@
+import atexit
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'viewcount'
+
+# Drains that look again at a slot add() has numbered but not yet written,
+# before deciding the process that took it died in between
+UNFILLED_SLOT_CHECKS = 3
+
+# Sent after a batch of increments is written, with sender=model and the
+# pks, amount and field of the batch
+view_counts_flushed = Signal()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _make_key(obj, field):
+    return f'{obj._meta.label_lower}:{obj.pk}:{field}'
+
+
+def _split_key(key):
+    label, pk, field = key.rsplit(':', 2)
+    return apps.get_model(label), pk, field
+
+
+def get_visitor_id(request):
+    """Identify the visitor behind a request for view de-duplication."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u{user.pk}'
+
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f's{session.session_key}'
+
+    raw = '{}|{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', ''),
+    )
+    return 'a' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+class LocalViewCountBuffer:
+    """Process-local buffer of pending increments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._pending = 0
+
+    def add(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+            self._pending += amount
+            return self._pending
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = dict(self._counts), defaultdict(int)
+            self._pending = 0
+        return counts
+
+
+class CacheViewCountBuffer:
+    """
+    Buffer shared by all processes through the cache backend.
+
+    Every key with pending increments is registered once in a numbered slot,
+    so a flush can find the dirty keys without the cache supporting sets.
+    A slot is numbered before it is written, so a drain that finds one
+    still empty checks it again on the next drains rather than skipping it.
+    """
+
+    def _key(self, *parts):
+        return ':'.join((CACHE_PREFIX,) + parts)
+
+    def _incr(self, key, amount=1):
+        try:
+            return cache.incr(key, amount)
+        except ValueError:
+            cache.add(key, 0, None)
+            return cache.incr(key, amount)
+
+    def add(self, key, amount=1):
+        if cache.add(self._key('dirty', key), 1, None):
+            slot = self._incr(self._key('seq'))
+            cache.set(self._key('slot', str(slot)), key, None)
+        self._incr(self._key('count', key), amount)
+        return self._incr(self._key('pending'), amount)
+
+    def drain(self):
+        lock = self._key('lock')
+        if not cache.add(lock, 1, 60):
+            return {}
+
+        counts = defaultdict(int)
+        try:
+            start = cache.get(self._key('flushed'), 0)
+            end = cache.get(self._key('seq'), 0)
+            cache.set(self._key('pending'), 0, None)
+            # slot -> drains that found it empty so far
+            unfilled = cache.get(self._key('unfilled'), {})
+            still_unfilled = {}
+            for slot in list(unfilled) + list(range(start + 1, end + 1)):
+                slot_key = self._key('slot', str(slot))
+                key = cache.get(slot_key)
+                if key is None:
+                    checks = unfilled.get(slot, 0) + 1
+                    if checks < UNFILLED_SLOT_CHECKS:
+                        still_unfilled[slot] = checks
+                    continue
+                # Unregister before reading so later increments get a new slot
+                cache.delete_many([slot_key, self._key('dirty', key)])
+                amount = cache.get(self._key('count', key), 0)
+                if amount:
+                    cache.decr(self._key('count', key), amount)
+                    counts[key] += amount
+            cache.set(self._key('flushed'), end, None)
+            cache.set(self._key('unfilled'), still_unfilled, None)
+        finally:
+            cache.delete(lock)
+        return dict(counts)
+
+
+class ViewCounter:
+    """
+    Collects view increments in a buffer and writes them to the database in
+    batches of ``UPDATE ... SET view_count = view_count + n`` statements,
+    either every VIEW_COUNT_FLUSH_INTERVAL seconds or once
+    VIEW_COUNT_FLUSH_THRESHOLD views are pending.
+    """
+
+    def __init__(self, buffer=None):
+        if buffer is None:
+            if _setting('VIEW_COUNT_BUFFER', 'local') == 'cache':
+                buffer = CacheViewCountBuffer()
+            else:
+                buffer = LocalViewCountBuffer()
+        self.buffer = buffer
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def record(self, obj, request=None, field='view_count'):
+        """
+        Count a view of obj. Returns False when the view was a repeat by the
+        same visitor within VIEW_COUNT_DEDUPE_WINDOW seconds.
+        """
+        return self.record_key(_make_key(obj, field), request=request)
+
+    def record_key(self, key, request=None):
+        """Count a view of the object identified by a view_count_key()."""
+        window = _setting('VIEW_COUNT_DEDUPE_WINDOW', 30 * 60)
+        if request is not None and window:
+            seen_key = f'{CACHE_PREFIX}:seen:{key}:{get_visitor_id(request)}'
+            if not cache.add(seen_key, 1, window):
+                return False
+
+        pending = self.buffer.add(key)
+        if pending >= _setting('VIEW_COUNT_FLUSH_THRESHOLD', 100):
+            self.flush()
+        else:
+            self._schedule_flush()
+        return True
+
+    def flush(self):
+        """Write all buffered increments to the database. Returns the rows updated."""
+        counts = self.buffer.drain()
+        if not counts:
+            return 0
+
+        # Group objects receiving the same increment into one UPDATE
+        batches = defaultdict(list)
+        for key, amount in counts.items():
+            model, pk, field = _split_key(key)
+            batches[(model, field, amount)].append(pk)
+
+        updated = 0
+        try:
+            with transaction.atomic():
+                for (model, field, amount), pks in batches.items():
+                    updated += model._base_manager.filter(pk__in=pks).update(
+                        **{field: F(field) + amount}
+                    )
+                    view_counts_flushed.send(sender=model, pks=pks, amount=amount, field=field)
+        except Exception:
+            # Nothing was written; keep the increments for the next flush
+            for key, amount in counts.items():
+                self.buffer.add(key, amount)
+            raise
+        return updated
+
+    def _schedule_flush(self):
+        interval = _setting('VIEW_COUNT_FLUSH_INTERVAL', 30)
+        if not interval:
+            return
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._timer_lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush buffered view counts')
+        finally:
+            connection.close()
+
+
+view_counter = ViewCounter()
+
+
+def record_view(obj, request=None, field='view_count'):
+    return view_counter.record(obj, request=request, field=field)
+
+
+def view_count_key(obj, field='view_count'):
+    return _make_key(obj, field)
+
+
+def record_cached_view(request, meta):
+    """Response cache hit hook: count the view a cached detail page stands for."""
+    if meta and meta.get('view_count_key'):
+        view_counter.record_key(meta['view_count_key'], request=request)
+
+
+def flush_view_counts():
+    return view_counter.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Don't lose increments still sitting in a process-local buffer
+    if isinstance(view_counter.buffer, LocalViewCountBuffer):
+        try:
+            view_counter.flush()
+        except Exception:
+            logger.exception('Failed to flush buffered view counts on exit')
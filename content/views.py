@@ -1,14 +1,26 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
+from django.shortcuts import render
+from django.http import Http404, HttpResponseRedirect
 from django.views.generic import ListView, DetailView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.utils.decorators import method_decorator
+
+from utils.response_cache import cache_anonymous_response
 
 from .models import (
     Article, Story, Landmark, Image, Video, 
-    Category, Tag, QRCode
+    Category, Tag
 )
+from . import qr_redirects
+from .geo import nearby
+from .related import related_items
+from .search import search
+from .view_counter import record_view, record_cached_view, view_count_key
+
+CONTENT_CACHE_TAGS = ('content.category', 'content.tag', 'accounts.user')
 
 # Article views
+@method_decorator(cache_anonymous_response(('content.article',) + CONTENT_CACHE_TAGS), name='dispatch')
 class ArticleListView(ListView):
     model = Article
     template_name = 'content/article_list.html'
@@ -31,11 +43,7 @@ class ArticleListView(ListView):
         # Search functionality
         search_query = self.request.GET.get('q')
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(content__icontains=search_query) |
-                Q(summary__icontains=search_query)
-            )
+            queryset = search(queryset, search_query)
         
         return queryset
     
@@ -50,6 +58,10 @@ class ArticleListView(ListView):
         return context
 
 
+@method_decorator(
+    cache_anonymous_response(('content.article',) + CONTENT_CACHE_TAGS, on_hit=record_cached_view),
+    name='dispatch'
+)
 class ArticleDetailView(DetailView):
     model = Article
     template_name = 'content/article_detail.html'
@@ -60,20 +72,21 @@ class ArticleDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        article = self.get_object()
+        article = self.object
         
         # Increment view count
-        article.view_count += 1
-        article.save(update_fields=['view_count'])
+        record_view(article, self.request)
         
-        # Get related articles
-        context['related_articles'] = Article.objects.filter(
-            category=article.category,
-            is_published=True,
-            status='published'
-        ).exclude(id=article.id)[:3]
+        # Get related articles, precomputed by content/related.py
+        context['related_articles'] = related_items(article, 3)
         
         return context
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Cached copies of this page still count as views
+        response.cache_meta = {'view_count_key': view_count_key(self.object)}
+        return response
 
 
 # Story views
@@ -99,17 +112,15 @@ class StoryListView(ListView):
         # Search functionality
         search_query = self.request.GET.get('q')
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(content__icontains=search_query) |
-                Q(summary__icontains=search_query) |
-                Q(location__icontains=search_query) |
-                Q(period__icontains=search_query)
-            )
+            queryset = search(queryset, search_query)
         
         return queryset
 
 
+@method_decorator(
+    cache_anonymous_response(('content.story',) + CONTENT_CACHE_TAGS, on_hit=record_cached_view),
+    name='dispatch'
+)
 class StoryDetailView(DetailView):
     model = Story
     template_name = 'content/story_detail.html'
@@ -120,20 +131,21 @@ class StoryDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        story = self.get_object()
+        story = self.object
         
         # Increment view count
-        story.view_count += 1
-        story.save(update_fields=['view_count'])
+        record_view(story, self.request)
         
-        # Get related stories
-        context['related_stories'] = Story.objects.filter(
-            Q(category=story.category) | Q(location=story.location),
-            is_published=True,
-            status='published'
-        ).exclude(id=story.id)[:3]
+        # Get related stories, precomputed by content/related.py
+        context['related_stories'] = related_items(story, 3)
         
         return context
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Cached copies of this page still count as views
+        response.cache_meta = {'view_count_key': view_count_key(self.object)}
+        return response
 
 
 # Landmark views
@@ -159,17 +171,15 @@ class LandmarkListView(ListView):
         # Search functionality
         search_query = self.request.GET.get('q')
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(content__icontains=search_query) |
-                Q(summary__icontains=search_query) |
-                Q(location__icontains=search_query) |
-                Q(historical_period__icontains=search_query)
-            )
+            queryset = search(queryset, search_query)
         
         return queryset
 
 
+@method_decorator(
+    cache_anonymous_response(('content.landmark',) + CONTENT_CACHE_TAGS, on_hit=record_cached_view),
+    name='dispatch'
+)
 class LandmarkDetailView(DetailView):
     model = Landmark
     template_name = 'content/landmark_detail.html'
@@ -180,20 +190,26 @@ class LandmarkDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        landmark = self.get_object()
+        landmark = self.object
         
         # Increment view count
-        landmark.view_count += 1
-        landmark.save(update_fields=['view_count'])
+        record_view(landmark, self.request)
         
-        # Get nearby landmarks if coordinates are available
-        if landmark.latitude and landmark.longitude:
-            context['nearby_landmarks'] = Landmark.objects.filter(
-                is_published=True,
-                status='published'
-            ).exclude(id=landmark.id)[:5]  # In a real implementation, you'd use geospatial queries
+        # Closest published landmarks, each with a distance in km
+        if landmark.latitude is not None and landmark.longitude is not None:
+            context['nearby_landmarks'] = nearby(
+                Landmark.objects.filter(is_published=True, status='published').exclude(id=landmark.id),
+                landmark.latitude, landmark.longitude,
+                settings.NEARBY_LANDMARKS_RADIUS, limit=5,
+            )
         
         return context
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Cached copies of this page still count as views
+        response.cache_meta = {'view_count_key': view_count_key(self.object)}
+        return response
 
 
 # Image views
@@ -312,18 +328,16 @@ class TagDetailView(DetailView):
 
 # QR Code view
 class QRCodeView(View):
+    """
+    Redirects a scanned QR code to its content. Targets come from the
+    precomputed lookup table in content/qr_redirects.py, so a scan reads
+    neither the QR code nor its content from the database.
+    """
     def get(self, request, uuid):
-        qrcode = get_object_or_404(QRCode, uuid=uuid, is_active=True)
-        
-        # Redirect to the appropriate content
-        if qrcode.content_type == 'article' and qrcode.article:
-            return redirect('article-detail', slug=qrcode.article.slug)
-        elif qrcode.content_type == 'story' and qrcode.story:
-            return redirect('story-detail', slug=qrcode.story.slug)
-        elif qrcode.content_type == 'landmark' and qrcode.landmark:
-            return redirect('landmark-detail', slug=qrcode.landmark.slug)
-        elif qrcode.content_type == 'custom':
-            return redirect(qrcode.custom_url)
+        resolved = qr_redirects.resolve(uuid)
+        if resolved is None:
+            raise Http404('QR code not found')
         
-        # Fallback
-        return redirect('home')
+        pk, target = resolved
+        qr_redirects.record_scan(pk)
+        return HttpResponseRedirect(target)
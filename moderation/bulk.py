@@ -0,0 +1,141 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from content.indexing import INDEXED_MODELS
+from content.models import ContentIndex
+from content.related import RELATED_MODELS, schedule_refresh_many
+from content.tag_stats import COUNTED_MODELS, count_published_tags
+from utils.mail import queue_emails
+from utils.response_cache import invalidate_tags
+
+from .models import ModerationLog
+from .notifications import decision_email
+from .stats import adjust as adjust_stats
+
+# Largest number of items accepted by one bulk request
+MAX_ITEMS = 1000
+
+# Requested action -> the status it sets, which also names the log entry and email
+ACTIONS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+    'publish': 'published',
+}
+
+
+def _updates(model, action, comment, now):
+    """Column values an action writes to every item of a model."""
+    fields = {'status': ACTIONS[action]}
+    if action == 'publish':
+        fields['is_published'] = True
+    model_fields = {field.name for field in model._meta.concrete_fields}
+    if action in ('approve', 'reject') and 'moderation_comment' in model_fields:
+        fields['moderation_comment'] = comment
+    if 'updated_at' in model_fields:
+        # auto_now is only applied by save()
+        fields['updated_at'] = now
+    return fields
+
+
+def bulk_moderate(items, moderator):
+    """
+    Approve, reject or publish many pieces of content at once.
+
+    Items are grouped by model, action and comment, and every group is
+    written with one UPDATE. Moderation logs are inserted with one
+    bulk_create and the creators' emails queued with one more. Because
+    save() is bypassed, the content index, the response cache, the related
+    content and the tag usage counts are brought up to date here instead
+    of by the model signals.
+
+    Args:
+        items: Dicts with content_type, object_id, action and comment
+        moderator: The user making the decisions
+
+    Returns:
+        A result dict per item, in the order given
+    """
+    results = [
+        {'content_type': item['content_type'], 'object_id': item['object_id'], 'action': item['action']}
+        for item in items
+    ]
+    by_model = defaultdict(list)
+    for item, result in zip(items, results):
+        by_model[item['content_type']].append((item, result))
+
+    logs = []
+    emails = []
+    changed_models = []
+    pending_changes = defaultdict(int)
+    now = timezone.now()
+    with transaction.atomic():
+        for content_type, entries in by_model.items():
+            model = INDEXED_MODELS[content_type]
+            ids = {item['object_id'] for item, result in entries}
+            current = {
+                row['pk']: row
+                for row in model.objects.select_for_update(of=('self',))
+                .filter(pk__in=ids)
+                .values('pk', 'status', 'is_published', 'title', 'user__email')
+            }
+
+            groups = defaultdict(list)
+            for item, result in entries:
+                row = current.get(item['object_id'])
+                if row is None:
+                    result['error'] = 'Content object not found'
+                elif item['action'] == 'publish' and row['status'] != 'approved':
+                    result['error'] = 'Only approved content can be published'
+                else:
+                    groups[(item['action'], item['comment'])].append((row, result))
+
+            django_content_type = ContentType.objects.get_for_model(model)
+            for (action, comment), group in groups.items():
+                decision = ACTIONS[action]
+                pks = {row['pk'] for row, result in group}
+                model.objects.filter(pk__in=pks).update(**_updates(model, action, comment, now))
+
+                index_fields = {'status': decision, 'submitted_at': None}
+                if action == 'publish':
+                    index_fields['is_published'] = True
+                ContentIndex.objects.filter(content_type=content_type, object_id__in=pks).update(**index_fields)
+                if action == 'publish' and content_type in RELATED_MODELS:
+                    schedule_refresh_many(content_type, pks)
+                if content_type in COUNTED_MODELS:
+                    # Publishing counts the tags in, approving or rejecting published content counts them out
+                    was_published = {row['pk'] for row, result in group if row['is_published'] and row['status'] == 'published'}
+                    if action == 'publish':
+                        count_published_tags(content_type, pks - was_published, 1)
+                    else:
+                        count_published_tags(content_type, was_published, -1)
+                left_queue = sum(row['status'] == 'submitted' for row, result in group)
+                if left_queue:
+                    pending_changes[content_type] -= left_queue
+
+                for row, result in group:
+                    result['status'] = decision
+                    logs.append(ModerationLog(
+                        content_type=django_content_type,
+                        object_id=row['pk'],
+                        moderator=moderator,
+                        action=decision,
+                        comment=comment if action != 'publish' else f'Content published by {moderator.email}',
+                    ))
+                    subject, body = decision_email(decision, content_type, row['title'], comment)
+                    emails.append((subject, body, [row['user__email']], ''))
+
+            if groups:
+                changed_models.append(model._meta.label_lower)
+
+        ModerationLog.objects.bulk_create(logs)
+        queue_emails(emails)
+
+    if changed_models:
+        invalidate_tags(*changed_models)
+    # The UPDATEs bypass the signals that keep the dashboard counters current
+    for content_type, delta in pending_changes.items():
+        adjust_stats(content_type, delta)
+    return results
@@ -4,6 +4,8 @@ from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from utils.models import TracksLoadedStatus
+
 class ModerationLog(models.Model):
     """Log of moderation actions"""
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
@@ -34,12 +36,17 @@ class ModerationLog(models.Model):
         verbose_name = _('moderation log')
         verbose_name_plural = _('moderation logs')
         ordering = ['-created_at']
+        indexes = [
+            # History of one piece of content, and of one moderator
+            models.Index(fields=['content_type', 'object_id', '-created_at'], name='modlog_object'),
+            models.Index(fields=['moderator', '-created_at'], name='modlog_moderator'),
+        ]
         
     def __str__(self):
         return f"{self.get_action_display()} by {self.moderator.email} at {self.created_at}"
 
 
-class ContentReport(models.Model):
+class ContentReport(TracksLoadedStatus, models.Model):
     """User reports for inappropriate content"""
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
@@ -89,6 +96,11 @@ class ContentReport(models.Model):
         verbose_name = _('content report')
         verbose_name_plural = _('content reports')
         ordering = ['-created_at']
+        indexes = [
+            # Reports listed and counted by status, and the reports of one piece of content
+            models.Index(fields=['status', '-created_at'], name='report_status'),
+            models.Index(fields=['content_type', 'object_id'], name='report_object'),
+        ]
         
     def __str__(self):
         return f"Report by {self.reporter.email}: {self.get_reason_display()}"
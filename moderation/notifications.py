@@ -0,0 +1,46 @@
+from accounts.models import User
+from utils.mail import queue_email
+
+# Digest key of the review notifications sent to admins
+REVIEW_DIGEST = 'review'
+
+
+def notify_admins_of_submission(obj, submitted_by):
+    """Tell the admins that content was submitted for review, batched into digests."""
+    admin_emails = User.objects.filter(
+        role__in=[User.ROLE_ADMIN, User.ROLE_SUPERADMIN]
+    ).values_list('email', flat=True)
+    return queue_email(
+        'New content submitted for review',
+        f'A new {obj._meta.model_name} "{obj.title}" has been submitted for review by {submitted_by.email}.',
+        admin_emails,
+        digest=REVIEW_DIGEST,
+    )
+
+
+# Subject and body of the email a creator gets for each moderation decision
+DECISION_EMAILS = {
+    'approved': (
+        'Your content has been approved',
+        'Your {content_type} "{title}" has been approved by a moderator.',
+    ),
+    'rejected': (
+        'Your content needs revisions',
+        'Your {content_type} "{title}" has been reviewed and needs revisions.\n\nModerator comment: {comment}',
+    ),
+    'published': (
+        'Your content has been published',
+        'Your {content_type} "{title}" has been published and is now live.',
+    ),
+}
+
+
+def decision_email(decision, content_type, title, comment=''):
+    subject, body = DECISION_EMAILS[decision]
+    return subject, body.format(content_type=content_type, title=title, comment=comment)
+
+
+def notify_author(obj, decision, content_type, comment=''):
+    """Tell the creator of a piece of content about a moderation decision."""
+    subject, body = decision_email(decision, content_type, obj.title, comment)
+    return queue_email(subject, body, [obj.user.email])
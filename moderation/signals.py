@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from content.indexing import content_index_rebuilt
+from content.models import ContentIndex
+
+from .models import ContentReport
+from .stats import REPORTS, reset_counts, track_status_change
+
+
+# Dashboard counters
+@receiver(post_save, sender=ContentIndex)
+@receiver(post_delete, sender=ContentIndex)
+def count_pending_content(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = instance.status if kwargs['signal'] is post_save else None
+    track_status_change(instance.content_type, 'submitted', getattr(instance, '_loaded_status', None), current)
+    instance._loaded_status = current
+
+
+@receiver(content_index_rebuilt)
+def recount_pending_content(sender, **kwargs):
+    # The rebuild counted every deleted entry out but none of the new ones in
+    reset_counts()
+
+
+@receiver(post_save, sender=ContentReport)
+@receiver(post_delete, sender=ContentReport)
+def count_pending_reports(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = instance.status if kwargs['signal'] is post_save else None
+    track_status_change(REPORTS, 'pending', getattr(instance, '_loaded_status', None), current)
+    instance._loaded_status = current
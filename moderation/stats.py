@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Value
+
+from content.indexing import INDEXED_MODELS
+from content.models import ContentIndex
+
+from .models import ContentReport
+
+CACHE_PREFIX = 'moderation:stats'
+
+# Counter name of the pending reports; content counters are named by content type
+REPORTS = 'reports'
+
+COUNTERS = list(INDEXED_MODELS) + [REPORTS]
+
+
+def _key(counter):
+    return f'{CACHE_PREFIX}:{counter}'
+
+
+def _timeout():
+    return getattr(settings, 'MODERATION_STATS_CACHE_TIMEOUT', 60)
+
+
+def compute_counts():
+    """
+    Pending content per type and pending reports, counted in one UNION ALL
+    query, served by the review queue index of the content index and the
+    status index of reports.
+    """
+    content = (
+        ContentIndex.objects.submitted()
+        .order_by()
+        .annotate(kind=F('content_type'))
+        .values('kind')
+        .annotate(count=Count('id'))
+    )
+    reports = (
+        ContentReport.objects.filter(status='pending')
+        .order_by()
+        .annotate(kind=Value(REPORTS))
+        .values('kind')
+        .annotate(count=Count('id'))
+    )
+    counts = dict.fromkeys(COUNTERS, 0)
+    counts.update(content.union(reports, all=True).values_list('kind', 'count'))
+    return counts
+
+
+def get_counts():
+    """
+    The cached counters, recomputed once they expire. Between recomputes the
+    handlers in moderation/signals.py keep them current.
+    """
+    keys = {_key(counter): counter for counter in COUNTERS}
+    cached = cache.get_many(keys)
+    if len(cached) == len(keys):
+        # Increments racing a recompute can leave a counter slightly off until it expires
+        return {counter: max(cached[key], 0) for key, counter in keys.items()}
+
+    counts = compute_counts()
+    cache.set_many({_key(counter): count for counter, count in counts.items()}, _timeout())
+    return counts
+
+
+def get_dashboard_stats():
+    counts = get_counts()
+    pending = {content_type: counts[content_type] for content_type in INDEXED_MODELS}
+    return {
+        'pending': pending,
+        'total_pending': sum(pending.values()),
+        'pending_reports': counts[REPORTS],
+    }
+
+
+def adjust(counter, delta):
+    """Move a cached counter; a missing one is recomputed on the next read instead."""
+    try:
+        cache.incr(_key(counter), delta)
+    except ValueError:
+        pass
+
+
+def reset_counts():
+    """Drop the cached counters so the next read recomputes them."""
+    cache.delete_many([_key(counter) for counter in COUNTERS])
+
+
+def track_status_change(counter, pending_status, previous, current):
+    if previous == current:
+        return
+    if previous == pending_status:
+        adjust(counter, -1)
+    elif current == pending_status:
+        adjust(counter, 1)
@@ -4,18 +4,17 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.contenttypes.models import ContentType
 from django.contrib import messages
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
 from django.urls import reverse
+from django.core.paginator import Paginator
 
 from accounts.permissions import IsAdmin
 from accounts.models import User
 
-from content.models import (
-    Article, Story, Landmark, Image, Video
-)
+from content.models import ContentIndex
 
 from .models import ModerationLog, ContentReport
+from .notifications import notify_author
+from .stats import get_dashboard_stats
 
 
 class ModerationDashboardView(LoginRequiredMixin, View):
@@ -26,29 +25,21 @@ class ModerationDashboardView(LoginRequiredMixin, View):
             messages.error(request, "You don't have permission to access this page.")
             return redirect('home')
         
-        # Count of pending content
-        pending_articles = Article.objects.filter(status='submitted').count()
-        pending_stories = Story.objects.filter(status='submitted').count()
-        pending_landmarks = Landmark.objects.filter(status='submitted').count()
-        pending_images = Image.objects.filter(status='submitted').count()
-        pending_videos = Video.objects.filter(status='submitted').count()
-        
-        total_pending = pending_articles + pending_stories + pending_landmarks + pending_images + pending_videos
-        
-        # Count of pending reports
-        pending_reports = ContentReport.objects.filter(status='pending').count()
+        # Counted in one query and cached, see moderation/stats.py
+        stats = get_dashboard_stats()
+        pending = stats['pending']
         
         # Recent moderation activity
         recent_logs = ModerationLog.objects.filter(moderator=request.user).order_by('-created_at')[:10]
         
         context = {
-            'total_pending': total_pending,
-            'pending_articles': pending_articles,
-            'pending_stories': pending_stories,
-            'pending_landmarks': pending_landmarks,
-            'pending_images': pending_images,
-            'pending_videos': pending_videos,
-            'pending_reports': pending_reports,
+            'total_pending': stats['total_pending'],
+            'pending_articles': pending['article'],
+            'pending_stories': pending['story'],
+            'pending_landmarks': pending['landmark'],
+            'pending_images': pending['image'],
+            'pending_videos': pending['video'],
+            'pending_reports': stats['pending_reports'],
             'recent_logs': recent_logs,
         }
         
@@ -57,24 +48,23 @@ class ModerationDashboardView(LoginRequiredMixin, View):
 
 class PendingContentView(LoginRequiredMixin, View):
     template_name = 'moderation/pending_content.html'
+    paginate_by = 50
     
     def get(self, request, *args, **kwargs):
         if not request.user.is_admin:
             messages.error(request, "You don't have permission to access this page.")
             return redirect('home')
         
-        articles = Article.objects.filter(status='submitted').order_by('-created_at')
-        stories = Story.objects.filter(status='submitted').order_by('-created_at')
-        landmarks = Landmark.objects.filter(status='submitted').order_by('-created_at')
-        images = Image.objects.filter(status='submitted').order_by('-created_at')
-        videos = Video.objects.filter(status='submitted').order_by('-created_at')
+        # One queue across all content types, oldest submission first
+        queue = ContentIndex.objects.submitted().select_related('category', 'user').order_by('submitted_at', 'id')
+        content_type = request.GET.get('type')
+        if content_type:
+            queue = queue.filter(content_type=content_type)
+        page = Paginator(queue, self.paginate_by).get_page(request.GET.get('page'))
         
         context = {
-            'articles': articles,
-            'stories': stories,
-            'landmarks': landmarks,
-            'images': images,
-            'videos': videos,
+            'page_obj': page,
+            'items': page.object_list,
         }
         
         return render(request, self.template_name, context)
@@ -134,14 +124,7 @@ class ApproveContentView(LoginRequiredMixin, View):
             )
             
             # Notify content creator
-            if settings.EMAIL_HOST_USER:
-                send_mail(
-                    'Your content has been approved',
-                    f'Your {content_type} "{content_obj.title}" has been approved by a moderator.',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [content_obj.user.email],
-                    fail_silently=True,
-                )
+            notify_author(content_obj, 'approved', content_type)
             
             messages.success(request, f"The {content_type} has been approved.")
             
@@ -176,14 +159,7 @@ class RejectContentView(LoginRequiredMixin, View):
             )
             
             # Notify content creator
-            if settings.EMAIL_HOST_USER:
-                send_mail(
-                    'Your content needs revisions',
-                    f'Your {content_type} "{content_obj.title}" has been reviewed and needs revisions.\n\nModerator comment: {request.POST.get("comment", "")}',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [content_obj.user.email],
-                    fail_silently=True,
-                )
+            notify_author(content_obj, 'rejected', content_type, request.POST.get('comment', ''))
             
             messages.success(request, f"The {content_type} has been rejected.")
             
@@ -222,14 +198,7 @@ class PublishContentView(LoginRequiredMixin, View):
             )
             
             # Notify content creator
-            if settings.EMAIL_HOST_USER:
-                send_mail(
-                    'Your content has been published',
-                    f'Your {content_type} "{content_obj.title}" has been published and is now live.',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [content_obj.user.email],
-                    fail_silently=True,
-                )
+            notify_author(content_obj, 'published', content_type)
             
             messages.success(request, f"The {content_type} has been published.")
             
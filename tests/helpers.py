@@ -0,0 +1,28 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """
+    Assertions for keeping the number of queries behind an endpoint bounded,
+    independent of how many rows end up on the page.
+    """
+
+    def count_queries(self, url, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertNumQueriesPerPage(self, expected, url, add_rows, **kwargs):
+        """
+        Request url, add more rows with add_rows() and request it again,
+        asserting both responses ran exactly `expected` queries.
+        """
+        before = self.count_queries(url, **kwargs)
+        add_rows()
+        after = self.count_queries(url, **kwargs)
+        self.assertEqual(
+            (before, after), (expected, expected),
+            f'{url} ran {before} queries, then {after} after adding rows (expected {expected})'
+        )
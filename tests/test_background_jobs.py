@@ -0,0 +1,205 @@
+import io
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image as PILImage
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Image, ImageRendition
+from content.tasks import schedule_renditions
+from utils.jobs import Worker, claim_job, claim_next_job, enqueue, job, requeue_stale_jobs, run_job
+from utils.models import BackgroundJob
+
+calls = []
+
+
+@job('tests.record_call')
+def record_call(value):
+    calls.append(value)
+
+
+@job('tests.always_fail', max_attempts=2)
+def always_fail():
+    raise RuntimeError('boom')
+
+
+def make_upload(name='photo.png', size=(2400, 1600), mode='RGBA'):
+    buffer = io.BytesIO()
+    PILImage.new(mode, size, (200, 120, 40, 255) if mode == 'RGBA' else (200, 120, 40)).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class BackgroundJobTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_stores_pending_job(self):
+        queued = record_call.delay('a')
+        self.assertEqual(queued.status, BackgroundJob.STATUS_PENDING)
+        self.assertEqual(queued.args, ['a'])
+        self.assertEqual(calls, [])
+
+    def test_job_is_claimed_once(self):
+        queued = record_call.delay('a')
+        self.assertIsNotNone(claim_job(queued.pk, 'worker-1'))
+        self.assertIsNone(claim_job(queued.pk, 'worker-2'))
+
+    @override_settings(BACKGROUND_JOBS_RETRY_DELAY=0)
+    def test_failed_job_is_retried_then_marked_failed(self):
+        queued = always_fail.delay()
+
+        self.assertFalse(run_job(claim_job(queued.pk, 'worker')))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, BackgroundJob.STATUS_PENDING)
+        self.assertIn('boom', queued.last_error)
+
+        run_job(claim_job(queued.pk, 'worker'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, BackgroundJob.STATUS_FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    @override_settings(BACKGROUND_JOBS_TIMEOUT=60)
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        retried = record_call.delay('a')
+        exhausted = always_fail.delay()
+        fresh = record_call.delay('b')
+        # Each claimed once by a worker; the always_fail job on its last attempt
+        BackgroundJob.objects.update(status=BackgroundJob.STATUS_RUNNING, attempts=1, locked_at=timezone.now())
+        BackgroundJob.objects.filter(pk=exhausted.pk).update(attempts=2)
+        BackgroundJob.objects.exclude(pk=fresh.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        statuses = dict(BackgroundJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[retried.pk], BackgroundJob.STATUS_PENDING)
+        self.assertEqual(statuses[exhausted.pk], BackgroundJob.STATUS_FAILED)
+        self.assertEqual(statuses[fresh.pk], BackgroundJob.STATUS_RUNNING)
+
+    def test_worker_requeues_while_running(self):
+        worker = Worker()
+        with mock.patch('utils.jobs.requeue_stale_jobs', return_value=0) as requeue:
+            worker._requeue_if_due()
+            worker._requeue_if_due()
+            self.assertEqual(requeue.call_count, 1)
+            worker._next_requeue = 0
+            worker._requeue_if_due()
+            self.assertEqual(requeue.call_count, 2)
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        queued = enqueue('tests.record_call', 'now')
+        self.assertEqual(calls, ['now'])
+        self.assertEqual(queued.status, BackgroundJob.STATUS_DONE)
+
+
+class WorkerTestCase(TransactionTestCase):
+    # Worker threads use their own connections, so the jobs must be committed
+
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_drains_queue(self):
+        for value in range(10):
+            record_call.delay(value)
+        # A single thread: run_job's own writes aren't retried when the
+        # in-memory SQLite test database reports the table locked
+        Worker(workers=1).run(once=True)
+
+        self.assertEqual(sorted(calls), list(range(10)))
+        self.assertFalse(BackgroundJob.objects.exclude(status=BackgroundJob.STATUS_DONE).exists())
+
+    def test_threads_claim_each_job_once(self):
+        for value in range(20):
+            record_call.delay(value)
+        claimed = []
+
+        def claim_all(worker_id):
+            try:
+                while True:
+                    try:
+                        queued = claim_next_job(worker_id)
+                    except DatabaseError:
+                        # SQLite reports the table locked instead of waiting
+                        continue
+                    if queued is None:
+                        break
+                    claimed.append(queued.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim_all, args=(f'worker-{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(claimed), 20)
+        self.assertEqual(len(set(claimed)), 20)
+        self.assertEqual(BackgroundJob.objects.filter(status=BackgroundJob.STATUS_RUNNING, attempts=1).count(), 20)
+
+
+class ImageRenditionTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_settings.enable()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_returns_before_processing(self):
+        response = self.client.post('/api/images/', {'title': 'Song-Kol', 'image': make_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['processing_status'], 'pending')
+        self.assertEqual(response.data['renditions'], [])
+        self.assertTrue(BackgroundJob.objects.filter(name='content.process_renditions').exists())
+
+        # The original upload is stored untouched
+        image = Image.objects.get(pk=response.data['id'])
+        self.assertEqual(PILImage.open(image.image.path).size, (2400, 1600))
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_renditions_are_generated(self):
+        response = self.client.post('/api/images/', {'title': 'Song-Kol', 'image': make_upload()}, format='multipart')
+        image = Image.objects.get(pk=response.data['id'])
+        self.assertEqual(image.processing_status, 'ready')
+
+        renditions = {(r.size, r.format): r for r in image.renditions.all()}
+        self.assertEqual(len(renditions), 6)
+        self.assertEqual((renditions['large', 'jpeg'].width, renditions['large', 'jpeg'].height), (1620, 1080))
+        self.assertEqual((renditions['thumb', 'webp'].width, renditions['thumb', 'webp'].height), (320, 213))
+        self.assertEqual(PILImage.open(renditions['medium', 'webp'].file.path).format, 'WEBP')
+        self.assertEqual(PILImage.open(renditions['medium', 'jpeg'].file.path).format, 'JPEG')
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_new_upload_replaces_renditions(self):
+        response = self.client.post('/api/images/', {'title': 'Song-Kol', 'image': make_upload()}, format='multipart')
+        old_paths = list(ImageRendition.objects.values_list('file', flat=True))
+
+        self.client.patch(
+            f"/api/images/{response.data['id']}/", {'image': make_upload('small.png', (200, 100), 'RGB')},
+            format='multipart'
+        )
+        self.assertEqual(ImageRendition.objects.count(), 6)
+        self.assertFalse(ImageRendition.objects.filter(file__in=old_paths).exists())
+        self.assertFalse(ImageRendition.objects.exclude(width=200).exists())
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_featured_image_renditions(self):
+        article = Article.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.user,
+            featured_image=make_upload(), status='published', is_published=True
+        )
+        schedule_renditions(article)
+
+        response = self.client.get('/api/articles/manas/')
+        self.assertEqual(len(response.data['renditions']), 6)
@@ -0,0 +1,19 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from content.models import Article
+from moderation.models import ModerationLog
+
+
+class BenchmarkIndexesTestCase(TestCase):
+    def test_benchmark_is_rolled_back(self):
+        out = io.StringIO()
+        call_command('benchmark_indexes', rows=50, stdout=out)
+        self.assertIn('Without indexes', out.getvalue())
+        self.assertIn('Pending reports', out.getvalue())
+        self.assertFalse(Article.objects.exists())
+        self.assertFalse(ModerationLog.objects.exists())
+
+        # The dropped indexes are back
+        call_command('benchmark_indexes', rows=50, stdout=io.StringIO())
@@ -0,0 +1,107 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Image, Story, ContentIndex
+from content.related import REFRESH_JOB
+from moderation.models import ModerationLog
+from utils.jobs import enqueue
+from utils.models import BackgroundJob, OutboxEmail
+
+
+class BulkModerationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email='author@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.articles = [
+            Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', content='Text', user=self.author, status='submitted'
+            )
+            for i in range(3)
+        ]
+        self.story = Story.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.author, status='approved'
+        )
+        self.image = Image.objects.create(
+            title='Son-Kul', image='uploads/images/son-kul.jpg', user=self.author, status='submitted'
+        )
+        ContentType.objects.get_for_models(Article, Story, Image)
+        self.client.force_authenticate(user=self.admin)
+
+    def post(self, data):
+        return self.client.post('/api/moderation/bulk/', data, format='json')
+
+    def test_mixed_items_are_moderated_with_grouped_queries(self):
+        items = [{'content_type': 'article', 'object_id': article.pk} for article in self.articles]
+        items += [
+            {'content_type': 'image', 'object_id': self.image.pk, 'action': 'reject', 'comment': 'Blurry'},
+            {'content_type': 'story', 'object_id': self.story.pk, 'action': 'publish'},
+        ]
+        # One SELECT, UPDATE and index UPDATE per model and action, one INSERT each for logs and emails,
+        # and the tags of the published story for their usage counts
+        with self.assertNumQueries(14):
+            response = self.post({'action': 'approve', 'comment': 'Looks good', 'items': items})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['moderated'], 5)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['approved', 'approved', 'approved', 'rejected', 'published']
+        )
+
+        self.assertEqual(set(Article.objects.values_list('status', 'moderation_comment')), {('approved', 'Looks good')})
+        self.story.refresh_from_db()
+        self.assertTrue(self.story.is_published)
+        self.assertEqual(
+            ContentIndex.objects.get(content_type='story', object_id=self.story.pk).status, 'published'
+        )
+        self.assertEqual(ModerationLog.objects.count(), 5)
+        self.assertEqual(OutboxEmail.objects.filter(recipient='author@example.com').count(), 5)
+        self.assertIn('Blurry', OutboxEmail.objects.get(subject='Your content needs revisions').body)
+
+    def test_publishing_queues_related_refreshes_in_bulk(self):
+        articles = [
+            Article.objects.create(
+                title=f'Approved {i}', slug=f'approved-{i}', content='Text', user=self.author, status='approved'
+            )
+            for i in range(10)
+        ]
+        BackgroundJob.objects.all().delete()
+        enqueue(REFRESH_JOB, 'article', articles[0].pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.post({'action': 'publish', 'items': [
+                {'content_type': 'article', 'object_id': article.pk} for article in articles
+            ]})
+        self.assertEqual(response.status_code, 200)
+        # One query for the refreshes already waiting and one INSERT for the
+        # rest, whatever the number of items; the other two queue the outbox send
+        with self.assertNumQueries(4):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(
+            sorted(BackgroundJob.objects.filter(name=REFRESH_JOB).values_list('args', flat=True)),
+            [['article', article.pk] for article in articles]
+        )
+
+    def test_failed_items_do_not_stop_the_others(self):
+        response = self.post({'action': 'publish', 'items': [
+            {'content_type': 'article', 'object_id': self.articles[0].pk},
+            {'content_type': 'story', 'object_id': self.story.pk},
+            {'content_type': 'story', 'object_id': 999},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        errors = [result.get('error') for result in response.data['results']]
+        self.assertEqual(errors, ['Only approved content can be published', None, 'Content object not found'])
+        self.assertEqual(ModerationLog.objects.count(), 1)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.post({'items': [{'content_type': 'article', 'object_id': 1}]}).status_code, 400)
+        self.assertEqual(self.post({'action': 'approve', 'items': [
+            {'content_type': 'qrcode', 'object_id': 1}
+        ]}).status_code, 400)
+
+        self.client.force_authenticate(user=self.author)
+        self.assertEqual(self.post({'action': 'approve', 'items': [
+            {'content_type': 'article', 'object_id': self.articles[0].pk}
+        ]}).status_code, 403)
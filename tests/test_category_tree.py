@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.categories import category_tree, rebuild_paths
+from content.models import Article, Category
+
+
+class CategoryTreeTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.culture = Category.objects.create(name_en='Culture', name_ky='Маданият', slug='culture')
+        self.crafts = Category.objects.create(name='Crafts', slug='crafts', parent=self.culture)
+        self.felt = Category.objects.create(name='Felt', slug='felt', parent=self.crafts)
+        self.nature = Category.objects.create(name='Nature', slug='nature')
+        for category in [self.culture, self.felt, self.nature]:
+            Article.objects.create(
+                title=category.slug, slug=f'in-{category.slug}', content='Text', user=self.user,
+                category=category, status='published', is_published=True
+            )
+
+    def refresh(self, *categories):
+        for category in categories:
+            category.refresh_from_db()
+
+    def test_paths_follow_moves_and_deletes(self):
+        self.refresh(self.felt)
+        self.assertEqual(self.felt.path, f'{self.culture.pk}/{self.crafts.pk}/{self.felt.pk}/')
+        self.assertEqual(self.felt.depth, 2)
+
+        # Moving a category moves its subtree in one update
+        self.crafts.parent = self.nature
+        self.crafts.save()
+        self.refresh(self.felt)
+        self.assertEqual(self.felt.path, f'{self.nature.pk}/{self.crafts.pk}/{self.felt.pk}/')
+
+        # Children of a deleted category become roots
+        self.nature.delete()
+        self.refresh(self.crafts, self.felt)
+        self.assertEqual(self.crafts.path, f'{self.crafts.pk}/')
+        self.assertEqual(self.felt.path, f'{self.crafts.pk}/{self.felt.pk}/')
+
+        Category.objects.update(path='')
+        self.assertEqual(rebuild_paths(), 3)
+        self.refresh(self.felt)
+        self.assertEqual(self.felt.path, f'{self.crafts.pk}/{self.felt.pk}/')
+
+    def test_cached_tree(self):
+        tree = category_tree('en')
+        self.assertEqual(tree.ancestors(self.felt.pk), [self.culture.pk, self.crafts.pk])
+        self.assertEqual(sorted(tree.descendants(self.culture.pk)), [self.culture.pk, self.crafts.pk, self.felt.pk])
+        self.assertEqual(tree.path(self.felt.pk), f'{self.culture.pk}/{self.crafts.pk}/{self.felt.pk}/')
+        # Only the validators are read while nothing changed
+        with self.assertNumQueries(1):
+            self.assertIs(category_tree('en'), tree)
+
+        self.assertEqual(category_tree('ky').nodes[self.culture.pk]['name'], 'Маданият')
+
+        Category.objects.create(name='Music', slug='music', parent=self.culture)
+        self.assertEqual(len(category_tree('en').descendants(self.culture.pk)), 4)
+
+        # A change made by another process moves no cache tag in this one
+        Category.objects.filter(pk=self.felt.pk).update(parent=self.nature, updated_at=timezone.now())
+        self.assertEqual(category_tree('en').ancestors(self.felt.pk), [self.nature.pk])
+
+    def test_tree_endpoint(self):
+        response = self.client.get('/api/categories/tree/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([node['slug'] for node in response.data], ['culture', 'nature'])
+        crafts = response.data[0]['children'][0]
+        self.assertEqual((crafts['slug'], crafts['depth']), ('crafts', 1))
+        self.assertEqual(crafts['children'][0]['slug'], 'felt')
+
+        response = self.client.get('/api/categories/tree/', HTTP_ACCEPT_LANGUAGE='ky')
+        self.assertIn('Маданият', [node['name'] for node in response.data])
+
+    def test_descendants_filter(self):
+        url = f'/api/articles/?category={self.culture.pk}&fields=slug'
+        response = self.client.get(url)
+        self.assertEqual([item['slug'] for item in response.data['results']], ['in-culture'])
+
+        # Category lookup, the ETag validators, then one query for the page and one for the count
+        with self.assertNumQueries(4):
+            response = self.client.get(url + '&descendants=true')
+        self.assertEqual({item['slug'] for item in response.data['results']}, {'in-culture', 'in-felt'})
+
+        response = self.client.get(f'/api/feed/?category={self.culture.pk}&descendants=true')
+        self.assertEqual({item['slug'] for item in response.data['results']}, {'in-culture', 'in-felt'})
+
+    def test_cannot_move_into_own_subtree(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch('/api/categories/culture/', {'parent': self.felt.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.data)
@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Category
+from utils.response_cache import cached_response
+
+
+class ConditionalRequestsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.category = Category.objects.create(name='History', slug='history')
+        self.article = Article.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.user,
+            category=self.category, status='published', is_published=True
+        )
+        Article.objects.create(
+            title='Shyrdak', slug='shyrdak', content='Felt', user=self.user,
+            status='published', is_published=True
+        )
+
+    def revalidate(self, url, response, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_detail(self):
+        # Logged in, so every request reaches the view instead of the response cache
+        self.client.force_login(self.user)
+        url = '/api/articles/manas/'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        # Session and user, then only the timestamp: no row, no tags, no renditions
+        with self.assertNumQueries(3):
+            response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        # Another language is another representation
+        self.assertEqual(self.revalidate(url, first, HTTP_ACCEPT_LANGUAGE='ky').status_code, 200)
+
+        self.article.content = 'Epic poem'
+        self.article.save()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_list(self):
+        self.client.force_login(self.user)
+        url = '/api/articles/'
+        first = self.client.get(url)
+        self.assertFalse(first.has_header('Last-Modified'))
+        # Session and user, then the newest updated_at and the count; no page
+        with self.assertNumQueries(3):
+            self.assertEqual(self.revalidate(url, first).status_code, 304)
+
+        Article.objects.filter(slug='manas').delete()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_list_changed_by_another_process(self):
+        self.client.force_login(self.user)
+        url = '/api/articles/'
+        # A write in another worker moves no tag generation in this one
+        with mock.patch('utils.conditional.get_tag_versions', side_effect=lambda tags: [1] * len(tags)):
+            first = self.client.get(url)
+            Article.objects.filter(slug='shyrdak').update(content='Felt carpets', updated_at=timezone.now())
+            self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_related_changes(self):
+        self.client.force_login(self.user)
+        url = '/api/articles/manas/'
+        first = self.client.get(url)
+        # The category name is rendered in the article, so renaming it changes the ETag
+        self.category.name = 'Heritage'
+        self.category.save()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_categories(self):
+        self.client.force_login(self.user)
+        first = self.client.get('/api/categories/')
+        # Session and user, then the list validators
+        with self.assertNumQueries(3):
+            self.assertEqual(self.revalidate('/api/categories/', first).status_code, 304)
+
+        Category.objects.create(name='Crafts', slug='crafts')
+        self.assertEqual(self.revalidate('/api/categories/', first).status_code, 200)
+
+    def test_anonymous_cache_hits(self):
+        first = self.client.get('/api/articles/manas/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.revalidate('/api/articles/manas/', first)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+
+class CachedResponseValidatorsTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_get_an_etag_from_the_cache_key(self):
+        factory = RequestFactory()
+        first = cached_response(factory.get('/ru/content/landmarks/'), ['content.landmark'], lambda: HttpResponse('Page'))
+        self.assertTrue(first['ETag'].startswith('W/"'))
+
+        request = factory.get('/ru/content/landmarks/', HTTP_IF_NONE_MATCH=first['ETag'])
+        response = cached_response(request, ['content.landmark'], lambda: HttpResponse('Page'))
+        self.assertEqual(response.status_code, 304)
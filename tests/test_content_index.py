@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Category, Tag, Article, Story, Image, ContentIndex, ContentIndexTag
+from content.search import fallback_index
+
+from .helpers import QueryCountAssertionsMixin
+
+
+class ContentIndexTestCase(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        fallback_index.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.category = Category.objects.create(name='Crafts', slug='crafts')
+        self.tag = Tag.objects.create(name='Felt', slug='felt')
+        self.article = Article.objects.create(
+            title_en='Shyrdak', title_ru='Шырдак', slug='shyrdak', content='Felt carpets',
+            user=self.user, category=self.category, status='published', is_published=True
+        )
+        self.article.tags.add(self.tag)
+        self.story = Story.objects.create(
+            title_en='Song of the yurt', slug='yurt', content='A story',
+            user=self.user, status='published', is_published=True
+        )
+        self.image = Image.objects.create(
+            title_en='Felt workshop', image='uploads/images/felt.jpg',
+            user=self.user, status='published', is_published=True
+        )
+        self.draft = Article.objects.create(
+            title_en='Draft felt', slug='draft', content='Draft', user=self.user
+        )
+
+    def entry(self, obj, content_type):
+        return ContentIndex.objects.get(content_type=content_type, object_id=obj.pk)
+
+    def test_index_follows_content_changes(self):
+        entry = self.entry(self.article, 'article')
+        self.assertEqual(entry.title_ru, 'Шырдак')
+        self.assertEqual(entry.category, self.category)
+        self.assertEqual(entry.tag_id_list, [self.tag.pk])
+
+        self.article.tags.clear()
+        self.article.title_en = 'Shyrdak carpets'
+        self.article.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.title_en, 'Shyrdak carpets')
+        self.assertEqual(entry.tag_ids, '')
+
+        self.tag.articles.add(self.article)
+        self.assertEqual(self.entry(self.article, 'article').tag_id_list, [self.tag.pk])
+
+        self.story.delete()
+        self.assertFalse(ContentIndex.objects.filter(content_type='story').exists())
+
+    def test_rebuild_command(self):
+        ContentIndex.objects.all().delete()
+        call_command('rebuild_content_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(ContentIndex.objects.count(), 4)
+        self.assertEqual(self.entry(self.article, 'article').tag_id_list, [self.tag.pk])
+        response = self.client.get('/api/feed/', {'tag': self.tag.pk})
+        self.assertEqual([item['slug'] for item in response.data['results']], ['shyrdak'])
+
+    def test_feed_lists_published_content_of_all_types(self):
+        response = self.client.get('/api/feed/')
+        self.assertEqual(
+            [(item['type'], item['id']) for item in response.data['results']],
+            [('image', self.image.pk), ('story', self.story.pk), ('article', self.article.pk)]
+        )
+
+        response = self.client.get('/api/feed/', {'tag': self.tag.pk})
+        self.assertEqual([item['slug'] for item in response.data['results']], ['shyrdak'])
+
+        # Tag filters join the indexed tag rows rather than scanning the tag text
+        self.story.tags.add(self.tag, Tag.objects.create(name='Yurt', slug='yurt'))
+        self.article.tags.remove(self.tag)
+        response = self.client.get('/api/feed/', {'tag': self.tag.pk})
+        self.assertEqual([item['slug'] for item in response.data['results']], ['yurt'])
+        self.assertEqual(ContentIndexTag.objects.filter(entry__content_type='story').count(), 2)
+
+        response = self.client.get('/api/feed/', {'type': 'story,image'})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_feed_keyset_pagination(self):
+        # Identical timestamps are ordered by id
+        now = timezone.now()
+        ContentIndex.objects.update(created_at=now)
+        ContentIndex.objects.filter(content_type='article').update(created_at=now - timedelta(days=1))
+
+        seen = []
+        url = '/api/feed/?page_size=1'
+        while url:
+            response = self.client.get(url)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [self.image.pk, self.story.pk, self.article.pk])
+
+        response = self.client.get(self.client.get('/api/feed/?page_size=2').data['next'])
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in previous.data['results']], [self.image.pk, self.story.pk])
+        self.assertIsNone(previous.data['previous'])
+
+    def test_feed_query_count_is_constant(self):
+        def add_rows():
+            for i in range(5):
+                Story.objects.create(
+                    title_en='Story %d' % i, slug='story-%d' % i, content='x',
+                    user=self.user, status='published', is_published=True
+                )
+        self.assertNumQueriesPerPage(1, '/api/feed/', add_rows)
+
+    def test_search_across_types(self):
+        response = self.client.get('/api/search/', {'q': 'felt'})
+        self.assertEqual([item['type'] for item in response.data['results']], ['image'])
+        response = self.client.get('/api/search/', {'q': 'shyrdak'})
+        self.assertEqual([item['type'] for item in response.data['results']], ['article'])
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from api.pagination import estimate_count
+from content.models import Article
+from moderation.models import ModerationLog
+
+
+class CursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        now = timezone.now()
+        self.articles = []
+        for i in range(5):
+            article = Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', content='Article', user=self.admin,
+                status='published', is_published=True
+            )
+            self.articles.append(article)
+        # Two articles share a timestamp, so the id breaks the tie
+        for i, article in enumerate(self.articles):
+            Article.objects.filter(pk=article.pk).update(created_at=now - timedelta(minutes=min(i, 3)))
+        self.newest_first = [article.slug for article in self.articles]
+        self.newest_first[3], self.newest_first[4] = self.newest_first[4], self.newest_first[3]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_page_numbers_by_default(self):
+        response = self.client.get('/api/articles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+
+    def test_cursor_pages(self):
+        seen = []
+        url = '/api/articles/?cursor=&page_size=2'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            # Only the ETag validators count rows, not the page
+            counts = [query['sql'].upper() for query in queries.captured_queries if 'COUNT(' in query['sql'].upper()]
+            self.assertEqual(len(counts), 1)
+            self.assertIn('MAX(', counts[0])
+            seen.extend(item['slug'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, self.newest_first)
+
+        # The previous link of the last page goes back to the middle page
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['slug'] for item in response.data['results']], self.newest_first[2:4])
+
+    def test_estimated_count(self):
+        response = self.client.get('/api/articles/?cursor=&page_size=2&count=estimate')
+        self.assertEqual(response.data['estimated_count'], 5)
+        self.assertEqual(estimate_count(Article.objects.filter(slug='article-1')), 1)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/articles/?cursor=garbage').status_code, 404)
+
+    def test_moderation_logs(self):
+        article_type = ContentType.objects.get_for_model(Article)
+        for article in self.articles:
+            ModerationLog.objects.create(
+                content_type=article_type, object_id=article.pk, moderator=self.admin, action='approved'
+            )
+        response = self.client.get(f'/api/moderation/logs/?cursor=&object_id={self.articles[0].pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['object_id'] for item in response.data['results']], [self.articles[0].pk])
+
+        response = self.client.get('/api/moderation/logs/?page_size=2&cursor=')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
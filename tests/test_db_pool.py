@@ -0,0 +1,67 @@
+from django.db import OperationalError
+from django.test import SimpleTestCase
+from utils.db_pool.pool import ConnectionPool
+from utils.management.commands.benchmark_latency import percentile
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2, timeout=0.1)
+        first = pool.get(self.connect)
+        pool.put(first)
+        self.assertIs(pool.get(self.connect), first)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_unusable_connections_are_replaced(self):
+        pool = ConnectionPool(max_size=2, timeout=0.1)
+        first = pool.get(self.connect)
+        pool.put(first)
+        second = pool.get(self.connect, check=lambda connection: False)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+        pool.put(second, reusable=False)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.idle, 0)
+
+    def test_size_is_bounded(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        first = pool.get(self.connect)
+        with self.assertRaises(OperationalError):
+            pool.get(self.connect)
+        pool.put(first)
+        self.assertIs(pool.get(self.connect), first)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+
+        def refuse():
+            raise OperationalError('refused')
+
+        with self.assertRaises(OperationalError):
+            pool.get(refuse)
+        self.assertIsNotNone(pool.get(self.connect))
+
+
+class PercentileTestCase(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
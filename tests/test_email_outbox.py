@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Story
+from utils import mail as outbox
+from utils.models import OutboxEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('mail server is down')
+
+
+@override_settings(EMAIL_DIGEST_DELAY=0)
+class OutboxTestCase(TestCase):
+    def test_digests_are_coalesced_per_recipient(self):
+        for title in ['Manas', 'Tash Rabat', 'Son-Kul']:
+            outbox.queue_email('New content submitted for review', f'"{title}" was submitted.',
+                               ['a@example.com', 'b@example.com'], digest='review')
+        outbox.queue_email('Your content has been approved', 'Approved.', ['a@example.com'])
+
+        with mock.patch('utils.mail.get_connection', wraps=outbox.get_connection) as get_connection:
+            self.assertEqual(outbox.send_outbox(), 3)
+        self.assertEqual(get_connection.call_count, 1)
+
+        digests = [message for message in mail.outbox if message.subject.endswith('(3)')]
+        self.assertEqual(sorted(message.to[0] for message in digests), ['a@example.com', 'b@example.com'])
+        self.assertIn('"Son-Kul" was submitted.', digests[0].body)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+
+    @override_settings(EMAIL_DIGEST_DELAY=300)
+    def test_staggered_digests_go_out_together(self):
+        start = timezone.now()
+        for offset, title in [(0, 'Manas'), (60, 'Tash Rabat'), (240, 'Son-Kul')]:
+            with mock.patch('utils.mail.timezone.now', return_value=start + timedelta(seconds=offset)):
+                outbox.queue_email('Review', f'"{title}" was submitted.', ['a@example.com'], digest='review')
+        # A plain email is not held back with the digest
+        outbox.queue_email('Approved', 'Approved.', ['a@example.com'])
+
+        with mock.patch('utils.mail.timezone.now', return_value=start + timedelta(seconds=301)):
+            self.assertEqual(outbox.send_outbox(), 2)
+        self.assertEqual(sorted(message.subject for message in mail.outbox), ['Approved', 'Review (3)'])
+        self.assertFalse(OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING).exists())
+
+    @override_settings(EMAIL_DIGEST_DELAY=300)
+    def test_digest_waits_for_its_delay(self):
+        outbox.queue_email('Review', 'Submitted.', ['a@example.com'], digest='review')
+        self.assertEqual(outbox.send_outbox(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_BACKEND='tests.test_email_outbox.FailingBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_then_given_up(self):
+        outbox.queue_email('Approved', 'Approved.', ['a@example.com'])
+        self.assertEqual(outbox.send_outbox(), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_PENDING, 1))
+        self.assertIn('mail server is down', email.last_error)
+
+        OutboxEmail.objects.update(send_after=email.created_at)
+        outbox.send_outbox()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class ModerationNotificationTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email='author@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.story = Story.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.author, status='draft'
+        )
+
+    def test_submission_is_queued_not_sent(self):
+        User.objects.create_user(email='superadmin@example.com', password='pass', role='superadmin')
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/stories/manas/submit_for_review/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(OutboxEmail.objects.values_list('recipient', 'digest')),
+            [('admin@example.com', 'review'), ('superadmin@example.com', 'review')]
+        )
+
+    def test_decision_is_sent_by_the_worker(self):
+        self.story.status = 'submitted'
+        self.story.save()
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/moderation/approve_content/', {
+                'content_type': 'story', 'object_id': self.story.pk
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message.to for message in mail.outbox], [['author@example.com']])
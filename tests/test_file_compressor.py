@@ -0,0 +1,81 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from accounts.models import User
+from content.models import Image
+from content.tasks import process_renditions
+from utils.file_compressor import ImageTooLargeError, compress_image, open_image
+
+
+def encode(size, format='JPEG', mode='RGB'):
+    buffer = io.BytesIO()
+    PILImage.new(mode, size, 'orange').save(buffer, format=format)
+    buffer.seek(0)
+    return buffer
+
+
+class OpenImageTestCase(TestCase):
+    def test_jpeg_is_downscaled_while_decoding(self):
+        img, stats = open_image(encode((4000, 3000)), (960, 960))
+        self.assertEqual(stats['source_size'], (4000, 3000))
+        # libjpeg decodes at 1/4 scale, still larger than the target
+        self.assertEqual(stats['decoded_size'], (1000, 750))
+        self.assertEqual(stats['decoded_bytes'], 1000 * 750 * 4)
+        self.assertEqual(img.size, (1000, 750))
+
+    def test_other_formats_are_reduced_after_loading(self):
+        img, stats = open_image(encode((4000, 3000), 'PNG', 'RGBA'), (320, 320))
+        self.assertEqual(stats['decoded_size'], (4000, 3000))
+        self.assertEqual(img.mode, 'RGB')
+        self.assertLess(img.width, 4000)
+        self.assertGreaterEqual(img.width, 2 * 320)
+
+    def test_small_images_are_left_alone(self):
+        img, stats = open_image(encode((300, 200)), (960, 960))
+        self.assertEqual(img.size, (300, 200))
+
+    @override_settings(MAX_IMAGE_PIXELS=1000 * 1000)
+    def test_decompression_bomb_is_refused_before_decoding(self):
+        with self.assertRaises(ImageTooLargeError):
+            open_image(encode((2000, 1000), 'PNG'), (320, 320))
+
+    @override_settings(IMAGE_DECODE_MAX_MEMORY=1024 * 1024)
+    def test_decoded_bitmap_is_capped(self):
+        with self.assertRaises(ImageTooLargeError):
+            open_image(encode((1000, 1000), 'PNG'), (320, 320))
+        # The JPEG fits once draft() shrinks it
+        open_image(encode((1000, 1000)), (320, 320))
+
+
+class ImageFileTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_settings.enable()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_image(self, size, format='JPEG'):
+        upload = SimpleUploadedFile('photo.jpg', encode(size, format).getvalue())
+        return Image.objects.create(title='Photo', image=upload, user=self.user)
+
+    def test_compress_image(self):
+        image = self.create_image((3840, 2160))
+        self.assertTrue(compress_image(image.image))
+        self.assertTrue(image.image.name.endswith('.jpg'))
+        self.assertEqual(PILImage.open(image.image.path).size, (1920, 1080))
+
+    @override_settings(MAX_IMAGE_PIXELS=1000 * 1000)
+    def test_oversized_image_fails_without_retry(self):
+        image = self.create_image((2000, 1000), 'PNG')
+        process_renditions('content.image', image.pk)
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, 'failed')
+        self.assertFalse(image.renditions.exists())
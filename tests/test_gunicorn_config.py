@@ -0,0 +1,35 @@
+import os
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+CONFIG = os.path.join(settings.BASE_DIR, 'config', 'gunicorn.py')
+
+
+class GunicornConfigTestCase(SimpleTestCase):
+    def load(self, **environ):
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return runpy.run_path(CONFIG)
+
+    def test_sync_defaults(self):
+        config = self.load()
+        cores = config['_cores']()
+        self.assertEqual(config['workers'], 2 * cores + 1)
+        self.assertEqual(config['threads'], 1)
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(config['max_requests_jitter'], 100)
+
+    def test_threaded_workers(self):
+        config = self.load(GUNICORN_WORKER_CLASS='gthread', GUNICORN_WORKERS='')
+        self.assertEqual(config['workers'], config['_cores']() + 1)
+        self.assertEqual(config['threads'], 4)
+
+        # Threads only apply to gthread workers
+        self.assertEqual(self.load(GUNICORN_THREADS='8')['threads'], 1)
+
+    def test_reload_disables_preloading(self):
+        config = self.load(GUNICORN_RELOAD='True', GUNICORN_WORKERS='3')
+        self.assertFalse(config['preload_app'])
+        self.assertEqual(config['workers'], 3)
@@ -0,0 +1,117 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from accounts.models import User
+from content.models import Image
+from content.tasks import process_renditions
+from utils.models import MediaBlob
+from utils.storage import media_storage
+
+
+def photo_bytes(color='orange'):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (1200, 800), color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class MediaStorageTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_settings.enable()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_image(self, content, name='photo.jpg'):
+        return Image.objects.create(title='Photo', image=SimpleUploadedFile(name, content), user=self.user)
+
+    def delete(self, obj):
+        # django_cleanup deletes files once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.delete()
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.create_image(photo_bytes(), 'first.jpg')
+        second = self.create_image(photo_bytes(), 'second.jpg')
+        other = self.create_image(photo_bytes('teal'))
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+        self.assertEqual(len(os.listdir(os.path.dirname(first.image.path))), 1)
+        # Nothing is left behind in the upload staging directory
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'blobs', 'tmp')), [])
+
+    def test_blob_is_deleted_with_last_reference(self):
+        first = self.create_image(photo_bytes())
+        second = self.create_image(photo_bytes())
+        path = first.image.path
+
+        self.delete(first)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(MediaBlob.objects.get(name=second.image.name).ref_count, 1)
+
+        self.delete(second)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_replacing_a_file_releases_the_old_blob(self):
+        image = self.create_image(photo_bytes())
+        old_path = image.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = SimpleUploadedFile('new.jpg', photo_bytes('teal'))
+            image.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_files_saved_before_deduplication_are_deleted_normally(self):
+        name = media_storage.save('uploads/images/legacy.jpg', ContentFile(b'legacy'))
+        MediaBlob.objects.filter(name=name).delete()
+        media_storage.delete(name)
+        self.assertFalse(media_storage.exists(name))
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_renditions_of_identical_upload_are_reused(self):
+        first = self.create_image(photo_bytes())
+        process_renditions('content.image', first.pk)
+
+        second = self.create_image(photo_bytes())
+        with mock.patch('content.tasks.generate_renditions') as generate:
+            process_renditions('content.image', second.pk)
+        generate.assert_not_called()
+
+        second.refresh_from_db()
+        self.assertEqual(second.processing_status, 'ready')
+        self.assertEqual(
+            sorted(second.renditions.values_list('file', flat=True)),
+            sorted(first.renditions.values_list('file', flat=True)),
+        )
+        rendition = second.renditions.first()
+        self.assertEqual(MediaBlob.objects.get(name=rendition.file.name).ref_count, 2)
+
+        # Deleting one image keeps the renditions the other still uses
+        self.delete(first)
+        self.assertTrue(os.path.exists(rendition.file.path))
+
+    def test_reconcile_command(self):
+        image = self.create_image(photo_bytes())
+        MediaBlob.objects.filter(name=image.image.name).update(ref_count=5)
+        orphan = media_storage.save('orphan.jpg', ContentFile(photo_bytes('teal')))
+
+        call_command('reconcile_media_blobs', stdout=io.StringIO())
+        self.assertEqual(MediaBlob.objects.get(name=image.image.name).ref_count, 1)
+        self.assertFalse(MediaBlob.objects.filter(name=orphan).exists())
+        self.assertFalse(media_storage.exists(orphan))
@@ -0,0 +1,86 @@
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Category, Article, Story, Image, ContentIndex
+
+from .helpers import QueryCountAssertionsMixin
+
+
+class ModerationQueueTestCase(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email='author@example.com', password='pass')
+        self.other = User.objects.create_user(email='other@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.category = Category.objects.create(name='Crafts', slug='crafts')
+        self.article = Article.objects.create(
+            title='Shyrdak', slug='shyrdak', content='Felt', user=self.author,
+            category=self.category, status='submitted'
+        )
+        self.story = Story.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.other, status='submitted'
+        )
+        self.image = Image.objects.create(
+            title='Son-Kul', image='uploads/images/son-kul.jpg', user=self.author, status='submitted'
+        )
+        Article.objects.create(title='Draft', slug='draft', content='Draft', user=self.author)
+        self.client.force_authenticate(user=self.admin)
+
+    def results(self, query=''):
+        response = self.client.get(f'/api/moderation/queue/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_queue_is_ordered_by_submission(self):
+        data = self.results()
+        self.assertEqual([item['type'] for item in data['results']], ['article', 'story', 'image'])
+        self.assertEqual(data['results'][0]['submitter_email'], 'author@example.com')
+        self.assertEqual(data['results'][0]['category_name'], 'Crafts')
+
+        # Edits while in review keep the original place in the queue
+        self.article.content = 'Felt carpets'
+        self.article.save()
+        self.assertEqual(self.results()['results'][0]['id'], self.article.pk)
+
+        # Resubmitting after a rejection goes to the back
+        self.article.status = 'rejected'
+        self.article.save()
+        self.assertIsNone(ContentIndex.objects.get(content_type='article', object_id=self.article.pk).submitted_at)
+        self.article.status = 'submitted'
+        self.article.save()
+        self.assertEqual(self.results()['results'][-1]['id'], self.article.pk)
+
+    def test_filters(self):
+        self.assertEqual(len(self.results('?type=image,story')['results']), 2)
+        self.assertEqual(len(self.results(f'?category={self.category.pk}')['results']), 1)
+        data = self.results(f'?submitter={self.other.pk}')
+        self.assertEqual([item['id'] for item in data['results']], [self.story.pk])
+
+    def test_pages_are_keyset_paginated(self):
+        first = self.results('?page_size=2')
+        self.assertEqual(len(first['results']), 2)
+        second = self.client.get(first['next']).data
+        self.assertEqual([item['type'] for item in second['results']], ['image'])
+        self.assertIsNone(second['next'])
+
+    def test_queries_are_bounded(self):
+        def add_rows():
+            for i in range(5):
+                user = User.objects.create_user(email=f'author{i}@example.com', password='pass')
+                Story.objects.create(title=f'Story {i}', slug=f'story-{i}', content='Text',
+                                     user=user, category=self.category, status='submitted')
+
+        self.assertNumQueriesPerPage(1, '/api/moderation/queue/', add_rows)
+
+    def test_bulk_moderation_leaves_the_queue(self):
+        self.client.post('/api/moderation/bulk/', {'action': 'approve', 'items': [
+            {'content_type': 'story', 'object_id': self.story.pk}
+        ]}, format='json')
+        self.assertEqual([item['type'] for item in self.results()['results']], ['article', 'image'])
+
+    def test_rebuild_keeps_the_queue(self):
+        call_command('rebuild_content_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(len(self.results()['results']), 3)
+
+    def test_admins_only(self):
+        self.client.force_authenticate(user=self.author)
+        self.assertEqual(self.client.get('/api/moderation/queue/').status_code, 403)
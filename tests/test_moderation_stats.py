@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Image, Story
+from moderation.models import ContentReport
+from moderation.stats import compute_counts
+
+
+class ModerationStatsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email='author@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.article = Article.objects.create(
+            title='Shyrdak', slug='shyrdak', content='Felt', user=self.author, status='submitted'
+        )
+        Story.objects.create(title='Manas', slug='manas', content='Epic', user=self.author, status='submitted')
+        Story.objects.create(title='Draft', slug='draft', content='Draft', user=self.author)
+        self.report = ContentReport.objects.create(
+            content_type=ContentType.objects.get_for_model(Article), object_id=self.article.pk,
+            reporter=self.author, reason='spam', details='Spam'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def stats(self):
+        response = self.client.get('/api/moderation/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = compute_counts()
+        self.assertEqual(counts, {'article': 1, 'story': 1, 'landmark': 0, 'image': 0, 'video': 0, 'reports': 1})
+
+    def test_snapshot_is_cached_and_kept_current(self):
+        data = self.stats()
+        self.assertEqual((data['total_pending'], data['pending_reports']), (2, 1))
+        with self.assertNumQueries(0):
+            self.stats()
+
+        Image.objects.create(title='Son-Kul', image='uploads/images/son-kul.jpg', user=self.author, status='submitted')
+        self.article.status = 'approved'
+        self.article.save()
+        self.article.save()
+        self.report.status = 'resolved'
+        self.report.save()
+        Story.objects.get(slug='manas').delete()
+
+        with self.assertNumQueries(0):
+            data = self.stats()
+        self.assertEqual(data['pending'], {'article': 0, 'story': 0, 'landmark': 0, 'image': 1, 'video': 0})
+        self.assertEqual(data['pending_reports'], 0)
+        self.assertEqual(data, self.recount())
+
+    def test_bulk_moderation_updates_the_counters(self):
+        self.stats()
+        self.client.post('/api/moderation/bulk/', {'action': 'approve', 'items': [
+            {'content_type': 'article', 'object_id': self.article.pk}
+        ]}, format='json')
+        self.assertEqual(self.stats()['pending']['article'], 0)
+        self.assertEqual(self.stats(), self.recount())
+
+    def test_rebuilding_the_index_resets_the_counters(self):
+        self.stats()
+        call_command('rebuild_content_index', stdout=StringIO())
+        self.assertEqual(self.stats()['pending'], {'article': 1, 'story': 1, 'landmark': 0, 'image': 0, 'video': 0})
+
+    def recount(self):
+        cache.clear()
+        return self.stats()
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.geo import haversine_km, nearby
+from content.models import Landmark
+from content.views import LandmarkDetailView
+
+
+class GeoTestCase(SimpleTestCase):
+    def test_haversine(self):
+        # Naryn to Bishkek
+        self.assertAlmostEqual(haversine_km(41.4287, 75.9911, 42.8746, 74.5698), 198, delta=2)
+        self.assertEqual(haversine_km(41.4, 75.9, 41.4, 75.9), 0)
+
+
+class NearbyLandmarksTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.landmarks = {}
+        for slug, lat, lon in [
+            ('naryn', 41.4287, 75.9911),
+            ('tash-rabat', 40.8231, 75.2883),
+            ('son-kul', 41.8333, 75.1333),
+            ('bishkek', 42.8746, 74.5698),
+            # Just outside a 1 km box corner but inside its latitude band
+            ('naryn-east', 41.4287, 76.0040),
+        ]:
+            self.landmarks[slug] = Landmark.objects.create(
+                title=slug, slug=slug, content='Landmark', location='Naryn', latitude=lat, longitude=lon,
+                user=self.user, status='published', is_published=True
+            )
+        Landmark.objects.create(
+            title='Draft', slug='draft', content='Draft', location='Naryn', latitude=41.43, longitude=75.99,
+            user=self.user
+        )
+
+    def get(self, query):
+        return self.client.get(f'/api/landmarks/nearby/{query}')
+
+    def test_nearest_first_within_radius(self):
+        response = self.get('?lat=41.4287&lon=75.9911&radius=100')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['slug'] for item in response.data], ['naryn', 'naryn-east', 'son-kul', 'tash-rabat'])
+        self.assertEqual(response.data[0]['distance'], 0)
+        self.assertAlmostEqual(response.data[1]['distance'], 1.07, delta=0.02)
+
+        response = self.get('?lat=41.4287&lon=75.9911&radius=1')
+        self.assertEqual([item['slug'] for item in response.data], ['naryn'])
+
+        response = self.get('?lat=41.4287&lon=75.9911&radius=100&limit=2')
+        self.assertEqual(len(response.data), 2)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get('?lon=75.99').status_code, 400)
+        self.assertEqual(self.get('?lat=95&lon=75.99').status_code, 400)
+        self.assertEqual(self.get('?lat=41&lon=75&radius=500').status_code, 400)
+        self.assertEqual(self.get('?lat=41&lon=abc').status_code, 400)
+
+    def test_queries_stay_bounded(self):
+        queryset = Landmark.objects.filter(is_published=True, status='published')
+        with self.assertNumQueries(2):
+            results = nearby(queryset, 41.4287, 75.9911, 100)
+        self.assertEqual(len(results), 4)
+
+    def test_antimeridian(self):
+        Landmark.objects.create(
+            title='Fiji', slug='fiji', content='Far', location='Pacific', latitude=-17.0, longitude=179.99,
+            user=self.user, status='published', is_published=True
+        )
+        queryset = Landmark.objects.filter(is_published=True, status='published')
+        results = nearby(queryset, -17.0, -179.99, 10)
+        self.assertEqual([landmark.slug for landmark in results], ['fiji'])
+
+    @override_settings(NEARBY_LANDMARKS_RADIUS=100)
+    def test_detail_page_lists_nearby_landmarks(self):
+        view = LandmarkDetailView()
+        view.setup(RequestFactory().get('/ru/content/landmarks/naryn/'), slug='naryn')
+        view.object = view.get_object()
+        context = view.get_context_data()
+        self.assertEqual(
+            [landmark.slug for landmark in context['nearby_landmarks']],
+            ['naryn-east', 'son-kul', 'tash-rabat']
+        )
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+from utils.management.commands.profile_startup import group_by_package, parse_importtime
+
+IMPORTTIME = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   content.geo
+import time:       300 |        420 | content.models
+import time:        50 |         50 |     django.contrib.admin.sites
+import time:       200 |        250 |   django.contrib.admin
+import time:      1000 |       1250 | django.db
+'''
+
+
+class ProfileStartupTestCase(SimpleTestCase):
+    def test_parse_and_group(self):
+        modules = parse_importtime(IMPORTTIME)
+        self.assertEqual(modules[1], ('content.models', 300, 420))
+        self.assertEqual(
+            group_by_package(modules, {'content', 'django.contrib.admin'}),
+            {'content': 420, 'django.contrib.admin': 250, 'django': 1000},
+        )
+
+    def test_optional_libraries_are_not_loaded_at_startup(self):
+        # A fresh interpreter, as a worker booting, up to its URL conf
+        script = (
+            'import sys, django; django.setup(); '
+            'from django.urls import get_resolver; get_resolver().url_patterns; '
+            'print(",".join(sorted(name for name in ("PIL", "qrcode") if name in sys.modules)))'
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
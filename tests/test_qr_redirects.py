@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from accounts.models import User
+from content.models import Article, Landmark, QRCode
+from content.qr_redirects import resolve
+from content.view_counter import view_counter, flush_view_counts
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0, VIEW_COUNT_FLUSH_THRESHOLD=1000)
+class QRRedirectTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counter.buffer.drain()
+        self.user = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.landmark = Landmark.objects.create(
+            title='Tash Rabat', slug='tash-rabat', content='Caravanserai', location='At-Bashy',
+            user=self.user, status='published', is_published=True
+        )
+        self.qrcode = QRCode.objects.create(
+            title='Tash Rabat sign', content_type='landmark', landmark=self.landmark, created_by=self.user
+        )
+
+    def scan(self, qrcode=None, language='ru'):
+        return self.client.get(f'/{language}/content/qrcodes/{(qrcode or self.qrcode).uuid}/')
+
+    def test_warm_scan_does_not_query_the_database(self):
+        with self.assertNumQueries(0):
+            response = self.scan()
+        self.assertRedirects(response, '/ru/content/landmarks/tash-rabat/', fetch_redirect_response=False)
+
+    def test_target_follows_the_language(self):
+        response = self.scan(language='en')
+        self.assertRedirects(response, '/en/content/landmarks/tash-rabat/', fetch_redirect_response=False)
+
+    def test_entries_expire(self):
+        # Other processes only see a deactivation once their entry expires
+        with mock.patch('content.qr_redirects.cache.set_many') as set_many:
+            self.qrcode.is_active = False
+            self.qrcode.save()
+        self.assertEqual(set_many.call_args.args[1], 300)
+
+    def test_cold_entry_is_loaded_once(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.scan()
+        with self.assertNumQueries(0):
+            self.scan()
+
+    def test_content_changes_refresh_the_target(self):
+        self.landmark.slug = 'tash-rabat-caravanserai'
+        self.landmark.save()
+        response = self.scan()
+        self.assertRedirects(
+            response, '/ru/content/landmarks/tash-rabat-caravanserai/', fetch_redirect_response=False
+        )
+
+        self.landmark.delete()
+        self.assertEqual(self.scan().status_code, 404)
+
+    def test_inactive_and_unknown_codes_are_not_found(self):
+        self.qrcode.is_active = False
+        self.qrcode.save()
+        self.assertEqual(self.scan().status_code, 404)
+
+        uuid = self.qrcode.uuid
+        self.qrcode.delete()
+        self.assertIsNone(resolve(uuid, 'ru'))
+
+    def test_custom_url(self):
+        qrcode = QRCode.objects.create(
+            title='Map', content_type='custom', custom_url='https://naryn.example/map/', created_by=self.user
+        )
+        response = self.scan(qrcode)
+        self.assertRedirects(response, 'https://naryn.example/map/', fetch_redirect_response=False)
+
+    def test_scans_are_counted_on_flush(self):
+        for _ in range(3):
+            self.scan()
+        self.qrcode.refresh_from_db()
+        self.assertEqual(self.qrcode.scan_count, 0)
+
+        flush_view_counts()
+        self.qrcode.refresh_from_db()
+        self.assertEqual(self.qrcode.scan_count, 3)
+
+    def test_warm_command(self):
+        article = Article.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.user, status='published', is_published=True
+        )
+        QRCode.objects.create(title='Manas', content_type='article', article=article, created_by=self.user)
+        cache.clear()
+        call_command('warm_qr_redirects', stdout=open('/dev/null', 'w'))
+        with self.assertNumQueries(0):
+            self.scan()
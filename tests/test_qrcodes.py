@@ -0,0 +1,119 @@
+import io
+import shutil
+import tempfile
+import zipfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from PIL import Image as PILImage
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Landmark, QRCode
+from utils import qrcode_generator
+from utils.qrcode_generator import generate_qrcode, render_qrcode
+
+
+class QRCodeTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root, BASE_URL='https://naryn.example')
+        self.media_settings.enable()
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.landmark = Landmark.objects.create(
+            title='Tash Rabat', slug='tash-rabat', content='Caravanserai', location='At-Bashy',
+            user=self.admin, status='published', is_published=True
+        )
+        self.qrcode = QRCode.objects.create(
+            title='Tash Rabat sign', content_type='landmark', landmark=self.landmark, created_by=self.admin
+        )
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_renderings_are_cached(self):
+        first = render_qrcode('https://naryn.example/', 8, 'H', 'png')
+        cached = cache.get(qrcode_generator.render_key('https://naryn.example/', 8, 'H', 'png'))
+        self.assertEqual(cached, first)
+        self.assertEqual(PILImage.open(io.BytesIO(first)).size[0] % 8, 0)
+        self.assertNotEqual(render_qrcode('https://naryn.example/', 8, 'L', 'png'), first)
+
+    def test_unchanged_url_is_not_regenerated(self):
+        self.assertTrue(generate_qrcode(self.qrcode))
+        self.qrcode.save()
+        name = self.qrcode.qr_image.name
+        self.assertEqual(self.qrcode.encoded_url, 'https://naryn.example/content/landmark/tash-rabat/')
+
+        self.qrcode.title = 'Renamed sign'
+        self.assertFalse(generate_qrcode(self.qrcode))
+        self.assertEqual(self.qrcode.qr_image.name, name)
+
+        self.landmark.slug = 'tash-rabat-caravanserai'
+        self.assertTrue(generate_qrcode(self.qrcode))
+        self.assertIn('tash-rabat-caravanserai', self.qrcode.encoded_url)
+
+    def test_update_through_api_keeps_image(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/qrcodes/', {
+            'title': 'Sign', 'content_type': 'custom', 'custom_url': 'https://naryn.example/map/'
+        })
+        self.assertEqual(response.status_code, 201)
+        image = response.data['qr_image']
+
+        response = self.client.patch(f"/api/qrcodes/{response.data['id']}/", {'title': 'Map sign'})
+        self.assertEqual(response.data['qr_image'], image)
+
+    def test_image_endpoint_png(self):
+        response = self.client.get(f'/api/qrcodes/{self.qrcode.pk}/image/?size=4&ec=Q')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(PILImage.open(io.BytesIO(content)).format, 'PNG')
+
+        cached = self.client.get(
+            f'/api/qrcodes/{self.qrcode.pk}/image/?size=4&ec=Q', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_image_endpoint_svg(self):
+        response = self.client.get(f'/api/qrcodes/{self.qrcode.pk}/image/?fmt=svg')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', b''.join(response.streaming_content))
+
+    def test_image_endpoint_validates_options(self):
+        for query in ('fmt=gif', 'ec=X', 'size=0', 'size=big'):
+            response = self.client.get(f'/api/qrcodes/{self.qrcode.pk}/image/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_inactive_qrcode_is_not_rendered(self):
+        self.qrcode.is_active = False
+        self.qrcode.save()
+        response = self.client.get(f'/api/qrcodes/{self.qrcode.pk}/image/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_landmark_batch(self):
+        for i in range(3):
+            Landmark.objects.create(
+                title=f'Landmark {i}', slug=f'landmark-{i}', content='Site', location='Naryn',
+                user=self.admin, status='published', is_published=True
+            )
+        Landmark.objects.create(title='Draft', slug='draft', content='Site', location='Naryn', user=self.admin)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/qrcodes/landmarks/?fmt=svg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-QR-Code-Count'], '4')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(),
+            ['landmark-0.svg', 'landmark-1.svg', 'landmark-2.svg', 'tash-rabat.svg']
+        )
+
+        response = self.client.get(f'/api/qrcodes/landmarks/?ids={self.landmark.pk}')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['tash-rabat.png'])
+
+    def test_landmark_batch_requires_admin(self):
+        response = self.client.get('/api/qrcodes/landmarks/')
+        self.assertIn(response.status_code, (401, 403))
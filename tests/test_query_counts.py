@@ -0,0 +1,54 @@
+from django.contrib.contenttypes.models import ContentType
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Category, Tag, Article, Story, Landmark
+from api.mixins import get_related_lookups
+from api.serializers import ArticleSerializer
+
+from .helpers import QueryCountAssertionsMixin
+
+
+class ContentListQueryCountTestCase(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='History', slug='history')
+        self.tags = [
+            Tag.objects.create(name='Tag %d' % i, slug='tag-%d' % i)
+            for i in range(3)
+        ]
+        self.counter = 0
+        # Content types are cached per process, warm the cache like a running server would
+        ContentType.objects.get_for_models(Article, Story, Landmark)
+
+    def create_rows(self, model, count, **extra):
+        for _ in range(count):
+            self.counter += 1
+            user = User.objects.create_user(email='author%d@example.com' % self.counter, password='pass')
+            obj = model.objects.create(
+                title='Item %d' % self.counter,
+                slug='item-%d' % self.counter,
+                content='Body',
+                user=user,
+                category=self.category,
+                status='published',
+                is_published=True,
+                **extra
+            )
+            obj.tags.set(self.tags)
+
+    def test_serializer_relations_are_detected(self):
+        select, prefetch = get_related_lookups(ArticleSerializer)
+        self.assertEqual(select, ('category', 'user'))
+        self.assertEqual(prefetch, ('renditions', 'tags'))
+
+    def test_article_list_query_count_is_constant(self):
+        self.create_rows(Article, 2)
+        # ETag validators + count + page + renditions and tags prefetches
+        self.assertNumQueriesPerPage(5, '/api/articles/', lambda: self.create_rows(Article, 10))
+
+    def test_story_list_query_count_is_constant(self):
+        self.create_rows(Story, 2)
+        self.assertNumQueriesPerPage(4, '/api/stories/', lambda: self.create_rows(Story, 10))
+
+    def test_landmark_list_query_count_is_constant(self):
+        self.create_rows(Landmark, 2, location='Naryn')
+        self.assertNumQueriesPerPage(5, '/api/landmarks/', lambda: self.create_rows(Landmark, 10, location='Naryn'))
@@ -0,0 +1,130 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Category, Tag
+from utils.response_cache import get_stats, reset_stats
+
+
+class ResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_stats()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.category = Category.objects.create(name='History', slug='history')
+        self.tag = Tag.objects.create(name='Silk Road', slug='silk-road')
+        self.article = Article.objects.create(
+            title='Manas', slug='manas', content='Epic', user=self.user,
+            category=self.category, status='published', is_published=True
+        )
+
+    def test_anonymous_list_is_served_from_cache(self):
+        first = self.client.get('/api/articles/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/articles/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get('/api/articles/?page=1')
+        response = self.client.get('/api/articles/?page=1&ordering=title')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_save_invalidates_cached_responses(self):
+        self.client.get('/api/articles/')
+        self.article.title = 'Manas Epic'
+        self.article.save()
+
+        response = self.client.get('/api/articles/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Manas Epic')
+
+    def test_related_model_change_invalidates_cached_responses(self):
+        self.client.get('/api/articles/')
+        self.category.name = 'Heritage'
+        self.category.save()
+
+        response = self.client.get('/api/articles/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_tag_changes_invalidate_cached_responses(self):
+        self.client.get('/api/articles/')
+        self.article.tags.add(self.tag)
+        self.assertEqual(self.client.get('/api/articles/')['X-Cache'], 'MISS')
+
+        self.client.get('/api/articles/')
+        self.tag.articles.clear()
+        self.assertEqual(self.client.get('/api/articles/')['X-Cache'], 'MISS')
+
+    def test_unrelated_change_keeps_cached_responses(self):
+        self.client.get('/api/categories/')
+        Article.objects.create(
+            title='Tash Rabat', slug='tash-rabat', content='Caravanserai', user=self.user,
+            status='published', is_published=True
+        )
+        self.assertEqual(self.client.get('/api/categories/')['X-Cache'], 'HIT')
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.get('/api/articles/')
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/articles/')
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_authorization_header_bypasses_cache(self):
+        self.client.get('/api/articles/')
+        response = self.client.get('/api/articles/', HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertFalse(response.has_header('X-Cache'))
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_cache_can_be_disabled(self):
+        self.client.get('/api/articles/')
+        response = self.client.get('/api/articles/')
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_stats_endpoint(self):
+        self.client.get('/api/articles/')
+        self.client.get('/api/articles/')
+        self.client.get('/api/articles/')
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['hits'], 2)
+        self.assertEqual(response.data['misses'], 1)
+        self.assertEqual(response.data['hit_ratio'], round(2 / 3, 4))
+
+    def test_stats_endpoint_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, 403)
+
+
+class FileBasedResponseCacheTestCase(ResponseCacheTestCase):
+    """The same behaviour on a cache backend shared between processes."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.TemporaryDirectory()
+        cls.cache_settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cls.cache_dir.name,
+            }
+        })
+        cls.cache_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.cache_settings.disable()
+        cls.cache_dir.cleanup()
+
+    def test_stats_report_backend(self):
+        self.assertEqual(get_stats()['backend'], 'django.core.cache.backends.filebased.FileBasedCache')
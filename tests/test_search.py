@@ -0,0 +1,73 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Story
+from content.search import create_search_vector_indexes, fallback_index, search, search_vector_index_sql
+
+
+class FullTextSearchTestCase(APITestCase):
+    def setUp(self):
+        fallback_index.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.manas = Article.objects.create(
+            title_en='Manas epic', title_ru='Эпос Манас', slug='manas',
+            content_en='The longest epic poem', summary_en='Kyrgyz oral tradition',
+            user=self.user, status='published', is_published=True
+        )
+        self.felt = Article.objects.create(
+            title_en='Shyrdak felt carpets', slug='shyrdak',
+            content_en='Felt making is part of the epic of daily life',
+            user=self.user, status='published', is_published=True
+        )
+
+    def test_results_are_ranked_by_weight(self):
+        results = list(search(Article.objects.all(), 'epic'))
+        # A title match outranks a body match
+        self.assertEqual(results, [self.manas, self.felt])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(list(search(Article.objects.all(), 'felt epic')), [self.felt])
+        self.assertEqual(list(search(Article.objects.all(), 'felt manas')), [])
+
+    def test_search_uses_active_language_with_fallback(self):
+        with translation.override('ru'):
+            self.assertEqual(list(search(Article.objects.all(), 'манас')), [self.manas])
+            # Untranslated articles are indexed with their English text
+            self.assertEqual(list(search(Article.objects.all(), 'shyrdak')), [self.felt])
+
+    def test_index_follows_saves_and_deletes(self):
+        search(Article.objects.all(), 'epic')  # build the index
+        self.felt.content_en = 'Felt making in Naryn'
+        self.felt.save()
+        self.assertEqual(list(search(Article.objects.all(), 'epic')), [self.manas])
+        self.manas.delete()
+        self.assertEqual(list(search(Article.objects.all(), 'epic')), [])
+
+    def test_vectors_are_only_read_by_search(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/articles/')
+            self.client.get('/api/feed/')
+            list(Article.objects.all())
+        self.assertFalse([query for query in queries.captured_queries if 'search_vector' in query['sql']])
+
+    def test_vector_indexes_stay_out_of_the_model_state(self):
+        self.assertFalse([index for index in Article._meta.indexes if 'search_vector_en' in index.fields])
+        statements = search_vector_index_sql(connection)
+        self.assertEqual(len(statements), 4 * 3)
+        self.assertIn('CREATE INDEX IF NOT EXISTS "content_article_fts_ru" ON "content_article" USING gin', statements[2])
+        # GIN indexes are PostgreSQL only
+        with self.assertNumQueries(0):
+            create_search_vector_indexes()
+
+    def test_api_search_param(self):
+        Story.objects.create(
+            title_en='Manas and the horse', slug='manas-story', content_en='A tale',
+            user=self.user, status='published', is_published=True
+        )
+        response = self.client.get('/api/articles/', {'search': 'tradition'})
+        self.assertEqual([item['slug'] for item in response.data['results']], ['manas'])
+        response = self.client.get('/api/stories/', {'search': 'manas'})
+        self.assertEqual([item['slug'] for item in response.data['results']], ['manas-story'])
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from accounts.models import User
+from api.serializers import SUMMARY_LENGTH
+from content.models import Article, Category
+
+from .helpers import QueryCountAssertionsMixin
+
+
+class SparseFieldsTestCase(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.category = Category.objects.create(name='History', slug='history')
+        self.article = Article.objects.create(
+            title_en='Manas', title_ky='Манас', title_ru='Манас (ru)', slug='manas',
+            content_en='Epic ' * 1000, content_ky='Эпос ' * 1000, summary_en='Summary ' * 100,
+            category=self.category, user=self.user, status='published', is_published=True
+        )
+        # Not translated to Kyrgyz, so it falls back to English
+        Article.objects.create(
+            title_en='Shyrdak', slug='shyrdak', content_en='Felt', user=self.user,
+            status='published', is_published=True
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_compact_list(self):
+        response, sql = self.get('/api/articles/?ordering=created_at')
+        item = response.data['results'][0]
+        self.assertNotIn('content', item)
+        self.assertEqual(item['author_name'], 'author@example.com')
+        self.assertEqual(item['category_name'], 'History')
+        self.assertLessEqual(len(item['summary']), SUMMARY_LENGTH)
+        self.assertNotIn('content_en', sql)
+
+        # Details keep the full body
+        response, sql = self.get('/api/articles/manas/')
+        self.assertEqual(response.data['content'], 'Epic ' * 1000)
+
+    def test_selected_fields(self):
+        response, sql = self.get('/api/articles/?fields=id,title,unknown&ordering=created_at')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+        self.assertNotIn('summary_en', sql)
+        self.assertNotIn('category', sql)
+
+        response, sql = self.get('/api/articles/manas/?fields=content')
+        self.assertEqual(set(response.data), {'content'})
+
+    def test_language(self):
+        response, sql = self.get('/api/articles/?lang=ky&fields=slug,title&ordering=created_at')
+        self.assertEqual(response['Content-Language'], 'ky')
+        self.assertEqual(
+            [(item['slug'], item['title']) for item in response.data['results']],
+            [('manas', 'Манас'), ('shyrdak', 'Shyrdak')]
+        )
+        self.assertIn('title_ky', sql)
+        self.assertNotIn('title_ru', sql)
+
+    def add_rows(self):
+        for i in range(10):
+            user = User.objects.create_user(email=f'author{i}@example.com', password='pass')
+            Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', content='Article', user=user,
+                category=self.category, status='published', is_published=True
+            )
+
+    def test_no_deferred_loads(self):
+        # ETag validators + count + page + tags prefetch; the deferred columns are never read
+        self.assertNumQueriesPerPage(4, '/api/articles/?fields=title,author_name,category_name,tags', self.add_rows)
@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from accounts.models import User
+from content.models import Article, Story, Tag
+from content.tag_stats import reconcile_counts
+
+
+class TagStatsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='author@example.com', password='pass')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.felt, self.music, self.epic = [
+            Tag.objects.create(name=name, slug=name.lower()) for name in ['Felt', 'Music', 'Epic']
+        ]
+
+    def content(self, model, slug, tags, published=True):
+        obj = model.objects.create(
+            title=slug, slug=slug, content='Text', user=self.user,
+            status='published' if published else 'draft', is_published=published
+        )
+        obj.tags.set(tags)
+        return obj
+
+    def counts(self, tag):
+        tag.refresh_from_db()
+        return tag.article_count, tag.story_count, tag.landmark_count, tag.usage_count
+
+    def test_counts_follow_tagging_and_publication(self):
+        article = self.content(Article, 'shyrdak', [self.felt, self.music])
+        self.content(Story, 'manas', [self.epic, self.music])
+        draft = self.content(Article, 'draft', [self.felt], published=False)
+        self.assertEqual(self.counts(self.felt), (1, 0, 0, 1))
+        self.assertEqual(self.counts(self.music), (1, 1, 0, 2))
+
+        # Removing a tag the article doesn't carry changes nothing
+        article.tags.remove(self.music, self.epic)
+        self.assertEqual(self.counts(self.music), (0, 1, 0, 1))
+        self.assertEqual(self.counts(self.epic), (0, 1, 0, 1))
+
+        # Publishing counts the draft's tags in, unpublishing counts them out
+        draft = Article.objects.get(pk=draft.pk)
+        draft.status, draft.is_published = 'published', True
+        draft.save()
+        self.assertEqual(self.counts(self.felt), (2, 0, 0, 2))
+        article = Article.objects.get(pk=article.pk)
+        article.status = 'approved'
+        article.save()
+        self.assertEqual(self.counts(self.felt), (1, 0, 0, 1))
+
+        # Edits that keep it published don't touch the counts
+        with CaptureQueriesContext(connection) as queries:
+            draft.content = 'Edited'
+            draft.save(update_fields=['content'])
+        self.assertFalse([query for query in queries.captured_queries if 'content_tag' in query['sql']])
+
+        self.felt.articles.clear()
+        self.assertEqual(self.counts(self.felt), (0, 0, 0, 0))
+        self.felt.articles.add(draft, article)
+        self.assertEqual(self.counts(self.felt), (1, 0, 0, 1))
+
+        draft.delete()
+        self.assertEqual(self.counts(self.felt), (0, 0, 0, 0))
+
+    def test_bulk_publish(self):
+        article = self.content(Article, 'shyrdak', [self.felt], published=False)
+        Article.objects.filter(pk=article.pk).update(status='approved')
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/moderation/bulk/', {'action': 'publish', 'items': [
+            {'content_type': 'article', 'object_id': article.pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(self.felt), (1, 0, 0, 1))
+
+    def test_reconcile(self):
+        self.content(Article, 'shyrdak', [self.felt, self.music])
+        self.content(Story, 'manas', [self.music])
+        Tag.objects.update(article_count=5, story_count=0, usage_count=5)
+        self.assertEqual(reconcile_counts(dry_run=True), 3)
+        call_command('reconcile_tag_counts', stdout=StringIO())
+        self.assertEqual(self.counts(self.felt), (1, 0, 0, 1))
+        self.assertEqual(self.counts(self.music), (1, 1, 0, 2))
+        self.assertEqual(self.counts(self.epic), (0, 0, 0, 0))
+        self.assertEqual(reconcile_counts(), 0)
+
+    def test_popular_endpoint(self):
+        self.content(Article, 'shyrdak', [self.felt, self.music])
+        self.content(Article, 'komuz', [self.music])
+        self.content(Story, 'manas', [self.epic])
+
+        # The ETag validators and the tags
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tags/popular/')
+        self.assertEqual(
+            [(item['slug'], item['count'], item['weight']) for item in response.data],
+            [('music', 2, 1.0), ('epic', 1, 0.5), ('felt', 1, 0.5)]
+        )
+
+        response = self.client.get('/api/tags/popular/?type=story')
+        self.assertEqual([item['slug'] for item in response.data], ['epic'])
+        self.assertEqual(self.client.get('/api/tags/popular/?type=video').status_code, 400)
+
+        # Counts move with tagging, past the response cache
+        self.content(Story, 'kojojash', [self.felt])
+        response = self.client.get('/api/tags/popular/?limit=1&type=story')
+        self.assertEqual([(item['slug'], item['story_count']) for item in response.data], [('epic', 1)])
+        self.assertEqual(len(self.client.get('/api/tags/popular/?type=story').data), 2)
+
+        response = self.client.get('/api/tags/?ordering=-usage_count')
+        self.assertEqual(response.data['results'][0]['slug'], 'music')
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import BackgroundJob, OutboxEmail
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at']
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipient', 'status', 'digest', 'attempts', 'send_after', 'sent_at']
+    list_filter = ['status', 'digest']
+    search_fields = ['recipient', 'subject']
+    readonly_fields = ['last_error', 'created_at', 'sent_at']
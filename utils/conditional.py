@@ -0,0 +1,104 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import get_language
+from rest_framework.response import Response
+
+from .response_cache import get_tag_versions
+
+
+def make_etag(request, tags, validators=()):
+    """
+    Weak ETag of the representation a GET request asks for: its path, query
+    string, language, Accept header and user, the generations of the cache
+    tags it renders and any validators of the rows behind it. It is weak
+    because buffered view counts can change without the tags moving.
+    """
+    user = getattr(request, 'user', None)
+    parts = [
+        request.path,
+        '&'.join(sorted(request.GET.urlencode().split('&'))),
+        get_language() or '',
+        request.META.get('HTTP_ACCEPT', ''),
+        str(user.pk) if user is not None and user.is_authenticated else '',
+    ]
+    parts.extend(str(version) for version in get_tag_versions(tags))
+    parts.extend(str(value) for value in validators)
+    return 'W/"{}"'.format(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    """
+    Answer 304 Not Modified if the client's If-None-Match or If-Modified-Since
+    matches, otherwise build the response with get_response() and attach the
+    validators to it.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        return response
+
+    response = get_response()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for the list and retrieve actions of a viewset, decided
+    before anything is serialized.
+
+    List ETags add the newest ``conditional_timestamp`` and the row count of
+    the filtered queryset, read in one aggregate query. The generations of
+    ``cache_tags`` only move in the process that made a change, so they
+    can't be the only validator when other workers and the job runner
+    write too. Details add the object's ``conditional_timestamp`` field,
+    read on its own, and carry it as Last-Modified.
+    """
+    cache_tags = ()
+    conditional_timestamp = None
+
+    def list_validators(self, queryset):
+        """The newest conditional_timestamp and the number of rows of queryset."""
+        aggregates = {'count': Count('pk')}
+        if self.conditional_timestamp:
+            aggregates['latest'] = Max(self.conditional_timestamp)
+        values = queryset.order_by().aggregate(**aggregates)
+        return (values['count'], values.get('latest'))
+
+    def list(self, request, *args, **kwargs):
+        # Filtered once, for the validators and the page alike
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def get_response():
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        return conditional_response(
+            request, make_etag(request, self.cache_tags, self.list_validators(queryset)), None, get_response,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        last_modified = None
+        if self.conditional_timestamp:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            last_modified = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list(self.conditional_timestamp, flat=True)
+                .first()
+            )
+            if last_modified is None:
+                # Missing or hidden: let retrieve() answer it
+                return super().retrieve(request, *args, **kwargs)
+        return conditional_response(
+            request, make_etag(request, self.cache_tags, (last_modified,)), last_modified,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
@@ -0,0 +1,69 @@
+"""
+PostgreSQL backend that borrows connections from an in-process pool.
+
+Django opens a connection when a request first queries the database and
+closes it when the request finishes (CONN_MAX_AGE = 0). With this backend,
+"opening" takes an idle connection from the worker's pool and "closing"
+hands it back, so the TCP and TLS handshakes and the authentication round
+trips happen once per pooled connection instead of once per request.
+
+Enabled with DB_POOL_ENABLED; the pool options come from the ``POOL`` entry
+of the database settings (``max_size`` and ``timeout``).
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+
+from .pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    # Keyed by process, since connections must not cross a fork (e.g. gunicorn --preload)
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                max_size=options.get('max_size', 4),
+                timeout=options.get('timeout', 10),
+            )
+        return _pools[key]
+
+
+def _in_transaction(connection):
+    # 0 is IDLE for both psycopg2 and psycopg 3
+    return connection.info.transaction_status != 0
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        check = self._check_pooled if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        return self.pool.get(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params), check)
+
+    def _check_pooled(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except self.Database.Error:
+            return False
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        reusable = not (
+            connection.closed
+            or _in_transaction(connection)
+            # A query failed: only keep the connection if it still works
+            or (self.errors_occurred and not self._check_pooled(connection))
+        )
+        with self.wrap_database_errors:
+            self.pool.put(connection, reusable)
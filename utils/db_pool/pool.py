@@ -0,0 +1,73 @@
+import threading
+from collections import deque
+
+from django.db import OperationalError
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of open database connections, for one process.
+
+    At most ``max_size`` connections are lent out at a time; a thread asking
+    for one more waits up to ``timeout`` seconds. Idle connections are
+    reused newest first, so the oldest ones are left to go stale and are
+    replaced once a health check fails.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def get(self, connect, check=None):
+        """
+        Lend a connection: an idle one that passes check(connection), or a
+        new one from connect(). Raises OperationalError when every
+        connection is in use for longer than the timeout.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f'Database connection pool exhausted: {self.max_size} connections in use for {self.timeout}s'
+            )
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return connect()
+                if check is None or check(connection):
+                    return connection
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection, reusable=True):
+        """Take a lent connection back, keeping it open for reuse or closing it."""
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append(connection)
+            else:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -1,48 +1,221 @@
-from PIL import Image as PILImage
-import io
-from django.core.files.base import ContentFile
+import logging
 import os
+import tempfile
+from django.conf import settings
+from django.core.files import File
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Encoded output stays in memory up to this size, then spills to a temporary file
+SPOOL_MAX_SIZE = 1024 * 1024  # 1 MB
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when decoding an image would exceed the configured memory limits"""
+
+
+def max_image_pixels():
+    """
+    Largest source image, in pixels, that will be decoded at all. A tiny
+    file can declare huge dimensions (a decompression bomb), so the limit
+    follows the upload size limit rather than the file size.
+    """
+    return getattr(settings, 'MAX_IMAGE_PIXELS', settings.MAX_IMAGE_UPLOAD_SIZE * 10)
+
+
+def peak_rss():
+    """Peak resident set size of this process in KB, if the platform reports it."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def open_image(file, max_size):
+    """
+    Decodes an image no larger than needed to produce max_size.
+
+    JPEGs are downscaled by libjpeg while decoding (Image.draft), other
+    formats are box-reduced right after loading, before any mode conversion,
+    so the full-resolution bitmap is dropped as early as possible.
+
+    Args:
+        file: Open file or Django File with the encoded image
+        max_size: Largest (width, height) that will be produced from it
+
+    Returns:
+        (image, stats) where image is a loaded RGB or L image and stats
+        describes the decode
+
+    Raises:
+        ImageTooLargeError: the image exceeds MAX_IMAGE_PIXELS or its
+        decoded bitmap would exceed IMAGE_DECODE_MAX_MEMORY
+    """
+    # Imported on use, so workers that never process an upload don't load Pillow
+    from PIL import Image as PILImage
+
+    img = PILImage.open(file)  # reads the header only
+    source_size = img.size
+    width, height = source_size
+    if width * height > max_image_pixels():
+        raise ImageTooLargeError(
+            f'{width}x{height} image exceeds the limit of {max_image_pixels()} pixels'
+        )
+
+    scale = min(max_size[0] / width, max_size[1] / height, 1)
+    target = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    if img.format == 'JPEG':
+        # Decode at 1/2, 1/4 or 1/8 scale, still at least target sized
+        img.draft('L' if img.mode == 'L' else 'RGB', target)
+
+    # The bitmap that load() will allocate, now that draft() may have shrunk it.
+    # Pillow stores multi-band pixels in 4 bytes
+    decoded_bytes = img.width * img.height * (1 if img.mode in ('1', 'L', 'P') else 4)
+    max_memory = getattr(settings, 'IMAGE_DECODE_MAX_MEMORY', 128 * 1024 * 1024)
+    if decoded_bytes > max_memory:
+        raise ImageTooLargeError(
+            f'Decoding {width}x{height} image needs {decoded_bytes} bytes, limit is {max_memory}'
+        )
+
+    rss_before = peak_rss()
+    img.load()
+    decoded_size = img.size
+
+    # Keep twice the target size so the final LANCZOS pass has detail to work with
+    factor = min(img.width // target[0], img.height // target[1]) // 2
+    if factor >= 2:
+        img = img.reduce(factor)
+
+    # JPEG has no alpha channel or palette
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    rss_after = peak_rss()
+    stats = {
+        'source_size': source_size,
+        'decoded_size': decoded_size,
+        'decoded_bytes': decoded_bytes,
+        'peak_rss_kb': rss_after,
+        # How much this decode raised the process peak, if it did
+        'peak_rss_growth_kb': rss_after - rss_before if rss_after is not None else None,
+    }
+    logger.info(
+        'Decoded %sx%s image at %sx%s (%d KB bitmap), peak RSS %s KB (+%s KB)',
+        width, height, decoded_size[0], decoded_size[1], decoded_bytes // 1024,
+        stats['peak_rss_kb'], stats['peak_rss_growth_kb'],
+    )
+    return img, stats
+
+
+def encode_image(img, pil_format, name, quality=85, **options):
+    """
+    Encodes an image into a spooled temporary file, so storage reads it in
+    chunks instead of copying one more buffer of the whole output.
+
+    Returns:
+        Django File positioned at the start; the caller closes it
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    img.save(spool, format=pil_format, quality=quality, **options)
+    spool.seek(0)
+    return File(spool, name=name)
+
 
 def compress_image(image_field, quality=85, max_size=(1920, 1080)):
     """
     Compresses an image to reduce file size while maintaining acceptable quality.
-    
+
     Args:
         image_field: Django ImageField to compress
         quality: JPEG compression quality (1-100)
         max_size: Maximum dimensions (width, height)
-        
+
     Returns:
         True if compression was successful, False otherwise
     """
+    from PIL import Image as PILImage
+
     if not image_field:
         return False
-    
-    # Open the image
-    img = PILImage.open(image_field)
-    
-    # Convert to RGB if RGBA (removes alpha channel)
-    if img.mode == 'RGBA':
-        img = img.convert('RGB')
-    
+
+    image_field.open('rb')
+    try:
+        img, stats = open_image(image_field, max_size)
+    finally:
+        image_field.close()
+
     # Resize if larger than max_size
     if img.width > max_size[0] or img.height > max_size[1]:
         img.thumbnail(max_size, PILImage.LANCZOS)
-    
-    # Save compressed image to buffer
-    buffer = io.BytesIO()
-    img.save(buffer, format='JPEG', quality=quality, optimize=True)
-    
+
     # Get the original filename and create new filename
     filename = os.path.basename(image_field.name)
     name, ext = os.path.splitext(filename)
     new_filename = f"{name}_compressed.jpg"
-    
-    # Save compressed image back to the field
-    image_field.save(
-        new_filename,
-        ContentFile(buffer.getvalue()),
-        save=False
-    )
-    
+
+    # Stream the compressed image back to the field
+    output = encode_image(img, 'JPEG', new_filename, quality=quality, optimize=True)
+    try:
+        image_field.save(new_filename, output, save=False)
+    finally:
+        output.close()
+
     return True
+
+
+# Renditions generated for every uploaded image, largest first so each size
+# can be resized from the one before it
+RENDITION_SIZES = [
+    ('large', (1920, 1080)),
+    ('medium', (960, 960)),
+    ('thumb', (320, 320)),
+]
+
+# (format name, Pillow format, file extension, save options)
+RENDITION_FORMATS = [
+    ('jpeg', 'JPEG', 'jpg', {'optimize': True}),
+    ('webp', 'WEBP', 'webp', {'method': 4}),
+]
+
+
+def generate_renditions(image_field, quality=85):
+    """
+    Generates the resized copies of an image.
+
+    The source is decoded once, no larger than the biggest rendition needs
+    (see open_image), and every size is downscaled from the previous one.
+
+    Args:
+        image_field: Django ImageField to read from
+        quality: JPEG/WebP compression quality (1-100)
+
+    Yields:
+        (size, format, width, height, File) for each rendition. The file is
+        closed once the next rendition is requested, so save it right away.
+    """
+    from PIL import Image as PILImage
+
+    if not image_field:
+        return
+
+    image_field.open('rb')
+    try:
+        img, stats = open_image(image_field, RENDITION_SIZES[0][1])
+    finally:
+        image_field.close()
+
+    name = os.path.splitext(os.path.basename(image_field.name))[0]
+    for size, max_size in RENDITION_SIZES:
+        if img.width > max_size[0] or img.height > max_size[1]:
+            img.thumbnail(max_size, PILImage.LANCZOS)
+        for format_name, pil_format, ext, options in RENDITION_FORMATS:
+            output = encode_image(img, pil_format, f"{name}_{size}.{ext}", quality=quality, **options)
+            try:
+                yield size, format_name, img.width, img.height, output
+            finally:
+                output.close()
@@ -0,0 +1,232 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# name -> function of every registered job
+registry = {}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def job(name, max_attempts=3):
+    """
+    Register a function as a background job. The function gets a
+    ``delay(*args, **kwargs)`` attribute that queues a call to it; the
+    arguments must be JSON serializable.
+    """
+    def decorator(func):
+        registry[name] = func
+        func.job_name = name
+        func.delay = lambda *args, **kwargs: enqueue(name, *args, max_attempts=max_attempts, **kwargs)
+        return func
+    return decorator
+
+
+def enqueue(name, *args, max_attempts=3, run_after=None, **kwargs):
+    """
+    Queue a registered job. With BACKGROUND_JOBS_EAGER the job runs right
+    away in the calling thread instead, which is what tests use.
+    """
+    if name not in registry:
+        raise KeyError(f'Unknown background job: {name}')
+
+    queued = BackgroundJob.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+    if _setting('BACKGROUND_JOBS_EAGER', False):
+        claimed = claim_job(queued.pk, 'eager')
+        if claimed is not None:
+            run_job(claimed)
+            queued.refresh_from_db()
+    return queued
+
+
+def enqueue_many(name, arg_lists, max_attempts=3):
+    """
+    Queue one call of a registered job per list of positional arguments,
+    with a single INSERT. Eager mode runs them one by one, like enqueue.
+    """
+    if name not in registry:
+        raise KeyError(f'Unknown background job: {name}')
+    if _setting('BACKGROUND_JOBS_EAGER', False):
+        return [enqueue(name, *args, max_attempts=max_attempts) for args in arg_lists]
+    now = timezone.now()
+    return BackgroundJob.objects.bulk_create([
+        BackgroundJob(name=name, args=list(args), kwargs={}, max_attempts=max_attempts, run_after=now)
+        for args in arg_lists
+    ])
+
+
+def claim_job(pk, worker_id):
+    """
+    Atomically move a pending job to running. The status check in the
+    UPDATE makes this safe even on databases without row locking.
+    """
+    claimed = BackgroundJob.objects.filter(pk=pk, status=BackgroundJob.STATUS_PENDING).update(
+        status=BackgroundJob.STATUS_RUNNING,
+        locked_by=worker_id,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+    return BackgroundJob.objects.get(pk=pk)
+
+
+def claim_next_job(worker_id):
+    """Claim the oldest due job, skipping rows other workers have locked."""
+    with transaction.atomic():
+        candidates = list(
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status=BackgroundJob.STATUS_PENDING, run_after__lte=timezone.now())
+            .order_by('run_after', 'id')
+            .values_list('pk', flat=True)[:5]
+        )
+        for pk in candidates:
+            claimed = claim_job(pk, worker_id)
+            if claimed is not None:
+                return claimed
+    return None
+
+
+def run_job(queued):
+    """Run a claimed job and record the outcome. Failed jobs are retried with backoff."""
+    func = registry.get(queued.name)
+    try:
+        if func is None:
+            raise KeyError(f'Unknown background job: {queued.name}')
+        func(*queued.args, **queued.kwargs)
+    except Exception:
+        logger.exception('Background job %s #%s failed', queued.name, queued.pk)
+        error = traceback.format_exc()
+        if queued.attempts >= queued.max_attempts:
+            BackgroundJob.objects.filter(pk=queued.pk).update(
+                status=BackgroundJob.STATUS_FAILED, last_error=error, finished_at=timezone.now()
+            )
+        else:
+            delay = _setting('BACKGROUND_JOBS_RETRY_DELAY', 30) * 2 ** (queued.attempts - 1)
+            BackgroundJob.objects.filter(pk=queued.pk).update(
+                status=BackgroundJob.STATUS_PENDING, last_error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+
+    BackgroundJob.objects.filter(pk=queued.pk).update(
+        status=BackgroundJob.STATUS_DONE, last_error='', finished_at=timezone.now()
+    )
+    return True
+
+
+def requeue_stale_jobs(timeout=None):
+    """
+    Return jobs whose worker died while running them to the queue. A job
+    that was on its last attempt is marked failed instead, so one that
+    kills its worker isn't picked up forever.
+    """
+    timeout = timeout or _setting('BACKGROUND_JOBS_TIMEOUT', 10 * 60)
+    now = timezone.now()
+    stale = BackgroundJob.objects.filter(
+        status=BackgroundJob.STATUS_RUNNING,
+        locked_at__lt=now - timedelta(seconds=timeout),
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=BackgroundJob.STATUS_FAILED, locked_by='', finished_at=now,
+        last_error=f'Worker stopped responding for over {timeout} seconds',
+    )
+    return stale.update(status=BackgroundJob.STATUS_PENDING, locked_by='')
+
+
+class Worker:
+    """
+    Polls the job table from a pool of threads. Image work spends most of
+    its time in Pillow, which releases the GIL, so threads scale well enough
+    without a separate process per worker.
+    """
+
+    # Seconds between sweeps for jobs left running by a dead worker
+    requeue_interval = 60
+
+    def __init__(self, workers=1, poll_interval=1.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.prefix = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0
+
+    def _requeue_if_due(self):
+        """Sweep for stale jobs at most once per requeue_interval across all threads."""
+        now = time.monotonic()
+        with self._requeue_lock:
+            if now < self._next_requeue:
+                return
+            self._next_requeue = now + self.requeue_interval
+        requeued = requeue_stale_jobs()
+        if requeued:
+            logger.warning('Requeued %d stale background jobs', requeued)
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, once=False):
+        """Work until stopped, or until the queue is empty when once is set."""
+        threads = [
+            threading.Thread(target=self._loop, args=(f'{self.prefix}:{i}', once), daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def _loop(self, worker_id, once):
+        processed = 0
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    # Workers in other processes can die at any time, not
+                    # only before this one started
+                    self._requeue_if_due()
+                    queued = claim_next_job(worker_id)
+                    if queued is None:
+                        if once:
+                            break
+                        self._stop.wait(self.poll_interval)
+                        continue
+                    run_job(queued)
+                    processed += 1
+                except DatabaseError:
+                    # Keep the worker alive through lock timeouts and lost
+                    # connections; a job left running is requeued after
+                    # BACKGROUND_JOBS_TIMEOUT
+                    logger.exception('Worker %s hit a database error', worker_id)
+                    self._stop.wait(self.poll_interval)
+        finally:
+            connections.close_all()
+            logger.info('Worker %s processed %d jobs', worker_id, processed)
@@ -0,0 +1,192 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .jobs import job, enqueue
+from .models import BackgroundJob, OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+SEND_JOB = 'utils.send_outbox'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def email_enabled():
+    """Whether email is configured at all; SMTP needs credentials, other backends don't."""
+    return bool(settings.EMAIL_HOST_USER) or not settings.EMAIL_BACKEND.endswith('smtp.EmailBackend')
+
+
+def queue_email(subject, body, recipients, digest=''):
+    """
+    Add an email for each recipient to the outbox instead of sending it
+    during the request. Emails with a digest key wait EMAIL_DIGEST_DELAY
+    seconds so that others with the same key can be sent along with them.
+
+    Returns:
+        The number of emails queued
+    """
+    return queue_emails([(subject, body, recipients, digest)])
+
+
+def queue_emails(emails):
+    """
+    Queue many emails with a single INSERT, see queue_email.
+
+    Args:
+        emails: Iterable of (subject, body, recipients, digest)
+
+    Returns:
+        The number of emails queued
+    """
+    if not email_enabled():
+        return 0
+
+    now = timezone.now()
+    digest_send_after = now + timedelta(seconds=_setting('EMAIL_DIGEST_DELAY', 5 * 60))
+    rows = []
+    for subject, body, recipients, digest in emails:
+        send_after = digest_send_after if digest else now
+        rows.extend(
+            OutboxEmail(recipient=email, subject=subject, body=body, digest=digest, send_after=send_after)
+            for email in dict.fromkeys(recipients) if email
+        )
+    if not rows:
+        return 0
+
+    # A digest joins the one already waiting for its recipient, so emails
+    # queued over the delay go out together when the first one is due
+    digest_rows = [row for row in rows if row.digest]
+    if digest_rows:
+        pending = (
+            OutboxEmail.objects.filter(
+                status=OutboxEmail.STATUS_PENDING,
+                recipient__in={row.recipient for row in digest_rows},
+                digest__in={row.digest for row in digest_rows},
+            )
+            .values('recipient', 'digest')
+            .annotate(first=Min('send_after'))
+        )
+        waiting = {(group['recipient'], group['digest']): group['first'] for group in pending}
+        for row in digest_rows:
+            first = waiting.get((row.recipient, row.digest))
+            if first is not None and first < row.send_after:
+                row.send_after = first
+
+    OutboxEmail.objects.bulk_create(rows)
+    first = min(row.send_after for row in rows)
+    transaction.on_commit(lambda: schedule_send(first))
+    return len(rows)
+
+
+def schedule_send(when):
+    """Queue the send job for when, unless one already runs by then."""
+    if _setting('BACKGROUND_JOBS_EAGER', False) and when > timezone.now():
+        # Eager jobs run immediately; later emails go out with the next send
+        return
+    queued = BackgroundJob.objects.filter(
+        name=SEND_JOB, status=BackgroundJob.STATUS_PENDING, run_after__lte=when
+    ).exists()
+    if not queued:
+        enqueue(SEND_JOB, run_after=when)
+
+
+def build_messages(emails):
+    """
+    One message per plain email and one per (recipient, digest) group.
+    Returns a list of (message, emails it covers).
+    """
+    messages = []
+    digests = defaultdict(list)
+    for email in emails:
+        if email.digest:
+            digests[(email.recipient, email.digest)].append(email)
+        else:
+            messages.append((EmailMessage(email.subject, email.body, to=[email.recipient]), [email]))
+
+    for (recipient, digest), group in digests.items():
+        if len(group) == 1:
+            subject = group[0].subject
+        else:
+            subject = f'{group[0].subject} ({len(group)})'
+        body = '\n\n'.join(email.body for email in group)
+        messages.append((EmailMessage(subject, body, to=[recipient]), group))
+    return messages
+
+
+@job(SEND_JOB)
+def send_outbox(batch_size=None):
+    """
+    Send every due email over a single connection. The rows stay locked
+    until they are marked sent, so concurrent workers skip them and a
+    crashed worker leaves them pending.
+
+    Returns:
+        The number of messages sent
+    """
+    batch_size = batch_size or _setting('EMAIL_OUTBOX_BATCH_SIZE', 100)
+    max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent = 0
+    while True:
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxEmail.STATUS_PENDING, send_after__lte=timezone.now())
+                .order_by('send_after', 'id')[:batch_size]
+            )
+            if not emails:
+                break
+
+            messages = build_messages(emails)
+            delivered, failed = [], []
+            connection = get_connection()
+            try:
+                connection.open()
+                for message, group in messages:
+                    message.connection = connection
+                    try:
+                        connection.send_messages([message])
+                    except Exception as e:
+                        logger.warning('Could not send "%s" to %s: %s', message.subject, message.to, e)
+                        failed.extend((email, str(e)) for email in group)
+                    else:
+                        delivered.extend(group)
+                        sent += 1
+            except Exception as e:
+                # Could not connect at all; the rest of the batch waits for the retry
+                logger.warning('Could not connect to the mail server: %s', e)
+                done = {email.pk for email in delivered} | {email.pk for email, error in failed}
+                failed.extend((email, str(e)) for email in emails if email.pk not in done)
+            finally:
+                connection.close()
+
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in delivered]).update(
+                status=OutboxEmail.STATUS_SENT, sent_at=timezone.now(), last_error=''
+            )
+            retry_at = timezone.now() + timedelta(seconds=_setting('BACKGROUND_JOBS_RETRY_DELAY', 30))
+            for email, error in failed:
+                email.attempts += 1
+                email.last_error = error
+                if email.attempts >= max_attempts:
+                    email.status = OutboxEmail.STATUS_FAILED
+                else:
+                    email.send_after = retry_at
+            OutboxEmail.objects.bulk_update(
+                [email for email, error in failed], ['attempts', 'last_error', 'status', 'send_after']
+            )
+            if failed:
+                break
+
+    # Come back for digests and retries that are not due yet
+    next_email = OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING).order_by('send_after').first()
+    if next_email is not None:
+        transaction.on_commit(lambda: schedule_send(next_email.send_after))
+    return sent
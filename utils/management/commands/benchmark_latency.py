@@ -0,0 +1,93 @@
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Content endpoints requested in turn when no --path is given
+DEFAULT_PATHS = ['/api/articles/', '/api/stories/', '/api/landmarks/', '/api/categories/', '/api/feed/']
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the content APIs of a running server and print the throughput and the '
+        'p50/p90/p99 latency of each endpoint. Run it against each server setup to compare '
+        'them: database connection modes, gunicorn worker classes and counts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help=f'Endpoint to request, repeatable (default: {", ".join(DEFAULT_PATHS)})',
+        )
+        parser.add_argument('--requests', type=int, default=1000, help='Requests across all endpoints')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=20, help='Requests sent first and not measured')
+        parser.add_argument(
+            '--token', help='JWT access token; authenticated requests bypass the response cache and reach the database'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        urls = [urllib.parse.urljoin(options['base_url'], path) for path in paths]
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f'Bearer {options["token"]}'
+
+        def fetch(index):
+            url = urls[index % len(urls)]
+            request = urllib.request.Request(url, headers=headers)
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as error:
+                status = error.code
+            except urllib.error.URLError as error:
+                raise CommandError(f'Cannot reach {url}: {error.reason}')
+            return url, status, (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(fetch, range(options['warmup'])))
+            started = time.perf_counter()
+            results = list(executor.map(fetch, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+        latencies = defaultdict(list)
+        errors = 0
+        for url, status, latency in results:
+            if status == 200:
+                latencies[url].append(latency)
+            else:
+                errors += 1
+        if not latencies:
+            raise CommandError(f'No successful responses out of {len(results)}')
+
+        self.stdout.write(
+            f'{len(results)} requests, concurrency {options["concurrency"]}: '
+            f'{len(results) / elapsed:.1f} requests/s'
+        )
+        for url in urls:
+            values = sorted(latencies[url])
+            if not values:
+                self.stdout.write(self.style.WARNING(f'{url}: no successful responses'))
+                continue
+            self.stdout.write(
+                f'{url}: p50 {percentile(values, 0.5):.1f} ms, p90 {percentile(values, 0.9):.1f} ms, '
+                f'p99 {percentile(values, 0.99):.1f} ms'
+            )
+        if errors:
+            self.stdout.write(self.style.WARNING(f'{errors} responses were not 200'))
@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter, so nothing this command imported is counted as
+# already loaded. It does what a worker does before its first request:
+# configure Django, populate the apps and load the URL conf.
+STARTUP_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phases = {'settings': time.perf_counter() - started}
+django.setup()
+phases['apps'] = time.perf_counter() - started - sum(phases.values())
+if sys.argv[1] == 'urls':
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    phases['urls'] = time.perf_counter() - started - sum(phases.values())
+print(json.dumps(phases))
+'''
+
+
+def parse_importtime(output):
+    """
+    Parses the report of ``python -X importtime`` into (module, self_us,
+    cumulative_us) tuples, in import order.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def group_by_package(modules, app_modules):
+    """
+    Totals the self time of modules by the installed app they belong to, or
+    by their top-level package otherwise. Returns {name: microseconds}.
+    """
+    # Longest names first, so 'django.contrib.admin' wins over 'django'
+    roots = sorted(app_modules, key=len, reverse=True)
+    totals = defaultdict(int)
+    for name, self_us, _cumulative_us in modules:
+        for root in roots:
+            if name == root or name.startswith(root + '.'):
+                totals[root] += self_us
+                break
+        else:
+            totals[name.split('.')[0]] += self_us
+    return dict(totals)
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile a cold start: time the settings, app loading and URL conf phases in a fresh '
+        'interpreter and report the import time spent in each installed app, package and module.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Packages and modules to list')
+        parser.add_argument('--no-urls', action='store_true', help='Stop after app loading, before the URL conf')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, 'apps' if options['no_urls'] else 'urls'],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Startup failed:\n{result.stderr[-2000:]}')
+
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr)
+        app_modules = {config.name for config in apps.get_app_configs()}
+        limit = options['limit']
+
+        self.stdout.write(f'Startup: {sum(phases.values()) * 1000:.0f} ms')
+        for phase, seconds in phases.items():
+            self.stdout.write(f'  {phase}: {seconds * 1000:.0f} ms')
+
+        self.stdout.write(f'\nImport time by app or package ({len(modules)} modules):')
+        totals = group_by_package(modules, app_modules)
+        for name, microseconds in sorted(totals.items(), key=lambda item: -item[1])[:limit]:
+            label = ' (app)' if name in app_modules else ''
+            self.stdout.write(f'  {microseconds / 1000:8.1f} ms  {name}{label}')
+
+        self.stdout.write('\nSlowest modules, including what they import:')
+        for name, self_us, cumulative_us in sorted(modules, key=lambda module: -module[2])[:limit]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f} ms  {name} (self {self_us / 1000:.1f} ms)')
@@ -0,0 +1,43 @@
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from utils.models import MediaBlob
+from utils.storage import ContentAddressedStorage, media_storage
+
+
+class Command(BaseCommand):
+    help = 'Recount references to content-addressed media blobs and delete unreferenced ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report without changing anything')
+
+    def handle(self, *args, **options):
+        references = Counter()
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                    names = model._base_manager.exclude(**{field.name: ''}).values_list(field.name, flat=True)
+                    references.update(name for name in names if name)
+
+        fixed = removed = 0
+        for blob in MediaBlob.objects.iterator():
+            count = references.get(blob.name, 0)
+            if count == blob.ref_count:
+                continue
+            if count:
+                fixed += 1
+                if not options['dry_run']:
+                    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=count)
+            else:
+                removed += 1
+                if not options['dry_run']:
+                    # Last reference: the storage deletes the row and the file
+                    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=1)
+                    media_storage.delete(blob.name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {fixed} reference counts, removed {removed} unreferenced blobs'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from utils.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (image renditions and friends)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait before polling an empty queue again')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling forever')
+
+    def handle(self, *args, **options):
+        worker = Worker(workers=options['workers'], poll_interval=options['poll_interval'])
+        self.stdout.write(f"Running background jobs with {options['workers']} workers")
+        worker.run(once=options['once'])
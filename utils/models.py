@@ -0,0 +1,124 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class BackgroundJob(models.Model):
+    """A unit of work queued in the database and executed by `manage.py run_jobs`"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_DONE, _('Done')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+
+    name = models.CharField(_('name'), max_length=100)
+    args = models.JSONField(_('arguments'), default=list, blank=True)
+    kwargs = models.JSONField(_('keyword arguments'), default=dict, blank=True)
+    status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('max attempts'), default=3)
+    run_after = models.DateTimeField(_('run after'), default=timezone.now)
+    locked_by = models.CharField(_('locked by'), max_length=100, blank=True)
+    locked_at = models.DateTimeField(_('locked at'), null=True, blank=True)
+    last_error = models.TextField(_('last error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('background job')
+        verbose_name_plural = _('background jobs')
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Workers poll for the oldest due pending job
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='pending'),
+                name='utils_job_pending_queue',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class MediaBlob(models.Model):
+    """
+    A stored file identified by the SHA-256 of its bytes. Uploads with the
+    same content share one blob, which is deleted with its last reference.
+    """
+    sha256 = models.CharField(_('SHA-256'), max_length=64, unique=True)
+    name = models.CharField(_('storage name'), max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(_('size'))
+    ref_count = models.PositiveIntegerField(_('reference count'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('media blob')
+        verbose_name_plural = _('media blobs')
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent by the background worker. Rows for the same
+    recipient that share a digest key are sent together as one message.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_SENT, _('Sent')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+
+    recipient = models.EmailField(_('recipient'))
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    digest = models.CharField(_('digest'), max_length=50, blank=True)
+    status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    send_after = models.DateTimeField(_('send after'), default=timezone.now)
+    last_error = models.TextField(_('last error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('outbox email')
+        verbose_name_plural = _('outbox emails')
+        ordering = ['send_after', 'id']
+        indexes = [
+            models.Index(
+                fields=['send_after', 'id'],
+                condition=models.Q(status='pending'),
+                name='utils_outbox_pending_queue',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipient} ({self.status})"
+
+
+class TracksLoadedStatus:
+    """
+    Model mixin remembering the status a row was loaded with, so signal
+    handlers can tell which status a save moved it away from. Other fields
+    listed in ``loaded_fields`` are remembered as ``_loaded_<name>`` too.
+    """
+    loaded_fields = ('status',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        for name in cls.loaded_fields:
+            setattr(instance, f'_loaded_{name}', instance.__dict__.get(name))
+        return instance
@@ -1,56 +1,131 @@
-import qrcode
+import hashlib
 import io
+from django.core.cache import cache
 from django.core.files.base import ContentFile
-from content.models import QRCode
 from django.conf import settings
 
-def generate_qrcode(qrcode_instance):
+# Error correction levels by their usual one-letter names, mapped to the
+# qrcode.constants they stand for. qrcode (and PIL behind it) is imported
+# only when a code is rendered, not in every worker that loads the API.
+ERROR_CORRECTION_LEVELS = {
+    'L': 'ERROR_CORRECT_L',
+    'M': 'ERROR_CORRECT_M',
+    'Q': 'ERROR_CORRECT_Q',
+    'H': 'ERROR_CORRECT_H',
+}
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Pixels per QR module accepted by render_qrcode
+MIN_SIZE = 1
+MAX_SIZE = 40
+
+
+def get_qrcode_url(qrcode_instance):
     """
-    Generates a QR code image for the given QRCode instance
-    and saves it to the model's qr_image field.
-    
-    Args:
-        qrcode_instance: QRCode model instance
+    Returns the URL a QRCode instance encodes, or None if its content is missing.
     """
-    # Determine the URL to encode in the QR code
     if qrcode_instance.content_type == 'article' and qrcode_instance.article:
-        url = f"{settings.BASE_URL}/content/article/{qrcode_instance.article.slug}/"
+        return f"{settings.BASE_URL}/content/article/{qrcode_instance.article.slug}/"
     elif qrcode_instance.content_type == 'story' and qrcode_instance.story:
-        url = f"{settings.BASE_URL}/content/story/{qrcode_instance.story.slug}/"
+        return f"{settings.BASE_URL}/content/story/{qrcode_instance.story.slug}/"
     elif qrcode_instance.content_type == 'landmark' and qrcode_instance.landmark:
-        url = f"{settings.BASE_URL}/content/landmark/{qrcode_instance.landmark.slug}/"
+        return get_landmark_url(qrcode_instance.landmark)
     elif qrcode_instance.content_type == 'custom':
-        url = qrcode_instance.custom_url
-    else:
-        return None
-    
-    # Generate QR code
+        return qrcode_instance.custom_url
+    return None
+
+
+def get_landmark_url(landmark):
+    return f"{settings.BASE_URL}/content/landmark/{landmark.slug}/"
+
+
+def render_key(url, size=10, error_correction='L', image_format='png'):
+    """Cache key, and ETag, of one rendering of a URL."""
+    raw = f'{url}|{size}|{error_correction}|{image_format}'
+    return 'qr:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def render_qrcode(url, size=10, error_correction='L', image_format='png'):
+    """
+    Renders a URL as a QR code image, reusing cached renderings.
+
+    Args:
+        url: Text to encode
+        size: Pixels per module (MIN_SIZE to MAX_SIZE); for SVG, tenths of a millimetre
+        error_correction: One of ERROR_CORRECTION_LEVELS
+        image_format: 'png' or 'svg'
+
+    Returns:
+        The encoded image as bytes
+    """
+    if image_format not in CONTENT_TYPES:
+        raise ValueError(f'Unsupported QR code format: {image_format}')
+    if error_correction not in ERROR_CORRECTION_LEVELS:
+        raise ValueError(f'Unknown error correction level: {error_correction}')
+    if not MIN_SIZE <= size <= MAX_SIZE:
+        raise ValueError(f'QR code size must be between {MIN_SIZE} and {MAX_SIZE}')
+
+    key = render_key(url, size, error_correction, image_format)
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    import qrcode
+    import qrcode.image.svg
+
     qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
+        version=None,
+        error_correction=getattr(qrcode.constants, ERROR_CORRECTION_LEVELS[error_correction]),
+        box_size=size,
         border=4,
     )
     qr.add_data(url)
     qr.make(fit=True)
-    
-    # Create an image from the QR Code
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Save the image to the model field
+
     buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    filename = f'qrcode_{qrcode_instance.uuid}.png'
-    
-    # Remove old image if it exists
-    if qrcode_instance.qr_image:
-        qrcode_instance.qr_image.delete(save=False)
-    
-    # Save new image
+    if image_format == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    content = buffer.getvalue()
+
+    cache.set(key, content, getattr(settings, 'QR_CODE_CACHE_TIMEOUT', 24 * 60 * 60))
+    return content
+
+
+def generate_qrcode(qrcode_instance):
+    """
+    Generates a QR code image for the given QRCode instance
+    and saves it to the model's qr_image field.
+
+    Nothing is regenerated while the encoded URL stays the same. The
+    previous image is left for django_cleanup to delete once the instance
+    is saved with the new one.
+
+    Args:
+        qrcode_instance: QRCode model instance
+
+    Returns:
+        True if a new image was generated, False if it was up to date,
+        None if there is nothing to encode
+    """
+    url = get_qrcode_url(qrcode_instance)
+    if url is None:
+        return None
+
+    if qrcode_instance.qr_image and qrcode_instance.encoded_url == url:
+        return False
+
+    content = render_qrcode(url)
     qrcode_instance.qr_image.save(
-        filename,
-        ContentFile(buffer.getvalue()),
+        f'qrcode_{qrcode_instance.uuid}.png',
+        ContentFile(content),
         save=False
     )
-    
+    qrcode_instance.encoded_url = url
+
     return True
@@ -0,0 +1,203 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.utils.translation import get_language
+
+CACHE_PREFIX = 'rc'
+
+# Response headers that are stored alongside the cached body
+STORED_HEADERS = ('Content-Type', 'Content-Language', 'Vary', 'Allow', 'ETag', 'Last-Modified')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _tag_key(tag):
+    return f'{CACHE_PREFIX}:tag:{tag}'
+
+
+def get_tag_versions(tags):
+    """
+    Current generation of each cache tag. Missing generations are seeded
+    from the clock, so a tag that was evicted never reuses an old version.
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Move the given tags to a new generation, orphaning every response cached under them."""
+    for tag in tags:
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def is_anonymous_request(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    return 'HTTP_AUTHORIZATION' not in request.META
+
+
+def is_cacheable_request(request):
+    return (
+        _setting('RESPONSE_CACHE_ENABLED', True)
+        and request.method in ('GET', 'HEAD')
+        and is_anonymous_request(request)
+    )
+
+
+def make_cache_key(request, tags):
+    """Key for a response by path, query string, language, Accept header and tag generations."""
+    parts = [
+        request.path,
+        '&'.join(sorted(request.GET.urlencode().split('&'))),
+        get_language() or '',
+        request.META.get('HTTP_ACCEPT', ''),
+    ]
+    parts.extend(str(version) for version in get_tag_versions(tags))
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return f'{CACHE_PREFIX}:resp:{digest}'
+
+
+def record_hit(hit):
+    key = f'{CACHE_PREFIX}:stats:{"hits" if hit else "misses"}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_stats():
+    stats = cache.get_many([f'{CACHE_PREFIX}:stats:hits', f'{CACHE_PREFIX}:stats:misses'])
+    hits = stats.get(f'{CACHE_PREFIX}:stats:hits', 0)
+    misses = stats.get(f'{CACHE_PREFIX}:stats:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+        'backend': settings.CACHES['default']['BACKEND'],
+    }
+
+
+def reset_stats():
+    cache.delete_many([f'{CACHE_PREFIX}:stats:hits', f'{CACHE_PREFIX}:stats:misses'])
+
+
+def _entry_from_response(response):
+    return {
+        'status': response.status_code,
+        'content': response.content,
+        'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+        'meta': getattr(response, 'cache_meta', None),
+    }
+
+
+def _response_from_entry(entry):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def not_modified(request, response):
+    """304 Not Modified in place of response if the client already has it, else response."""
+    if not (response.has_header('ETag') or response.has_header('Last-Modified')):
+        return response
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+        response=response,
+    )
+
+
+def cached_response(request, tags, get_response, timeout=None, on_hit=None):
+    """
+    Serve request from the cache when possible, otherwise build the response
+    with get_response() and cache it if it is a 200.
+
+    Cached responses keep the ETag they were built with, or get a weak one
+    derived from the cache key, and requests that already hold it are
+    answered with 304 Not Modified.
+
+    on_hit(request, meta) runs on cache hits with the ``cache_meta`` the
+    original response carried, for side effects such as counting views.
+    """
+    if not is_cacheable_request(request):
+        return get_response()
+
+    key = make_cache_key(request, tags)
+    entry = cache.get(key)
+    if entry is not None:
+        record_hit(True)
+        if on_hit is not None:
+            on_hit(request, entry['meta'])
+        return not_modified(request, _response_from_entry(entry))
+
+    record_hit(False)
+    response = get_response()
+    if response.status_code == 200 and not response.streaming:
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if not response.has_header('ETag'):
+            # The key changes with every tag generation the response depends on
+            response['ETag'] = 'W/"{}"'.format(key.rsplit(':', 1)[-1])
+        if timeout is None:
+            timeout = _setting('RESPONSE_CACHE_TIMEOUT', 300)
+        cache.set(key, _entry_from_response(response), timeout)
+        response['X-Cache'] = 'MISS'
+        return not_modified(request, response)
+    return response
+
+
+def cache_anonymous_response(tags, timeout=None, on_hit=None):
+    """View decorator caching anonymous GET responses under the given tags."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return cached_response(
+                request, tags, lambda: view_func(request, *args, **kwargs),
+                timeout=timeout, on_hit=on_hit,
+            )
+        return wrapper
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    Caches the anonymous responses of the listed viewset actions under
+    ``cache_tags``. Authenticated requests (session or Authorization
+    header) always bypass the cache.
+    """
+    cache_tags = ()
+    cache_actions = ('list', 'retrieve')
+    cache_timeout = None
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if action not in self.cache_actions:
+            return super().dispatch(request, *args, **kwargs)
+        return cached_response(
+            request, self.cache_tags,
+            lambda: super(CachedResponseMixin, self).dispatch(request, *args, **kwargs),
+            timeout=self.cache_timeout,
+        )
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+from .models import MediaBlob
+
+BLOB_DIR = 'blobs'
+
+
+class HashingFile(File):
+    """Wraps an upload and computes its SHA-256 and size as storage reads its chunks."""
+
+    def __init__(self, file):
+        super().__init__(file, name=getattr(file, 'name', None))
+        self.digest = hashlib.sha256()
+        self.bytes_read = 0
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            self.digest.update(chunk)
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps one copy of every distinct file.
+
+    Uploads are hashed while they are written to a temporary name, then
+    moved to ``blobs/<aa>/<bb>/<sha256><ext>``, or dropped if that blob is
+    already stored. Each save adds a reference to the blob and each delete
+    (including the ones django_cleanup makes when a file is replaced or its
+    object deleted) removes one; the file goes with the last reference.
+    Files saved before this storage was used are deleted as usual.
+    """
+
+    def blob_name(self, digest, ext):
+        return posixpath.join(BLOB_DIR, digest[:2], digest[2:4], f'{digest}{ext}')
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()
+        upload = HashingFile(content)
+        temp_name = super()._save(posixpath.join(BLOB_DIR, 'tmp', f'{uuid.uuid4().hex}{ext}'), upload)
+        temp_path = self.path(temp_name)
+        digest = upload.digest.hexdigest()
+
+        name = self.blob_name(digest, ext)
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                sha256=digest, defaults={'name': name, 'size': upload.bytes_read}
+            )
+            if created or not super().exists(blob.name):
+                os.makedirs(os.path.dirname(self.path(blob.name)), exist_ok=True)
+                os.replace(temp_path, self.path(blob.name))
+            else:
+                os.remove(temp_path)
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        return blob.name
+
+    def add_reference(self, name):
+        """Count one more reference to a stored file, e.g. when copying a file name between rows."""
+        return MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+    def delete(self, name):
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return super().delete(name)
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+            super().delete(name)
+
+
+def blob_hash(name):
+    """SHA-256 of a file stored by ContentAddressedStorage, or '' for other files."""
+    return MediaBlob.objects.filter(name=name).values_list('sha256', flat=True).first() or ''
+
+
+def get_media_storage():
+    return media_storage
+
+
+media_storage = ContentAddressedStorage()